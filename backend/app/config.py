@@ -17,22 +17,127 @@ class Settings(BaseSettings):
     supabase_url: str = ""
     supabase_service_key: str = ""
 
+    # Supabase HTTP connection pool (one pool per worker process)
+    supabase_pool_size: int = 20
+    supabase_pool_keepalive: int = 10
+    supabase_pool_keepalive_expiry_s: float = 30.0
+    supabase_timeout_s: float = 10.0
+
+    # Optional direct Postgres connection (asyncpg) for the hottest reads.
+    # Leave empty to serve everything through PostgREST.
+    database_dsn: str = ""
+    database_pool_min: int = 2
+    database_pool_max: int = 10
+    database_statement_cache_size: int = 100
+
     # Supabase JWT Secret (for local token verification)
     supabase_jwt_secret: str = ""
 
-    # Groq AI
+    # Groq AI (base URL empty = the real API; point it at benchmarks/fake_ai_server.py
+    # for offline load tests)
     groq_api_key: str = ""
+    groq_base_url: str = ""
+    # Shared AsyncGroq client: connection pool, default per-call timeout (seconds),
+    # SDK retries, and the per-worker cap on concurrent LLM / transcription calls
+    llm_pool_size: int = 32
+    llm_timeout_s: float = 30.0
+    llm_max_retries: int = 1
+    llm_max_concurrency: int = 16
+    # Model routing: every LLM task runs on a tier. Each tier has a model, a latency
+    # budget (seconds, whole call) and an optional fallback tier tried on timeout/error.
+    llm_tier_fast_model: str = "llama-3.1-8b-instant"
+    llm_tier_fast_budget_s: float = 8.0
+    llm_tier_fast_fallback: str = "large"
+    llm_tier_large_model: str = "llama-3.3-70b-versatile"
+    llm_tier_large_budget_s: float = 20.0
+    llm_tier_large_fallback: str = ""
+    llm_task_tiers: str = (
+        "chat=large,title=fast,tags=fast,emotion=fast,insights=large,triage=large,summary=large"
+    )
+    # Resilience: each task has an overall deadline (seconds, fallback tiers included).
+    # A tier's circuit breaker opens after N consecutive failures or slow calls (slower
+    # than slow_fraction of the tier budget) and skips the tier for cooldown_s.
+    # Hedged tasks start a duplicate call if the first hasn't answered after hedge_delay_ms.
+    llm_task_deadlines: str = (
+        "chat=20,title=10,tags=15,emotion=10,insights=30,triage=30,summary=30"
+    )
+    llm_breaker_failures: int = 5
+    llm_breaker_slow_fraction: float = 0.8
+    llm_breaker_cooldown_s: float = 30.0
+    llm_hedge_tasks: str = ""
+    llm_hedge_delay_ms: float = 1500.0
+    # Chat context: the last N turns verbatim plus a rolling session summary, trimmed
+    # to a token budget (system prompt excluded). The summary is updated in the
+    # background once `fold_messages` more messages have aged out of the recent window.
+    chat_context_recent_turns: int = 6
+    chat_context_token_budget: int = 1500
+    chat_summary_fold_messages: int = 8
+    chat_summary_max_tokens: int = 300
+    # Emotion analysis micro-batching: wait up to N ms or K texts, then one LLM call
+    # (max items 1 disables batching)
+    emotion_batch_max_items: int = 8
+    emotion_batch_max_wait_ms: float = 25.0
+    # Journal analysis micro-batching (tags, report and emotions for several entries
+    # in one call). Analyses run as jobs started at most JOBS_RATE_PER_S, so the wait
+    # must exceed 1 / JOBS_RATE_PER_S for consecutive jobs to share a call
+    journal_batch_max_items: int = 4
+    journal_batch_max_wait_ms: float = 1000.0
+    # Local lexicon classifier in front of the emotion LLM call: texts it scores at
+    # or above the minimum confidence (0-1) are answered without an LLM call
+    emotion_local_enabled: bool = True
+    emotion_local_min_confidence: float = 0.6
+    # Sentiment scoring: batches of at least min_batch texts are split across a
+    # process pool of this many workers (0 keeps every batch in-process)
+    sentiment_pool_workers: int = 2
+    sentiment_pool_min_batch: int = 2000
 
-    # Sarvam AI TTS
+    # Sarvam AI TTS (base URL empty = the real API)
     sarvam_api_key: str = ""
+    sarvam_base_url: str = ""
 
     # Upstash Redis
     upstash_redis_url: str = ""
     upstash_redis_token: str = ""
+
+    # Read-through cache for per-user reads (Redis when UPSTASH_REDIS_URL is a
+    # redis:// or rediss:// URL, otherwise an in-process stand-in)
+    cache_enabled: bool = True
+    cache_ttl_s: int = 300
+    # In-process LRU tier in front of Redis (per worker; 0 entries disables it).
+    # Its TTL caps how stale a worker can be if a pub/sub invalidation is missed.
+    cache_local_max_entries: int = 2048
+    cache_local_max_bytes: int = 16 * 1024 * 1024
+    cache_local_ttl_s: int = 30
+    # Content-addressed LLM result cache (journal tags/report, emotion analysis).
+    # Results are keyed by their input, so the TTL only bounds storage.
+    llm_cache_ttl_s: int = 7 * 24 * 3600
+    llm_cache_local_max_entries: int = 5000
+    llm_cache_local_max_bytes: int = 32 * 1024 * 1024
+
+    # Throttled in-process worker for best-effort deferred work (chat summary folds)
+    background_concurrency: int = 2
+    background_queue_size: int = 10000
+    background_rate_per_s: float = 2.0
+
+    # Durable job queue (public.jobs) for post-write AI work: parallel jobs per
+    # worker process, claim poll interval, lease before a crashed job is retried,
+    # attempts before dead-lettering, exponential retry backoff and job starts per second
+    jobs_enabled: bool = True
+    jobs_concurrency: int = 4
+    jobs_poll_interval_s: float = 1.0
+    jobs_lease_s: int = 300
+    jobs_max_attempts: int = 5
+    jobs_retry_base_s: float = 5.0
+    jobs_retry_max_s: float = 600.0
+    jobs_rate_per_s: float = 2.0
     
     # Admin bypass
     admin_email: str = ""
 
+    # /health/metrics requires this in an X-Metrics-Token header (empty: served in
+    # development only)
+    metrics_token: str = ""
+
     # CORS
     cors_origins: str = "http://localhost:3000"
 
@@ -41,6 +146,23 @@ class Settings(BaseSettings):
         """Parse comma-separated CORS origins."""
         return [origin.strip() for origin in self.cors_origins.split(",")]
 
+    @property
+    def llm_task_tier_map(self) -> dict[str, str]:
+        """Parse comma-separated task=tier pairs."""
+        pairs = (item.split("=", 1) for item in self.llm_task_tiers.split(",") if "=" in item)
+        return {task.strip(): tier.strip() for task, tier in pairs}
+
+    @property
+    def llm_task_deadline_map(self) -> dict[str, float]:
+        """Parse comma-separated task=seconds pairs."""
+        pairs = (item.split("=", 1) for item in self.llm_task_deadlines.split(",") if "=" in item)
+        return {task.strip(): float(seconds) for task, seconds in pairs}
+
+    @property
+    def llm_hedge_task_set(self) -> set[str]:
+        """Parse comma-separated hedged task names."""
+        return {task.strip() for task in self.llm_hedge_tasks.split(",") if task.strip()}
+
     model_config = {
         "env_file": ".env",
         "env_file_encoding": "utf-8",
@@ -3,11 +3,14 @@
 # [DEPENDENCIES: fastapi, python-jose, app.config]
 # [PHASE: Phase 2 - Authentication (Performance: local decode, no HTTP call)]
 
+import secrets
+
 from fastapi import Depends, HTTPException, Header
 from typing import Optional
 from jose import jwt, JWTError
 
 from app.config import get_settings, Settings
+from app.services import llm_telemetry
 
 
 def get_settings_dep() -> Settings:
@@ -24,6 +27,7 @@ async def get_current_user(
 
     Decodes the token using the project's JWT secret — no outbound HTTP call.
     Falls back to the Supabase /auth/v1/user endpoint if the secret is not configured.
+    The user is also recorded as the owner of any LLM calls this request makes.
     """
     if not authorization:
         raise HTTPException(status_code=401, detail="Missing authorization header")
@@ -44,6 +48,7 @@ async def get_current_user(
             user_id = payload.get("sub")
             if not user_id:
                 raise HTTPException(status_code=401, detail="Could not extract user ID from token")
+            llm_telemetry.set_user(user_id)
             return user_id
         except JWTError as e:
             raise HTTPException(status_code=401, detail=f"Invalid or expired token: {e}")
@@ -69,6 +74,7 @@ async def get_current_user(
         if not user_id:
             raise HTTPException(status_code=401, detail="Could not extract user ID")
 
+        llm_telemetry.set_user(user_id)
         return user_id
 
     except httpx.RequestError as e:
@@ -76,3 +82,19 @@ async def get_current_user(
             status_code=503,
             detail=f"Auth service unavailable: {str(e)}"
         )
+
+
+async def require_metrics_access(
+    x_metrics_token: Optional[str] = Header(None),
+    settings: Settings = Depends(get_settings_dep),
+) -> None:
+    """
+    Guard for internal endpoints: the X-Metrics-Token header must match METRICS_TOKEN.
+    With no token configured they are only served in development.
+    """
+    if settings.metrics_token:
+        if x_metrics_token and secrets.compare_digest(x_metrics_token, settings.metrics_token):
+            return
+    elif settings.environment == "development":
+        return
+    raise HTTPException(status_code=403, detail="Metrics are internal")
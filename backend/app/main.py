@@ -9,7 +9,16 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import get_settings
-from app.routers import health, journal, chat, emotion, analytics, subscription
+from app.models.database import close_supabase_client, init_supabase_client
+from app.models.postgres import close_postgres_pool, init_postgres_pool
+from app.services.ai_client import close_groq_client
+from app.services.background import start_background_workers, stop_background_workers
+from app.services.cache import close_cache, init_cache
+from app.services.jobs import start_job_workers, stop_job_workers
+from app.services.llm_telemetry import flush_daily_rollup
+from app.services.sentiment import close_sentiment_pool, warm_up as warm_up_sentiment
+from app.services.voice_service import close_sarvam_client
+from app.routers import health, journal, chat, emotion, analytics, subscription, export
 from app.routers.profile import router as profile_router
 
 
@@ -19,8 +28,25 @@ async def lifespan(app: FastAPI):
     # Startup
     settings = get_settings()
     print(f"🚀 emoDiary API starting in {settings.environment} mode")
+    if settings.supabase_url:
+        init_supabase_client()
+    await init_postgres_pool()
+    await init_cache()
+    await warm_up_sentiment()
+    await start_background_workers()
+    if settings.supabase_url:
+        await start_job_workers()
     yield
     # Shutdown
+    await stop_job_workers()
+    await stop_background_workers()
+    await close_cache()
+    await close_groq_client()
+    await close_sarvam_client()
+    close_sentiment_pool()
+    flush_daily_rollup()
+    await close_postgres_pool()
+    close_supabase_client()
     print("👋 emoDiary API shutting down")
 
 
@@ -49,6 +75,7 @@ app.include_router(emotion.router)
 app.include_router(analytics.router)
 app.include_router(profile_router)
 app.include_router(subscription.router)
+app.include_router(export.router)
 
 # TODO: Phase 6 - Add voice router (Done in chat router)
 # TODO: Phase 7 - Add insights router
@@ -0,0 +1,161 @@
+# [FILENAME: app/models/postgres.py]
+# [PURPOSE: Optional direct asyncpg engine for the hottest read paths (bypasses PostgREST HTTP)]
+# [DEPENDENCIES: asyncpg (optional), app.config]
+# [PHASE: Performance - Direct Postgres access]
+
+import json
+from datetime import datetime
+from typing import Any, Optional
+from uuid import UUID
+
+from app.config import get_settings
+from app.utils.pagination import decode_cursor
+
+# Enabled only when DATABASE_DSN is set. Every other query keeps going through PostgREST.
+# The DSN must point at Postgres directly or at a session-mode pooler: transaction-mode
+# poolers (PgBouncer / Supavisor :6543) cannot hold prepared statements.
+_pool = None
+
+# ── Hot queries ──
+# asyncpg prepares each statement once per pooled connection and reuses it from the
+# connection's statement cache, so these only pay for parse/plan on first use.
+# Journal statements are templates over the projection chosen by journal_service
+# ("full" / "summary" column lists); each rendered variant is cached separately.
+
+JOURNAL_LIST_SQL = """
+SELECT {columns}
+FROM public.journal_entries
+WHERE user_id = $1
+ORDER BY created_at DESC
+LIMIT $2 OFFSET $3
+"""
+
+JOURNAL_PAGE_FIRST_SQL = """
+SELECT {columns}
+FROM public.journal_entries
+WHERE user_id = $1
+ORDER BY created_at DESC, id DESC
+LIMIT $2
+"""
+
+JOURNAL_PAGE_AFTER_SQL = """
+SELECT {columns}
+FROM public.journal_entries
+WHERE user_id = $1 AND (created_at, id) < ($2, $3)
+ORDER BY created_at DESC, id DESC
+LIMIT $4
+"""
+
+MOOD_WINDOW_SQL = """
+SELECT id, title, content, created_at, emotion_tag, ai_multi_tags, word_count
+FROM public.journal_entries
+WHERE user_id = $1 AND created_at >= $2
+ORDER BY created_at ASC
+"""
+
+CHAT_TURN_SQL = "SELECT public.begin_chat_turn($1, $2, $3, $4)"
+
+
+def is_enabled() -> bool:
+    """True once the asyncpg pool has been created."""
+    return _pool is not None
+
+
+async def _init_connection(conn) -> None:
+    """Per-connection setup: decode json/jsonb into Python objects, like PostgREST does."""
+    for type_name in ("json", "jsonb"):
+        await conn.set_type_codec(
+            type_name, encoder=json.dumps, decoder=json.loads, schema="pg_catalog"
+        )
+
+
+async def init_postgres_pool() -> None:
+    """Create the asyncpg pool if DATABASE_DSN is configured. Called from the app lifespan."""
+    global _pool
+
+    settings = get_settings()
+    if _pool is not None or not settings.database_dsn:
+        return
+
+    import asyncpg
+
+    _pool = await asyncpg.create_pool(
+        dsn=settings.database_dsn,
+        min_size=settings.database_pool_min,
+        max_size=settings.database_pool_max,
+        statement_cache_size=settings.database_statement_cache_size,
+        init=_init_connection,
+    )
+
+
+async def close_postgres_pool() -> None:
+    """Gracefully close the asyncpg pool. Called on application shutdown."""
+    global _pool
+
+    if _pool is not None:
+        await _pool.close()
+    _pool = None
+
+
+def get_pool_stats() -> dict:
+    """Snapshot of the asyncpg pool (size / idle / max)."""
+    if _pool is None:
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        "size": _pool.get_size(),
+        "idle": _pool.get_idle_size(),
+        "max_size": _pool.get_max_size(),
+    }
+
+
+def _to_json_value(value: Any) -> Any:
+    """Convert asyncpg values to the shapes PostgREST returns (str UUIDs, ISO timestamps)."""
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _row_to_dict(record) -> dict:
+    return {key: _to_json_value(value) for key, value in record.items()}
+
+
+async def fetch_journal_entries(user_id: str, limit: int, offset: int, columns: str) -> list[dict]:
+    """Journal list page, newest first (same shape as journal_service.get_entries)."""
+    rows = await _pool.fetch(JOURNAL_LIST_SQL.format(columns=columns), UUID(user_id), limit, offset)
+    return [_row_to_dict(row) for row in rows]
+
+
+async def fetch_journal_page(
+    user_id: str, limit: int, cursor: Optional[str], columns: str
+) -> list[dict]:
+    """Keyset journal page, newest first (same shape as journal_service.get_entries_page rows)."""
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        rows = await _pool.fetch(
+            JOURNAL_PAGE_AFTER_SQL.format(columns=columns),
+            UUID(user_id),
+            datetime.fromisoformat(created_at.replace("Z", "+00:00")),
+            UUID(row_id),
+            limit,
+        )
+    else:
+        rows = await _pool.fetch(JOURNAL_PAGE_FIRST_SQL.format(columns=columns), UUID(user_id), limit)
+    return [_row_to_dict(row) for row in rows]
+
+
+async def fetch_mood_window(user_id: str, since: datetime) -> list[dict]:
+    """Journal entries since `since`, oldest first (analytics_service.get_mood_trends)."""
+    rows = await _pool.fetch(MOOD_WINDOW_SQL, UUID(user_id), since)
+    return [_row_to_dict(row) for row in rows]
+
+
+async def begin_chat_turn(
+    session_id: str, user_id: str, content: str, history_limit: int
+) -> Optional[dict]:
+    """Call the begin_chat_turn() function directly. Returns None if the session isn't owned."""
+    return await _pool.fetchval(
+        CHAT_TURN_SQL, UUID(session_id), UUID(user_id), content, history_limit
+    )
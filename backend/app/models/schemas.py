@@ -3,9 +3,9 @@
 # [DEPENDENCIES: pydantic]
 # [PHASE: Phase 1 - Scaffolding (stubs for future phases)]
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import Annotated, Literal, Optional, Union
 
 
 # ─── Health ───────────────────────────────────────────────
@@ -27,6 +27,20 @@ class JournalEntryUpdate(BaseModel):
     content: Optional[str] = None
     emotion_tag: Optional[str] = None
 
+class JournalImportEntry(BaseModel):
+    """One entry of a bulk import. created_at is kept so imported history stays dated."""
+    title: Optional[str] = None
+    content: str = Field(min_length=1)
+    emotion_tag: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+class JournalImportResponse(BaseModel):
+    imported: int
+    queued_for_analysis: int
+
+# journal_entries.analysis_status: tags, report and emotions are filled in asynchronously
+AnalysisStatus = Literal["pending", "running", "done", "failed"]
+
 class JournalEntryResponse(BaseModel):
     id: str
     user_id: str
@@ -35,10 +49,45 @@ class JournalEntryResponse(BaseModel):
     emotion_tag: Optional[str]
     ai_multi_tags: Optional[list[str]] = None
     detailed_sentiment_report: Optional[str] = None
+    analysis_status: Optional[AnalysisStatus] = None
     word_count: int
     created_at: datetime
     updated_at: datetime
 
+class JournalEntrySummary(BaseModel):
+    """List-view projection: a server-generated excerpt instead of content + report."""
+    id: str
+    user_id: str
+    title: Optional[str]
+    content_excerpt: Optional[str] = None
+    emotion_tag: Optional[str]
+    ai_multi_tags: Optional[list[str]] = None
+    analysis_status: Optional[AnalysisStatus] = None
+    word_count: int
+    created_at: datetime
+    updated_at: datetime
+
+class JournalEntryPage(BaseModel):
+    entries: list[JournalEntryResponse]
+    next_cursor: Optional[str] = None
+
+class JournalEntrySummaryPage(BaseModel):
+    entries: list[JournalEntrySummary]
+    next_cursor: Optional[str] = None
+
+# `view` query parameter shared by journal and emotion reads
+ReadView = Literal["full", "summary"]
+
+# Full rows are tried first; summary rows lack `content` and fall through to the summary models
+JournalEntryView = Annotated[
+    Union[JournalEntryResponse, JournalEntrySummary],
+    Field(union_mode="left_to_right"),
+]
+JournalListView = Annotated[
+    Union[list[JournalEntryResponse], list[JournalEntrySummary], JournalEntryPage, JournalEntrySummaryPage],
+    Field(union_mode="left_to_right"),
+]
+
 
 # ─── Chat (Phase 4) ──────────────────────────────────────
 
@@ -70,6 +119,38 @@ class EmotionAnalysisResponse(BaseModel):
     emotions: dict
     primary_emotion: str
 
+class EmotionAnalysisRecord(BaseModel):
+    id: str
+    user_id: str
+    source_type: str
+    source_id: str
+    sentiment_score: Optional[float] = None
+    emotions: dict = {}
+    primary_emotion: Optional[str] = None
+    created_at: datetime
+
+class EmotionAnalysisSummary(BaseModel):
+    """Trend-view projection: drops the per-emotion confidence map."""
+    id: str
+    source_type: str
+    source_id: str
+    sentiment_score: Optional[float] = None
+    primary_emotion: Optional[str] = None
+    created_at: datetime
+
+class EmotionHistoryResponse(BaseModel):
+    analyses: list[EmotionAnalysisRecord]
+    count: int
+
+class EmotionHistorySummaryResponse(BaseModel):
+    analyses: list[EmotionAnalysisSummary]
+    count: int
+
+EmotionHistoryView = Annotated[
+    Union[EmotionHistoryResponse, EmotionHistorySummaryResponse],
+    Field(union_mode="left_to_right"),
+]
+
 
 # ─── Voice (Phase 6) ─────────────────────────────────────
 
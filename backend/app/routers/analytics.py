@@ -6,6 +6,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from typing import Dict, Any, List
 from app.dependencies import get_current_user
+from app.models.database import get_supabase_client, run_query
 from app.services import analytics_service
 
 router = APIRouter(prefix="/api/analytics", tags=["analytics"])
@@ -60,9 +61,8 @@ async def get_therapist_score(
     Get the user's current Therapist Need Score from user_settings.
     """
     try:
-        from app.models.database import get_supabase_client
         supabase = get_supabase_client()
-        result = supabase.table("user_settings").select("therapist_score, therapist_justification").eq("user_id", user_id).execute()
+        result = await run_query(supabase.table("user_settings").select("therapist_score, therapist_justification").eq("user_id", user_id))
         if not result.data:
             return {"therapist_score": None, "therapist_justification": None}
         return result.data[0]
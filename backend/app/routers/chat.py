@@ -4,7 +4,9 @@
 # [PHASE: Phase 4 - AI Integration]
 
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
-from typing import Optional
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Optional
+import json
 
 from app.dependencies import get_current_user
 from app.models.schemas import ChatMessageRequest, ChatMessageResponse, SessionStartResponse, SessionStartRequest
@@ -112,6 +114,57 @@ async def send_chat_message(
         raise HTTPException(status_code=500, detail=f"Failed to process message: {str(e)}")
 
 
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _sse_reply(session_id: str, chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    """
+    Frame reply chunks as `delta` events, then one `done` event with the full reply.
+    The response status is already sent, so a failure mid-stream (LLM or saving the
+    reply) is reported as an `error` event instead of a silently truncated stream.
+    """
+    parts = []
+    try:
+        async for chunk in chunks:
+            parts.append(chunk)
+            yield _sse("delta", {"content": chunk})
+    except Exception as e:
+        print(f"Chat stream error (session {session_id}): {e}")
+        yield _sse("error", {"detail": "Failed to complete the reply", "session_id": session_id})
+        return
+    yield _sse("done", {"response": "".join(parts), "session_id": session_id})
+
+
+@router.post("/message/stream")
+async def stream_chat_message(
+    body: ChatMessageRequest,
+    user_id: str = Depends(get_current_user),
+):
+    """
+    Streaming version of POST /message (server-sent events).
+    Emits `delta` events ({"content": "..."}) as tokens arrive, then a `done` event
+    with the full response, or an `error` event if the reply fails. Closing the connection cancels the upstream LLM call.
+    """
+    try:
+        chunks = await chat_service.begin_streamed_message(
+            user_id=user_id,
+            session_id=body.session_id,
+            message=body.message,
+            language=body.language,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to process message: {str(e)}")
+
+    return StreamingResponse(
+        _sse_reply(body.session_id, chunks),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/session/{session_id}/messages")
 async def get_session_messages(
     session_id: str,
@@ -134,15 +187,18 @@ async def end_chat_session(
     return {"status": "ended", "duration_s": result.get("duration_s", 0)}
 
 
-@router.post("/session/{session_id}/convert_to_journal")
+@router.post("/session/{session_id}/convert_to_journal", status_code=202)
 async def convert_session_to_journal(
     session_id: str,
     user_id: str = Depends(get_current_user),
 ):
-    """Summarize a chat session and save it as a journal entry."""
+    """
+    Queue a chat session to be summarized and saved as a journal entry.
+    The entry appears in the journal once the job has run.
+    """
     try:
-        entry = await chat_service.convert_session_to_journal(user_id, session_id)
-        return entry
+        job_id = await chat_service.queue_session_conversion(user_id, session_id)
+        return {"status": "queued", "job_id": job_id}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -3,10 +3,16 @@
 # [DEPENDENCIES: fastapi, app.services.emotion_service, app.dependencies]
 # [PHASE: Phase 5 - Emotion Detection]
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
 
 from app.dependencies import get_current_user
-from app.models.schemas import EmotionAnalysisRequest, EmotionAnalysisResponse
+from app.models.schemas import (
+    EmotionAnalysisRequest,
+    EmotionAnalysisResponse,
+    EmotionHistoryView,
+    ReadView,
+)
 from app.services import emotion_service
 
 router = APIRouter(prefix="/api/emotion", tags=["emotion"])
@@ -15,9 +21,19 @@ router = APIRouter(prefix="/api/emotion", tags=["emotion"])
 @router.post("/analyze", response_model=EmotionAnalysisResponse)
 async def analyze_text(
     body: EmotionAnalysisRequest,
+    defer: bool = Query(False, description="Queue the analysis as a job and return 202 with its id"),
     user_id: str = Depends(get_current_user),
 ):
     """Analyze text for emotions and sentiment. Stores result in DB."""
+    if defer:
+        try:
+            job_id = await emotion_service.queue_analysis(
+                user_id, body.source_type, body.source_id, body.text
+            )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to queue analysis: {str(e)}")
+        return JSONResponse({"status": "queued", "job_id": job_id}, status_code=202)
+
     try:
         result = await emotion_service.analyze_and_store(
             user_id=user_id,
@@ -47,11 +63,12 @@ async def get_source_analysis(
     return result
 
 
-@router.get("/history")
+@router.get("/history", response_model=EmotionHistoryView)
 async def get_emotion_history(
     limit: int = 30,
+    view: ReadView = Query("full", description="'summary' omits the per-emotion confidence map"),
     user_id: str = Depends(get_current_user),
 ):
     """Get recent emotion analyses for the current user (for trends)."""
-    history = await emotion_service.get_user_emotion_history(user_id, limit)
+    history = await emotion_service.get_user_emotion_history(user_id, limit, view)
     return {"analyses": history, "count": len(history)}
@@ -0,0 +1,49 @@
+# [FILENAME: app/routers/export.py]
+# [PURPOSE: Bulk export endpoint streaming a user's complete history]
+# [DEPENDENCIES: fastapi, app.dependencies, app.services.export_service]
+# [PHASE: Data Export]
+
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.dependencies import get_current_user
+from app.services import export_service
+
+router = APIRouter(prefix="/api/export", tags=["export"])
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+@router.get("")
+async def export_history(
+    format: str = Query("ndjson", description="'ndjson' or 'csv'"),
+    include: Optional[str] = Query(
+        None,
+        description="Comma-separated resources (journal_entries, chat_sessions, chat_messages, "
+        "emotion_analyses). Defaults to all; CSV takes exactly one.",
+    ),
+    gzip: bool = Query(False, description="Compress the stream as a .gz download"),
+    user_id: str = Depends(get_current_user),
+):
+    """Stream the user's journal, chats and emotion analyses as a file download."""
+    try:
+        resources = export_service.parse_resources(include, format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d")
+    suffix = f"-{resources[0]}" if format == "csv" else ""
+    filename = f"emodiary-export{suffix}-{stamp}.{format}"
+    media_type = MEDIA_TYPES[format]
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+
+    return StreamingResponse(
+        export_service.stream_export(user_id, resources, format, gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,9 +1,23 @@
 # [FILENAME: app/routers/health.py]
 # [PURPOSE: Health check endpoint for liveness/readiness probes]
-# [DEPENDENCIES: fastapi]
+# [DEPENDENCIES: fastapi, app.models.database]
 # [PHASE: Phase 1 - Scaffolding]
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+
+from app.dependencies import require_metrics_access
+from app.models import postgres
+from app.models.database import get_pool_stats
+from app.services.ai_client import get_llm_stats
+from app.services.background import get_background_stats
+from app.services.batcher import get_batcher_stats
+from app.services.cache import get_cache_stats
+from app.services.emotion_classifier import get_classifier_stats
+from app.services.emotion_service import get_store_stats
+from app.services.jobs import get_job_stats
+from app.services.llm_telemetry import get_telemetry_stats
+from app.services.model_router import get_router_stats
+from app.services.sentiment import get_sentiment_stats
 
 router = APIRouter(tags=["health"])
 
@@ -15,3 +29,22 @@ async def health_check():
     Returns 200 OK when the service is running.
     """
     return {"status": "ok", "service": "emoDiary API"}
+
+
+@router.get("/health/metrics", dependencies=[Depends(require_metrics_access)])
+async def health_metrics():
+    """Runtime metrics for this worker process (internal): pools, caches, queues, LLM routing and usage."""
+    return {
+        "supabase_pool": get_pool_stats(),
+        "postgres_pool": postgres.get_pool_stats(),
+        "cache": get_cache_stats(),
+        "background": get_background_stats(),
+        "jobs": await get_job_stats(),
+        "llm": get_llm_stats(),
+        "batchers": get_batcher_stats(),
+        "models": get_router_stats(),
+        "llm_usage": get_telemetry_stats(),
+        "emotion_classifier": get_classifier_stats(),
+        "emotion_store": get_store_stats(),
+        "sentiment": get_sentiment_stats(),
+    }
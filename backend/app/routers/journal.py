@@ -3,7 +3,9 @@
 # [DEPENDENCIES: fastapi, app.dependencies, app.services.journal_service, app.models.schemas]
 # [PHASE: Phase 3 - Core Journaling]
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import TypeAdapter, ValidationError
+from starlette.datastructures import UploadFile
 from typing import Optional
 
 from app.dependencies import get_current_user
@@ -11,12 +13,19 @@ from app.models.schemas import (
     JournalEntryCreate,
     JournalEntryUpdate,
     JournalEntryResponse,
+    JournalEntryView,
+    JournalImportEntry,
+    JournalImportResponse,
+    JournalListView,
+    ReadView,
 )
-from app.services import journal_service, emotion_service, subscription_service
-import asyncio
+from app.services import journal_service, subscription_service
+import json
 
 router = APIRouter(prefix="/api/journal", tags=["journal"])
 
+_import_entries = TypeAdapter(list[JournalImportEntry])
+
 
 @router.post("", response_model=JournalEntryResponse, status_code=201)
 async def create_journal_entry(
@@ -32,29 +41,95 @@ async def create_journal_entry(
         )
     
     try:
+        # Saved immediately with analysis_status "pending"; tags, report and
+        # emotions are filled in by a queued job
         entry = await journal_service.create_entry(
             user_id=user_id,
             title=body.title,
             content=body.content,
             emotion_tag=body.emotion_tag,
         )
-        # Trigger emotion analysis in background (non-blocking)
-        asyncio.create_task(
-            emotion_service.analyze_and_store(user_id, "journal", entry["id"], body.content)
-        )
         return entry
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create entry: {str(e)}")
 
 
-@router.get("", response_model=list[JournalEntryResponse])
+@router.post("/import", response_model=JournalImportResponse, status_code=201)
+async def import_journal_entries(
+    request: Request,
+    user_id: str = Depends(get_current_user),
+):
+    """
+    Bulk-import entries from another diary app.
+
+    Send either a JSON array of {title, content, emotion_tag, created_at} (or
+    {"entries": [...]}) as the body, or a multipart upload with a `file` field
+    holding JSON, NDJSON or CSV. Entries are inserted in batches with their original
+    dates; AI tags and emotion analysis are queued and filled in later.
+    """
+    try:
+        if request.headers.get("content-type", "").startswith("multipart/form-data"):
+            form = await request.form()
+            upload = form.get("file")
+            if not isinstance(upload, UploadFile):
+                raise ValueError("Multipart import needs a 'file' field")
+            raw_entries = journal_service.parse_import_file(await upload.read(), upload.filename)
+        else:
+            try:
+                raw_entries = await request.json()
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON body: {e}") from e
+            if isinstance(raw_entries, dict):
+                raw_entries = raw_entries.get("entries")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not isinstance(raw_entries, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array of entries")
+    if len(raw_entries) > journal_service.IMPORT_MAX_ENTRIES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {journal_service.IMPORT_MAX_ENTRIES} entries per import",
+        )
+
+    try:
+        entries = _import_entries.validate_python(raw_entries)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+
+    try:
+        return await journal_service.import_entries(
+            user_id, [entry.model_dump() for entry in entries]
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to import entries: {str(e)}")
+
+
+@router.get("", response_model=JournalListView)
 async def list_journal_entries(
     user_id: str = Depends(get_current_user),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(
+        None,
+        description="Keyset pagination. Send an empty cursor for the first page, then the returned next_cursor.",
+    ),
+    view: ReadView = Query("full", description="'summary' returns content_excerpt instead of content"),
 ):
-    """List journal entries for the authenticated user, newest first."""
-    entries = await journal_service.get_entries(user_id, limit=limit, offset=offset)
+    """
+    List journal entries for the authenticated user, newest first.
+
+    Without `cursor` this returns a plain list paged by `offset` (legacy mode).
+    With `cursor` it returns {"entries": [...], "next_cursor": ...}, whose latency
+    stays flat no matter how deep the user scrolls.
+    """
+    if cursor is not None:
+        try:
+            return await journal_service.get_entries_page(user_id, limit=limit, cursor=cursor, view=view)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    entries = await journal_service.get_entries(user_id, limit=limit, offset=offset, view=view)
     return entries
 
 
@@ -67,13 +142,14 @@ async def get_journal_count(
     return {"count": count}
 
 
-@router.get("/{entry_id}", response_model=JournalEntryResponse)
+@router.get("/{entry_id}", response_model=JournalEntryView)
 async def get_journal_entry(
     entry_id: str,
+    view: ReadView = Query("full", description="'summary' returns content_excerpt instead of content"),
     user_id: str = Depends(get_current_user),
 ):
     """Get a single journal entry by ID."""
-    entry = await journal_service.get_entry(user_id, entry_id)
+    entry = await journal_service.get_entry(user_id, entry_id, view)
     if not entry:
         raise HTTPException(status_code=404, detail="Journal entry not found")
     return entry
@@ -95,11 +171,6 @@ async def update_journal_entry(
     )
     if not entry:
         raise HTTPException(status_code=404, detail="Journal entry not found")
-    # Re-analyze emotions if content changed
-    if body.content:
-        asyncio.create_task(
-            emotion_service.analyze_and_store(user_id, "journal", entry_id, body.content)
-        )
     return entry
 
 
@@ -8,8 +8,9 @@ from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
 
-from app.models.database import get_supabase_client
+from app.models.database import get_supabase_client, run_query
 from app.dependencies import get_current_user
+from app.services import cache
 
 router = APIRouter(prefix="/api/profile", tags=["profile"])
 
@@ -26,28 +27,32 @@ class AvatarSaveRequest(BaseModel):
     avatar_name: str
 
 
+async def _load_avatar(user: str) -> dict:
+    """Read avatar config and name from the profiles table."""
+    supabase = get_supabase_client()
+    result = await run_query(
+        supabase.table("profiles")
+        .select("avatar_config, avatar_name")
+        .eq("id", user)
+        .single()
+    )
+    data = result.data or {}
+    return {
+        "avatar_config": data.get("avatar_config") or {
+            "skin": "warm",
+            "hair": "black",
+            "headShape": "round",
+            "accentColor": "#10b981",
+        },
+        "avatar_name": data.get("avatar_name") or "emoDiary",
+    }
+
+
 @router.get("/avatar")
 async def get_avatar(user: str = Depends(get_current_user)):
     """Return the current user's avatar config and name."""
-    supabase = get_supabase_client()
     try:
-        result = (
-            supabase.table("profiles")
-            .select("avatar_config, avatar_name")
-            .eq("id", user)
-            .single()
-            .execute()
-        )
-        data = result.data or {}
-        return {
-            "avatar_config": data.get("avatar_config") or {
-                "skin": "warm",
-                "hair": "black",
-                "headShape": "round",
-                "accentColor": "#10b981",
-            },
-            "avatar_name": data.get("avatar_name") or "emoDiary",
-        }
+        return await cache.cached(user, "profile:avatar", "", lambda: _load_avatar(user))
     except Exception as e:
         # Profile might not have avatar columns yet — return defaults
         return {
@@ -66,15 +71,15 @@ async def update_avatar(payload: AvatarSaveRequest, user: str = Depends(get_curr
     """Save avatar config and name to profiles table."""
     supabase = get_supabase_client()
     try:
-        result = (
+        result = await run_query(
             supabase.table("profiles")
             .update({
                 "avatar_config": payload.avatar_config.model_dump(),
                 "avatar_name": payload.avatar_name,
             })
             .eq("id", user)
-            .execute()
         )
+        await cache.invalidate_user(user)
         return {"ok": True, "avatar_name": payload.avatar_name}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,14 +1,146 @@
 # [FILENAME: app/services/ai_client.py]
-# [PURPOSE: Shared Groq client singleton — avoids re-instantiation on every request]
-# [DEPENDENCIES: groq, app.config]
+# [PURPOSE: Shared async Groq client on a pooled HTTP connection, with a global in-flight limit]
+# [DEPENDENCIES: groq, httpx, app.config, app.services.llm_telemetry]
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
+
+import httpx
+from groq import APITimeoutError, AsyncGroq, DefaultAsyncHttpxClient
 
-from functools import lru_cache
-from groq import Groq
 from app.config import get_settings
+from app.services import llm_telemetry
+
+# One AsyncGroq client per worker process, created on first use and closed from the
+# app lifespan. Every LLM call goes through chat_completion() / transcribe() so the
+# concurrency limit applies to all of them.
+_client: Optional[AsyncGroq] = None
+
+# (event loop, semaphore): the semaphore is recreated if the loop changes (tests, scripts)
+_limiter: Optional[tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = None
+_stats = {"in_flight": 0, "waiting": 0, "calls": 0, "errors": 0, "timeouts": 0}
+
+
+def get_groq_client() -> AsyncGroq:
+    """Return the shared AsyncGroq client (created once per process)."""
+    global _client
+
+    if _client is None:
+        settings = get_settings()
+        _client = AsyncGroq(
+            api_key=settings.groq_api_key,
+            base_url=settings.groq_base_url or None,
+            timeout=settings.llm_timeout_s,
+            max_retries=settings.llm_max_retries,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=settings.llm_pool_size,
+                    max_keepalive_connections=settings.llm_pool_size,
+                ),
+            ),
+        )
+    return _client
+
+
+async def close_groq_client() -> None:
+    """Close the shared client's connection pool. Called on application shutdown."""
+    global _client
+
+    if _client is not None:
+        await _client.close()
+    _client = None
+
+
+def _get_limiter() -> asyncio.Semaphore:
+    global _limiter
+
+    loop = asyncio.get_running_loop()
+    if _limiter is None or _limiter[0] is not loop:
+        _limiter = (loop, asyncio.Semaphore(get_settings().llm_max_concurrency))
+    return _limiter[1]
+
+
+@asynccontextmanager
+async def _llm_slot(task: str, model: Optional[str]):
+    """
+    Hold one of the llm_max_concurrency slots for the duration of a call, and
+    record the call in llm_telemetry (latency measured once the slot is held).
+    The caller stores the response usage in the yielded dict.
+    """
+    limiter = _get_limiter()
+    _stats["waiting"] += 1
+    try:
+        await limiter.acquire()
+    finally:
+        _stats["waiting"] -= 1
+    _stats["in_flight"] += 1
+    _stats["calls"] += 1
+    call = {"usage": None, "error": False}
+    start = time.perf_counter()
+    try:
+        yield call
+    except Exception as e:
+        call["error"] = True
+        if isinstance(e, (APITimeoutError, asyncio.TimeoutError, httpx.TimeoutException)):
+            _stats["timeouts"] += 1
+        else:
+            _stats["errors"] += 1
+        raise
+    finally:
+        _stats["in_flight"] -= 1
+        limiter.release()
+        llm_telemetry.record(
+            task, model, (time.perf_counter() - start) * 1000, call["usage"], call["error"]
+        )
+
+
+async def chat_completion(*, timeout: Optional[float] = None, task: str = "other", **kwargs: Any):
+    """
+    chat.completions.create() on the shared client, under the global in-flight limit.
+    `timeout` (seconds) overrides llm_timeout_s for this call; `task` labels its telemetry.
+    """
+    async with _llm_slot(task, kwargs.get("model")) as call:
+        response = await get_groq_client().chat.completions.create(
+            timeout=timeout or get_settings().llm_timeout_s, **kwargs
+        )
+        call["usage"] = getattr(response, "usage", None)
+        return response
+
+
+async def stream_chat_completion(
+    *, timeout: Optional[float] = None, task: str = "other", **kwargs: Any
+) -> AsyncIterator[str]:
+    """
+    Streaming chat completion: yields content deltas as Groq produces them.
+    The concurrency slot is held until the stream ends, and the upstream response
+    is closed however the consumer stops (finished, error, or cancelled because the
+    client disconnected). Groq reports usage on the final chunk (x_groq.usage).
+    """
+    async with _llm_slot(task, kwargs.get("model")) as call:
+        stream = await get_groq_client().chat.completions.create(
+            stream=True, timeout=timeout or get_settings().llm_timeout_s, **kwargs
+        )
+        try:
+            async for chunk in stream:
+                usage = getattr(chunk, "usage", None) or getattr(getattr(chunk, "x_groq", None), "usage", None)
+                if usage is not None:
+                    call["usage"] = usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await stream.close()
+
+
+async def transcribe(*, timeout: Optional[float] = None, task: str = "transcription", **kwargs: Any):
+    """audio.transcriptions.create() on the shared client, under the same limit."""
+    async with _llm_slot(task, kwargs.get("model")):
+        return await get_groq_client().audio.transcriptions.create(
+            timeout=timeout or get_settings().llm_timeout_s, **kwargs
+        )
 
 
-@lru_cache(maxsize=1)
-def get_groq_client() -> Groq:
-    """Return the shared Groq client instance (created once, reused forever)."""
-    settings = get_settings()
-    return Groq(api_key=settings.groq_api_key)
+def get_llm_stats() -> dict:
+    """In-flight / waiting calls against the limit, plus call / error / timeout counters."""
+    return {"limit": get_settings().llm_max_concurrency, **_stats}
@@ -6,8 +6,10 @@
 from datetime import datetime, timedelta, timezone
 import json
 from typing import List, Dict, Any
-from app.models.database import get_supabase_client
-from app.services.ai_client import get_groq_client
+from app.models import postgres
+from app.models.database import get_supabase_client, run_query
+from app.services import cache
+from app.services.model_router import routed_completion
 
 
 EMOTION_SCORES = {
@@ -27,27 +29,28 @@ EMOTION_SCORES = {
     "Lonely": 3,
 }
 
+@cache.user_cached("analytics:mood_trends")
 async def get_mood_trends(user_id: str, days: int = 30) -> Dict[str, Any]:
     """
     Fetch mood data and aggregate analytics for the extended insights dashboard.
     """
-    supabase = get_supabase_client()
-    
     # We fetch 84 days (12 weeks) to support the heatmap, even if 'days' is 30.
     fetch_days = max(days, 84)
-    start_date = (datetime.now(timezone.utc) - timedelta(days=fetch_days)).isoformat()
-    
-    # Fetch entries
-    response = (
-        supabase.table("journal_entries")
-        .select("id, title, content, created_at, emotion_tag, ai_multi_tags, word_count")
-        .eq("user_id", user_id)
-        .gte("created_at", start_date)
-        .order("created_at", desc=False)
-        .execute()
-    )
+    start = datetime.now(timezone.utc) - timedelta(days=fetch_days)
     
-    entries = response.data or []
+    # Fetch entries (direct Postgres when configured — this is the heaviest dashboard read)
+    if postgres.is_enabled():
+        entries = await postgres.fetch_mood_window(user_id, start)
+    else:
+        supabase = get_supabase_client()
+        response = await run_query(
+            supabase.table("journal_entries")
+            .select("id, title, content, created_at, emotion_tag, ai_multi_tags, word_count")
+            .eq("user_id", user_id)
+            .gte("created_at", start.isoformat())
+            .order("created_at", desc=False)
+        )
+        entries = response.data or []
     
     # Processing variables
     trend_data = []
@@ -205,13 +208,12 @@ async def generate_insights(user_id: str, language: str = "en") -> str:
     supabase = get_supabase_client()
     
     # Fetch last 10 entries for context
-    response = (
+    response = await run_query(
         supabase.table("journal_entries")
         .select("created_at, content, emotion_tag")
         .eq("user_id", user_id)
         .order("created_at", desc=True)
         .limit(10)
-        .execute()
     )
     
     entries = response.data or []
@@ -264,9 +266,8 @@ async def generate_insights(user_id: str, language: str = "en") -> str:
     """
     
     try:
-        client = get_groq_client()
-        completion = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
+        completion = await routed_completion(
+            "insights",
             messages=[
                 {"role": "system", "content": "You are a mental health companion. You output ONLY valid JSON arrays, nothing else."},
                 {"role": "user", "content": prompt}
@@ -304,13 +305,12 @@ async def calculate_therapist_score(user_id: str) -> dict:
     start_date = (datetime.now(timezone.utc) - timedelta(days=14)).isoformat()
     
     # Fetch entries
-    response = (
+    response = await run_query(
         supabase.table("journal_entries")
         .select("created_at, content, emotion_tag, ai_multi_tags")
         .eq("user_id", user_id)
         .gte("created_at", start_date)
         .order("created_at", desc=False)
-        .execute()
     )
     
     entries = response.data or []
@@ -349,9 +349,8 @@ async def calculate_therapist_score(user_id: str) -> dict:
     )
     
     try:
-        client = get_groq_client()
-        completion = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
+        completion = await routed_completion(
+            "triage",
             messages=[
                 {"role": "system", "content": prompt}
             ],
@@ -367,10 +366,10 @@ async def calculate_therapist_score(user_id: str) -> dict:
         justification = result_json.get("therapist_justification", "Unable to determine.")
         
         # Save to user_settings
-        supabase.table("user_settings").update({
+        await run_query(supabase.table("user_settings").update({
             "therapist_score": score,
             "therapist_justification": justification
-        }).eq("user_id", user_id).execute()
+        }).eq("user_id", user_id))
         
         return {
             "therapist_score": score,
@@ -391,12 +390,11 @@ async def get_user_patterns(user_id: str, limit: int = 20) -> list[dict]:
     Returns the most recently detected patterns, newest first.
     """
     supabase = get_supabase_client()
-    result = (
+    result = await run_query(
         supabase.table("patterns")
         .select("id, pattern_type, description, data, detected_at")
         .eq("user_id", user_id)
         .order("detected_at", desc=True)
         .limit(limit)
-        .execute()
     )
     return result.data or []
@@ -0,0 +1,109 @@
+# [FILENAME: app/services/background.py]
+# [PURPOSE: Throttled in-process worker for best-effort deferred work (chat summary folds)]
+# [DEPENDENCIES: app.config]
+# [PHASE: Bulk Import]
+
+import asyncio
+import contextvars
+import time
+from typing import Awaitable, Callable, Optional
+
+from app.config import get_settings
+
+# Bounded queue of (name, job factory, context). Jobs are factories rather than
+# coroutines so nothing is created until a worker picks the job up; each runs in a
+# copy of the enqueuer's context (e.g. its LLM telemetry attribution).
+_queue: Optional[asyncio.Queue] = None
+_workers: list[asyncio.Task] = []
+_next_start = 0.0
+_rate_lock: Optional[asyncio.Lock] = None
+_stats = {"queued": 0, "completed": 0, "failed": 0, "rejected": 0}
+
+
+async def start_background_workers() -> None:
+    """Create the queue and worker tasks. Called from the app lifespan."""
+    global _queue, _rate_lock
+
+    if _queue is not None:
+        return
+    settings = get_settings()
+    _queue = asyncio.Queue(maxsize=settings.background_queue_size)
+    _rate_lock = asyncio.Lock()
+    for i in range(settings.background_concurrency):
+        _workers.append(asyncio.create_task(_worker(i)))
+
+
+async def stop_background_workers() -> None:
+    """Cancel the workers. Queued jobs are dropped. Called on application shutdown."""
+    global _queue, _rate_lock
+
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    _queue = None
+    _rate_lock = None
+
+
+def enqueue(name: str, job: Callable[[], Awaitable]) -> bool:
+    """
+    Queue a job for the background workers. Returns False (and drops the job) when
+    the workers aren't running or the queue is full.
+    """
+    if _queue is None:
+        _stats["rejected"] += 1
+        return False
+    try:
+        _queue.put_nowait((name, job, contextvars.copy_context()))
+    except asyncio.QueueFull:
+        _stats["rejected"] += 1
+        return False
+    _stats["queued"] += 1
+    return True
+
+
+async def _throttle() -> None:
+    """Space job starts at least 1 / background_rate_per_s apart across all workers."""
+    global _next_start
+
+    rate = get_settings().background_rate_per_s
+    if rate <= 0:
+        return
+    async with _rate_lock:
+        now = time.monotonic()
+        wait = _next_start - now
+        _next_start = max(now, _next_start) + 1 / rate
+    if wait > 0:
+        await asyncio.sleep(wait)
+
+
+async def _worker(worker_id: int) -> None:
+    while True:
+        name, job, context = await _queue.get()
+        try:
+            await _throttle()
+            await asyncio.create_task(job(), context=context)
+            _stats["completed"] += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Background job {name} failed (worker {worker_id}): {e}")
+            _stats["failed"] += 1
+        finally:
+            _queue.task_done()
+
+
+async def drain() -> None:
+    """Wait until every queued job has finished (tests, scripts)."""
+    if _queue is not None:
+        await _queue.join()
+
+
+def get_background_stats() -> dict:
+    """Queue depth, worker count and job outcome counters."""
+    return {
+        "running": _queue is not None,
+        "workers": len(_workers),
+        "pending": _queue.qsize() if _queue is not None else 0,
+        **_stats,
+    }
@@ -0,0 +1,120 @@
+# [FILENAME: app/services/batcher.py]
+# [PURPOSE: asyncio micro-batcher: coalesce concurrent single-item requests into one batched call]
+# [DEPENDENCIES: none]
+# [PHASE: Performance - LLM batching]
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+# Every batcher registers itself so /health/metrics can report them all
+_registry: dict[str, "MicroBatcher"] = {}
+
+
+class MicroBatcher:
+    """
+    Collects submit() calls for up to `max_wait_ms` or `max_items` (whichever comes
+    first) and hands them to `handler` as one list. The handler returns one result
+    per item, in order; an Exception in a slot fails only that item's caller.
+
+    State is per event loop, so a batcher created at import time works across the
+    app, tests and scripts that each run their own loop.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[list], Awaitable[list]],
+        max_items: Callable[[], int],
+        max_wait_ms: Callable[[], float],
+    ):
+        # Limits are callables so they follow settings without re-creating the batcher
+        self.name = name
+        self._handler = handler
+        self._max_items = max_items
+        self._max_wait_ms = max_wait_ms
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: list[tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+        self._started = time.monotonic()
+        self._stats = {"batches": 0, "items": 0, "max_batch": 0, "failed_items": 0, "tokens": 0}
+        self._handler_ms = 0.0
+        _registry[name] = self
+
+    def _bind_loop(self) -> asyncio.AbstractEventLoop:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # New loop: anything pending belonged to a loop that is gone
+            self._loop = loop
+            self._pending = []
+            self._timer = None
+            self._tasks = set()
+        return loop
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result (or its exception)."""
+        loop = self._bind_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= max(1, self._max_items()):
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._max_wait_ms() / 1000, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = self._loop.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[Any, asyncio.Future]]) -> None:
+        items = [item for item, _ in batch]
+        start = time.perf_counter()
+        try:
+            results = await self._handler(items)
+            if len(results) != len(items):
+                raise ValueError(f"{self.name}: handler returned {len(results)} results for {len(items)} items")
+        except Exception as e:
+            results = [e] * len(items)
+        self._handler_ms += (time.perf_counter() - start) * 1000
+
+        self._stats["batches"] += 1
+        self._stats["items"] += len(items)
+        self._stats["max_batch"] = max(self._stats["max_batch"], len(items))
+        for (_, future), result in zip(batch, results):
+            if future.done():  # caller was cancelled
+                continue
+            if isinstance(result, Exception):
+                self._stats["failed_items"] += 1
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def add_tokens(self, tokens: Any) -> None:
+        """Record LLM token usage for a batch (called by the handler)."""
+        if isinstance(tokens, int):
+            self._stats["tokens"] += tokens
+
+    def stats(self) -> dict:
+        items = self._stats["items"]
+        batches = self._stats["batches"]
+        return {
+            **self._stats,
+            "pending": len(self._pending),
+            "avg_batch": round(items / batches, 2) if batches else 0,
+            "avg_batch_ms": round(self._handler_ms / batches, 1) if batches else 0,
+            "tokens_per_item": round(self._stats["tokens"] / items, 1) if items else 0,
+            "items_per_s": round(items / (time.monotonic() - self._started), 3),
+        }
+
+
+def get_batcher_stats() -> dict:
+    """Stats for every registered batcher, by name."""
+    return {name: batcher.stats() for name, batcher in _registry.items()}
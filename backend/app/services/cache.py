@@ -0,0 +1,500 @@
+# [FILENAME: app/services/cache.py]
+# [PURPOSE: Two-tier read-through cache for per-user reads (in-process LRU in front of Redis,
+#            or a bounded in-memory stand-in in development), plus a content-addressed LLM result cache]
+# [DEPENDENCIES: redis, app.config]
+# [PHASE: Performance - Caching]
+
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+from app.config import get_settings
+
+KEY_PREFIX = "emodiary"
+
+# Version keys outlive every cached value, so an expired version can never
+# resurrect entries written under an older one.
+VERSION_TTL_S = 7 * 24 * 3600
+
+# Every worker subscribes to this channel; a message carries the user_id whose
+# reads must be dropped from the worker's local tier.
+INVALIDATION_CHANNEL = f"{KEY_PREFIX}:invalidate"
+
+
+class RedisBackend:
+    """Redis / Upstash (redis:// or rediss:// URL; the token is used as the password)."""
+
+    name = "redis"
+
+    def __init__(self, url: str, token: str = ""):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url, password=token or None, decode_responses=True)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._redis.get(key)
+
+    async def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        await self._redis.set(key, value, ex=ttl)
+
+    async def incr(self, key: str, ttl: Optional[int] = None) -> int:
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.incr(key)
+            if ttl:
+                pipe.expire(key, ttl)
+            value, *_ = await pipe.execute()
+        return value
+
+    async def publish(self, channel: str, message: str) -> None:
+        await self._redis.publish(channel, message)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[Optional[str]]:
+        """Yield None once subscribed, then every message published to `channel`."""
+        pubsub = self._redis.pubsub()
+        try:
+            await pubsub.subscribe(channel)
+            yield None
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    yield message["data"]
+        finally:
+            await pubsub.aclose()
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+class LocalCache:
+    """
+    Bounded in-process LRU + TTL tier in front of Redis.
+
+    Values are kept as the same JSON strings stored in Redis, so the byte bound is
+    exact and every hit hands the caller a fresh copy. Entries are indexed by user
+    so an invalidation drops all of that user's reads at once.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_s: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self._data: OrderedDict[str, tuple[str, float, str]] = OrderedDict()
+        self._by_user: dict[str, set[str]] = {}
+        self._generation = 0
+        self._bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _remove(self, key: str) -> None:
+        raw, _, user_id = self._data.pop(key)
+        self._bytes -= len(raw)
+        keys = self._by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[user_id]
+
+    def get(self, key: str) -> Optional[str]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        raw, expires_at, _ = item
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            return None
+        self._data.move_to_end(key)
+        return raw
+
+    @property
+    def generation(self) -> int:
+        """Bumped by every invalidation; lets a reader detect one that raced its load."""
+        return self._generation
+
+    def set(self, user_id: str, key: str, raw: str, ttl: int, generation: int) -> None:
+        if generation != self._generation or len(raw) > self.max_bytes:
+            return
+        if key in self._data:
+            self._remove(key)
+        self._data[key] = (raw, time.monotonic() + min(ttl, self.ttl_s), user_id)
+        self._by_user.setdefault(user_id, set()).add(key)
+        self._bytes += len(raw)
+        while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._data)))
+            self.evictions += 1
+
+    def drop_user(self, user_id: str) -> None:
+        self._generation += 1
+        for key in list(self._by_user.get(user_id, ())):
+            self._remove(key)
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._by_user.clear()
+        self._generation += 1
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+class MemoryBackend:
+    """
+    In-process stand-in for Redis (local development without a redis:// URL).
+
+    Values live in a bounded LocalCache, so keys orphaned by version bumps are
+    evicted under pressure instead of accumulating. Version counters are kept
+    apart and never evicted: losing one would resurrect reads from version 0.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self._values = LocalCache(max_entries, max_bytes, VERSION_TTL_S)
+        self._counters: dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        if key in self._counters:
+            return str(self._counters[key])
+        return self._values.get(key)
+
+    async def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        self._values.set("", key, value, ttl or VERSION_TTL_S, self._values.generation)
+
+    async def incr(self, key: str, ttl: Optional[int] = None) -> int:
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+    def stats(self) -> dict:
+        return {**self._values.stats(), "counters": len(self._counters)}
+
+    async def close(self) -> None:
+        self._values.clear()
+        self._counters.clear()
+
+
+# Created in the FastAPI lifespan. Until then (scripts, tests) reads go straight to the loader.
+_backend = None
+# Local tier and its pub/sub listener; only used in front of Redis (the in-memory
+# stand-in is already process-local).
+_local: Optional[LocalCache] = None
+_listener: Optional[asyncio.Task] = None
+# Content-addressed LLM results: bounded local LRU always, Redis behind it when configured.
+# Entries are immutable (the key is the input), so they never need invalidating.
+_content_local: Optional[LocalCache] = None
+_content_inflight: dict[str, asyncio.Future] = {}
+_stats: dict[str, dict[str, int]] = {}
+
+
+async def init_cache() -> None:
+    """
+    Pick the cache backend from settings. Called from the app lifespan.
+    Per-user reads use Redis when UPSTASH_REDIS_URL is a redis:// URL. Without one,
+    development gets the in-memory stand-in; any other environment runs uncached,
+    because per-worker caches can't see other workers' invalidations.
+    """
+    global _backend, _local, _listener, _content_local
+
+    settings = get_settings()
+    if _backend is not None or not settings.cache_enabled:
+        return
+
+    if settings.llm_cache_local_max_entries > 0:
+        _content_local = LocalCache(
+            settings.llm_cache_local_max_entries,
+            settings.llm_cache_local_max_bytes,
+            settings.llm_cache_ttl_s,
+        )
+
+    if settings.upstash_redis_url.startswith(("redis://", "rediss://")):
+        _backend = RedisBackend(settings.upstash_redis_url, settings.upstash_redis_token)
+        if settings.cache_local_max_entries > 0:
+            _local = LocalCache(
+                settings.cache_local_max_entries,
+                settings.cache_local_max_bytes,
+                settings.cache_local_ttl_s,
+            )
+            _listener = asyncio.create_task(_listen_for_invalidations())
+        print(f"🗄️ Cache: redis, local tier {'on' if _local is not None else 'off'}")
+        return
+
+    if settings.upstash_redis_url:
+        print("⚠️ UPSTASH_REDIS_URL is not a redis:// / rediss:// URL (the REST URL won't work)")
+    if settings.environment == "development":
+        _backend = MemoryBackend(settings.cache_local_max_entries, settings.cache_local_max_bytes)
+        print("🗄️ Cache: in-memory (development only)")
+    else:
+        print(f"⚠️ Cache: disabled for per-user reads (no Redis in {settings.environment})")
+
+
+async def close_cache() -> None:
+    """Close the cache connection. Called on application shutdown."""
+    global _backend, _local, _listener, _content_local
+
+    if _listener is not None:
+        _listener.cancel()
+        try:
+            await _listener
+        except asyncio.CancelledError:
+            pass
+    if _backend is not None:
+        await _backend.close()
+    _backend = None
+    _local = None
+    _listener = None
+    _content_local = None
+
+
+async def _listen_for_invalidations() -> None:
+    """Evict users from the local tier as other workers publish invalidations."""
+    while True:
+        try:
+            async for user_id in _backend.subscribe(INVALIDATION_CHANNEL):
+                if user_id is None:
+                    # (Re)subscribed: anything published while we were away was missed
+                    _local.clear()
+                else:
+                    _local.drop_user(user_id)
+            print("Cache invalidation subscription closed, resubscribing")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Cache invalidation listener failed, retrying: {e}")
+        _local.clear()
+        await asyncio.sleep(1)
+
+
+def _count(namespace: str, outcome: str) -> None:
+    counters = _stats.setdefault(
+        namespace, {"local_hits": 0, "hits": 0, "misses": 0, "errors": 0, "coalesced": 0}
+    )
+    counters[outcome] += 1
+
+
+def get_cache_stats() -> dict:
+    """
+    Hit / miss / error counters, overall and per namespace, plus local tier size and
+    eviction counts. `local_hits` are served in-process; `hits` came from Redis;
+    `coalesced` LLM requests waited on an identical call already in flight.
+    """
+    totals = {"local_hits": 0, "hits": 0, "misses": 0, "errors": 0, "coalesced": 0}
+    for counters in _stats.values():
+        for outcome, count in counters.items():
+            totals[outcome] += count
+    return {
+        "backend": _backend.name if _backend is not None else None,
+        **totals,
+        "local": {"enabled": True, **_local.stats()} if _local is not None else {"enabled": False},
+        "memory": _backend.stats() if isinstance(_backend, MemoryBackend) else None,
+        "llm_local": (
+            {"enabled": True, **_content_local.stats()} if _content_local is not None else {"enabled": False}
+        ),
+        "by_namespace": {ns: dict(c) for ns, c in _stats.items()},
+    }
+
+
+def _version_key(user_id: str) -> str:
+    return f"{KEY_PREFIX}:user:{user_id}:ver"
+
+
+async def cached(
+    user_id: str,
+    namespace: str,
+    key: str,
+    loader: Callable[[], Awaitable[Any]],
+    ttl: Optional[int] = None,
+) -> Any:
+    """
+    Read-through cache for a per-user value.
+
+    Keys embed the user's current version number, so invalidate_user() drops every
+    cached read for that user with one INCR. When the local tier is on, it is checked
+    first and skips the Redis round trip entirely. Cache failures never fail the
+    request: they count as errors and fall through to the loader.
+    """
+    if _backend is None:
+        return await loader()
+
+    ttl = ttl or get_settings().cache_ttl_s
+    local_key = f"{user_id}:{namespace}:{key}"
+    if _local is not None:
+        raw = _local.get(local_key)
+        if raw is not None:
+            _count(namespace, "local_hits")
+            return json.loads(raw)
+        generation = _local.generation
+
+    try:
+        version = await _backend.get(_version_key(user_id)) or "0"
+        full_key = f"{KEY_PREFIX}:{user_id}:v{version}:{namespace}:{key}"
+        raw = await _backend.get(full_key)
+    except Exception as e:
+        print(f"Cache read failed ({namespace}): {e}")
+        _count(namespace, "errors")
+        return await loader()
+
+    if raw is not None:
+        _count(namespace, "hits")
+        if _local is not None:
+            _local.set(user_id, local_key, raw, ttl, generation)
+        return json.loads(raw)
+
+    _count(namespace, "misses")
+    value = await loader()
+    raw = json.dumps(value)
+    if _local is not None:
+        _local.set(user_id, local_key, raw, ttl, generation)
+    try:
+        await _backend.set(full_key, raw, ttl)
+    except Exception as e:
+        print(f"Cache write failed ({namespace}): {e}")
+        _count(namespace, "errors")
+    return value
+
+
+async def invalidate_user(user_id: str) -> None:
+    """
+    Drop every cached read for a user by bumping their version number, and tell
+    every worker (this one included) to evict the user from its local tier.
+    """
+    if _backend is None:
+        return
+    if _local is not None:
+        _local.drop_user(user_id)
+    try:
+        await _backend.incr(_version_key(user_id), VERSION_TTL_S)
+        if _local is not None:
+            await _backend.publish(INVALIDATION_CHANNEL, user_id)
+    except Exception as e:
+        print(f"Cache invalidation failed for {user_id}: {e}")
+
+
+def user_cached(namespace: str, ttl: Optional[int] = None):
+    """
+    Decorator form of cached() for service functions whose first argument is user_id.
+    The remaining arguments (defaults applied) form the cache key.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            params = dict(bound.arguments)
+            user_id = params.pop("user_id")
+            key = ":".join(f"{name}={value}" for name, value in params.items())
+            return await cached(user_id, namespace, key, lambda: func(*args, **kwargs), ttl)
+
+        return wrapper
+
+    return decorator
+
+
+# ── Content-addressed LLM result cache ──
+
+def prompt_version(*parts: Any) -> str:
+    """
+    Short fingerprint of everything besides the input text that shapes an LLM
+    result (system prompt, sampling parameters). Editing any of them changes the
+    version, so stale results are never served after a prompt change.
+    """
+    return hashlib.sha256(repr(parts).encode()).hexdigest()[:16]
+
+
+def _normalize_text(text: str) -> str:
+    """Unicode-normalise and collapse whitespace so trivially different copies share a key."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+async def content_cached(
+    namespace: str,
+    model: str,
+    version: str,
+    text: str,
+    loader: Callable[[], Awaitable[Any]],
+    ttl: Optional[int] = None,
+) -> Any:
+    """
+    Cache an LLM result by hash(model, prompt version, normalised text).
+
+    Checked in the local LRU, then Redis (if configured). Concurrent calls for the
+    same key share one in-flight loader call, so identical text is analysed once.
+    The loader must raise on failure: fallback values must not be cached.
+    """
+    if _content_local is None:
+        return await loader()
+
+    digest = hashlib.sha256(
+        f"{model}\0{version}\0{_normalize_text(text)}".encode()
+    ).hexdigest()
+    key = f"{KEY_PREFIX}:llm:{namespace}:{digest}"
+
+    pending = _content_inflight.get(key)
+    if pending is not None:
+        _count(namespace, "coalesced")
+        return json.loads(await asyncio.shield(pending))
+
+    # Registered before any lookup, so a concurrent call for the same key waits for
+    # this one even while it is still reading Redis; resolved from whichever tier hits
+    future = asyncio.get_running_loop().create_future()
+    # Nobody may be waiting: don't warn about an unretrieved exception
+    future.add_done_callback(lambda f: f.cancelled() or f.exception())
+    _content_inflight[key] = future
+    shared = isinstance(_backend, RedisBackend)
+    try:
+        raw = _content_local.get(key)
+        if raw is not None:
+            _count(namespace, "local_hits")
+            future.set_result(raw)
+            return json.loads(raw)
+
+        if shared:
+            try:
+                raw = await _backend.get(key)
+            except Exception as e:
+                print(f"Cache read failed ({namespace}): {e}")
+                _count(namespace, "errors")
+            if raw is not None:
+                _count(namespace, "hits")
+                _content_local.set("", key, raw, _content_local.ttl_s, _content_local.generation)
+                future.set_result(raw)
+                return json.loads(raw)
+
+        _count(namespace, "misses")
+        raw = json.dumps(await loader())
+        ttl = ttl or get_settings().llm_cache_ttl_s
+        _content_local.set("", key, raw, ttl, _content_local.generation)
+        future.set_result(raw)
+        if shared:
+            try:
+                await _backend.set(key, raw, ttl)
+            except Exception as e:
+                print(f"Cache write failed ({namespace}): {e}")
+                _count(namespace, "errors")
+        return json.loads(raw)
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        if not future.done():
+            future.set_exception(e)
+        raise
+    finally:
+        _content_inflight.pop(key, None)
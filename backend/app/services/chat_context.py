@@ -0,0 +1,164 @@
+# [FILENAME: app/services/chat_context.py]
+# [PURPOSE: Chat context window: recent turns verbatim + a rolling session summary, within a token budget]
+# [DEPENDENCIES: app.config, app.models.database, app.services.background, app.services.model_router]
+# [PHASE: Performance - Chat context]
+
+from app.config import get_settings
+from app.models.database import get_supabase_client, run_query
+from app.services import background
+from app.services.model_router import routed_completion
+from app.utils.pagination import apply_keyset, encode_cursor
+
+# Most messages folded into the summary by one background job
+FOLD_MAX_MESSAGES = 200
+# Per-message cap inside the folding transcript
+FOLD_MESSAGE_CHARS = 1000
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a conversation between a user and emoDiary, "
+    "an empathetic AI companion. Update the current summary with the new messages. "
+    "Keep what matters for continuing the conversation: the user's feelings, events, "
+    "people and concerns they mentioned, and any advice or plans discussed. "
+    "Write in the third person about the user, in the conversation's language, "
+    "as one compact paragraph. Output only the updated summary."
+)
+
+# Sessions with a fold queued or running (one job per session at a time)
+_folding: set[str] = set()
+
+
+def recent_messages() -> int:
+    """Messages always kept verbatim: the last chat_context_recent_turns user/assistant pairs."""
+    return 2 * get_settings().chat_context_recent_turns
+
+
+def history_limit() -> int:
+    """
+    Unsummarized messages fetched per turn: the recent window plus the ones waiting
+    for the next fold, so nothing drops out of context before it is summarized.
+    """
+    return recent_messages() + get_settings().chat_summary_fold_messages
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate without a tokenizer: ~4 ASCII characters per token, while
+    Devanagari / Gujarati script costs roughly a token per 1-2 characters.
+    """
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return (len(text) - non_ascii) // 4 + non_ascii // 2 + 1
+
+
+def build_messages(system_prompt: str, summary: str | None, history: list[dict]) -> list[dict]:
+    """
+    System prompt, then the session summary, then as many of the most recent
+    messages as fit chat_context_token_budget (the newest one is always sent).
+    """
+    budget = get_settings().chat_context_token_budget
+    context = [{"role": "system", "content": system_prompt}]
+    if summary:
+        note = f"Summary of the earlier part of this conversation: {summary}"
+        context.append({"role": "system", "content": note})
+        budget -= estimate_tokens(note)
+
+    recent: list[dict] = []
+    for msg in reversed(history):
+        cost = estimate_tokens(msg["content"])
+        if recent and cost > budget:
+            break
+        recent.append({"role": msg["role"], "content": msg["content"]})
+        budget -= cost
+    return context + recent[::-1]
+
+
+def schedule_fold(session_id: str, unsummarized: int) -> None:
+    """
+    Queue a background fold once enough messages have aged out of the recent window.
+    `unsummarized` is the count after this turn's messages were stored.
+    """
+    if unsummarized < history_limit() or session_id in _folding:
+        return
+
+    async def job():
+        try:
+            await fold_session_summary(session_id, unsummarized)
+        finally:
+            _folding.discard(session_id)
+
+    _folding.add(session_id)
+    if not background.enqueue("chat_summary", job):
+        _folding.discard(session_id)
+
+
+async def fold_session_summary(session_id: str, unsummarized: int) -> bool:
+    """
+    Fold every unsummarized message older than the recent window into the session
+    summary with one LLM call, and advance the summary cursor past them.
+    The update is guarded by summary_version, so a concurrent fold can't be
+    overwritten by a stale one. Returns True if the summary was updated.
+    """
+    supabase = get_supabase_client()
+    session = await run_query(
+        supabase.table("chat_sessions")
+        .select("summary, summary_through_at, summary_through_id, summary_version")
+        .eq("id", session_id)
+    )
+    if not session.data:
+        return False
+    state = session.data[0]
+
+    fold_count = min(unsummarized - recent_messages(), FOLD_MAX_MESSAGES)
+    if fold_count <= 0:
+        return False
+
+    cursor = (
+        encode_cursor(state["summary_through_at"], state["summary_through_id"])
+        if state.get("summary_through_at") else None
+    )
+    rows = await run_query(
+        apply_keyset(
+            supabase.table("chat_messages")
+            .select("id, role, content, created_at")
+            .eq("session_id", session_id),
+            cursor,
+            descending=False,
+        ).limit(fold_count)
+    )
+    to_fold = rows.data or []
+    if not to_fold:
+        return False
+
+    transcript = "\n".join(
+        f"{m['role'].capitalize()}: {m['content'][:FOLD_MESSAGE_CHARS]}" for m in to_fold
+    )
+    response = await routed_completion(
+        "summary",
+        messages=[
+            {"role": "system", "content": SUMMARY_PROMPT},
+            {"role": "user", "content": (
+                f"Current summary:\n{state.get('summary') or '(none yet)'}\n\n"
+                f"New messages:\n{transcript}"
+            )},
+        ],
+        temperature=0.3,
+        max_tokens=get_settings().chat_summary_max_tokens,
+    )
+    summary = response.choices[0].message.content.strip()
+
+    last = to_fold[-1]
+    version = state.get("summary_version") or 0
+    updated = await run_query(
+        supabase.table("chat_sessions")
+        .update({
+            "summary": summary,
+            "summary_through_at": last["created_at"],
+            "summary_through_id": last["id"],
+            "summary_version": version + 1,
+        })
+        .eq("id", session_id)
+        .eq("summary_version", version)
+    )
+    if not updated.data:
+        print(f"Chat summary for session {session_id} was updated concurrently; dropping this fold")
+        return False
+    return True
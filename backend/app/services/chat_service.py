@@ -3,16 +3,23 @@
 # [DEPENDENCIES: groq, supabase, app.config, app.prompts.system_prompts]
 # [PHASE: Phase 4 - AI Integration]
 
-from typing import Optional
-from app.models.database import get_supabase_client
+from contextlib import aclosing
+from typing import AsyncIterator, Optional
+from app.models import postgres
+from app.models.database import get_supabase_client, run_query
 from app.prompts.system_prompts import (
     SYSTEM_PROMPTS,
     GREETING_PROMPTS,
     is_prompt_injection,
     INJECTION_REFUSAL,
 )
-from app.services import journal_service
-from app.services.ai_client import get_groq_client
+from app.services import cache, chat_context, jobs, journal_service
+from app.services.model_router import routed_completion, routed_stream
+
+TITLE_PROMPT = (
+    "Write a short, 3 to 5 word title for this journal entry. "
+    "Do not use quotes or prefixes. Entry: {entry}"
+)
 
 
 async def start_session(user_id: str, mode: str = "text", language: str = "en") -> dict:
@@ -23,26 +30,29 @@ async def start_session(user_id: str, mode: str = "text", language: str = "en")
     supabase = get_supabase_client()
 
     # Create session record
-    result = supabase.table("chat_sessions").insert({
+    result = await run_query(supabase.table("chat_sessions").insert({
         "user_id": user_id,
         "mode": mode,
         "language": language,
-    }).execute()
+    }))
 
     if not result.data:
         raise Exception("Failed to create chat session")
 
+    # New voice session changes the usage counts
+    await cache.invalidate_user(user_id)
+
     session = result.data[0]
     session_id = session["id"]
 
     # Save the AI greeting as the first message
     greeting = GREETING_PROMPTS.get(language, GREETING_PROMPTS["en"])
 
-    supabase.table("chat_messages").insert({
+    await run_query(supabase.table("chat_messages").insert({
         "session_id": session_id,
         "role": "assistant",
         "content": greeting,
-    }).execute()
+    }))
 
     return {
         "session_id": session_id,
@@ -51,115 +61,135 @@ async def start_session(user_id: str, mode: str = "text", language: str = "en")
     }
 
 
-async def send_message(
+async def _begin_turn(user_id: str, session_id: str, message: str, history_limit: int) -> dict:
+    """
+    Run the begin_chat_turn RPC: verify ownership, store the user message and
+    load the session language, rolling summary and the messages it doesn't cover
+    yet (newest `history_limit`, plus their total count) in a single round trip.
+    """
+    if postgres.is_enabled():
+        turn = await postgres.begin_chat_turn(session_id, user_id, message, history_limit)
+    else:
+        supabase = get_supabase_client()
+        result = await run_query(supabase.rpc("begin_chat_turn", {
+            "p_session_id": session_id,
+            "p_user_id": user_id,
+            "p_content": message,
+            "p_history_limit": history_limit,
+        }))
+        turn = result.data
+
+    if not turn:
+        raise ValueError("Session not found or not owned by user")
+
+    return turn
+
+
+async def _save_assistant_message(session_id: str, content: str) -> None:
+    """Persist an assistant reply for the session."""
+    supabase = get_supabase_client()
+    await run_query(supabase.table("chat_messages").insert({
+        "session_id": session_id,
+        "role": "assistant",
+        "content": content,
+    }))
+
+
+async def _prepare_reply(
     user_id: str,
     session_id: str,
     message: str,
     language: str = "en",
 ) -> dict:
     """
-    Process a user message:
-    1. Verify session ownership
-    2. Save user message to DB
-    3. Load conversation history
-    4. Call Groq Llama 3.1 for AI response
-    5. Save AI response to DB
-    6. Return AI response
+    Everything before the LLM call, shared by send_message and the streaming endpoint:
+    verify ownership, save the user message and load the summary + recent history
+    (one RPC), then fit them to the context token budget (see chat_context).
+    Returns {"language", "refusal", "messages", "unsummarized"}: `refusal` is set when
+    the message is a prompt injection and the LLM must not be called.
+    Raises ValueError if the session is not found / not owned.
     """
-    supabase = get_supabase_client()
+    # ── Security: check for prompt injection BEFORE sending (the message is still saved for audit) ──
+    injection = is_prompt_injection(message)
 
-    # Verify session belongs to user
-    session_check = (
-        supabase.table("chat_sessions")
-        .select("id, language")
-        .eq("id", session_id)
-        .eq("user_id", user_id)
-        .execute()
+    # The refusal path needs no history, so don't ship it over the wire
+    turn = await _begin_turn(
+        user_id, session_id, message, 0 if injection else chat_context.history_limit()
     )
 
-    if not session_check.data:
-        raise ValueError("Session not found or not owned by user")
-
     # Use the session's language if available
-    session_lang = session_check.data[0].get("language", language)
-
-    # ── Security: check for prompt injection BEFORE saving or sending ──
-    if is_prompt_injection(message):
-        refusal = INJECTION_REFUSAL.get(session_lang, INJECTION_REFUSAL["en"])
-
-        # Save the user message (for audit trail)
-        supabase.table("chat_messages").insert({
-            "session_id": session_id,
-            "role": "user",
-            "content": message,
-        }).execute()
-
-        # Save refusal response
-        supabase.table("chat_messages").insert({
-            "session_id": session_id,
-            "role": "assistant",
-            "content": refusal,
-        }).execute()
+    session_lang = turn.get("language") or language
 
+    if injection:
         return {
-            "response": refusal,
-            "session_id": session_id,
+            "language": session_lang,
+            "refusal": INJECTION_REFUSAL.get(session_lang, INJECTION_REFUSAL["en"]),
+            "messages": [],
+            "unsummarized": 0,
         }
 
-    # Save user message
-    supabase.table("chat_messages").insert({
-        "session_id": session_id,
-        "role": "user",
-        "content": message,
-    }).execute()
+    # Build messages for Groq
+    system_prompt = SYSTEM_PROMPTS.get(session_lang, SYSTEM_PROMPTS["en"])
+    return {
+        "language": session_lang,
+        "refusal": None,
+        "messages": chat_context.build_messages(
+            system_prompt, turn.get("summary"), turn.get("history") or []
+        ),
+        "unsummarized": turn.get("unsummarized") or 0,
+    }
 
-    # Load conversation history (last 20 messages for context window management)
-    history_result = (
-        supabase.table("chat_messages")
-        .select("role, content")
-        .eq("session_id", session_id)
-        .order("created_at", desc=False)
-        .limit(20)
-        .execute()
+
+def _fallback_reply(session_lang: str) -> str:
+    """Reply shown when Groq fails."""
+    return (
+        "I'm having a moment of difficulty connecting. Could you try sharing that again?"
+        if session_lang == "en"
+        else "मुझे अभी जुड़ने में थोड़ी कठिनाई हो रही है। क्या आप फिर से बता सकते हैं?"
     )
 
-    conversation_history = [
-        {"role": msg["role"], "content": msg["content"]}
-        for msg in (history_result.data or [])
-    ]
 
-    # Build messages for Groq
-    system_prompt = SYSTEM_PROMPTS.get(session_lang, SYSTEM_PROMPTS["en"])
-    messages = [
-        {"role": "system", "content": system_prompt},
-        *conversation_history,
-    ]
+async def send_message(
+    user_id: str,
+    session_id: str,
+    message: str,
+    language: str = "en",
+) -> dict:
+    """
+    Process a user message:
+    1. Verify session ownership, save user message and load summary + recent history (one RPC)
+    2. Call Groq Llama 3.1 for AI response
+    3. Save AI response to DB
+    4. Return AI response
+    """
+    prepared = await _prepare_reply(user_id, session_id, message, language)
+
+    if prepared["refusal"]:
+        # Save refusal response
+        await _save_assistant_message(session_id, prepared["refusal"])
+
+        return {
+            "response": prepared["refusal"],
+            "session_id": session_id,
+        }
 
     # Call Groq Llama 3.1
     try:
-        client = get_groq_client()
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=messages,
+        response = await routed_completion(
+            "chat",
+            messages=prepared["messages"],
             max_tokens=300,
             temperature=0.8,
         )
         ai_response = response.choices[0].message.content
     except Exception as e:
         # Fallback response if Groq fails
-        ai_response = (
-            "I'm having a moment of difficulty connecting. Could you try sharing that again?"
-            if session_lang == "en"
-            else "मुझे अभी जुड़ने में थोड़ी कठिनाई हो रही है। क्या आप फिर से बता सकते हैं?"
-        )
+        ai_response = _fallback_reply(prepared["language"])
         print(f"Groq API error: {e}")
 
-    # Save AI response
-    supabase.table("chat_messages").insert({
-        "session_id": session_id,
-        "role": "assistant",
-        "content": ai_response,
-    }).execute()
+    # Save AI response, then fold older turns into the session summary if due
+    await _save_assistant_message(session_id, ai_response)
+    chat_context.schedule_fold(session_id, prepared["unsummarized"] + 1)
 
     return {
         "response": ai_response,
@@ -167,28 +197,75 @@ async def send_message(
     }
 
 
+async def begin_streamed_message(
+    user_id: str,
+    session_id: str,
+    message: str,
+    language: str = "en",
+) -> AsyncIterator[str]:
+    """
+    Streaming variant of send_message. Ownership is checked and the user message
+    saved before this returns (so the router can still answer 404); the returned
+    generator then yields reply text as Groq produces it and saves the assembled
+    reply when the stream ends. If the client disconnects, the generator is
+    cancelled, the Groq stream is closed and no reply is saved.
+    """
+    prepared = await _prepare_reply(user_id, session_id, message, language)
+    return _stream_reply(session_id, prepared)
+
+
+async def _stream_reply(session_id: str, prepared: dict) -> AsyncIterator[str]:
+    if prepared["refusal"]:
+        # Saved before it is sent, so a disconnect after the yield can't lose it
+        await _save_assistant_message(session_id, prepared["refusal"])
+        yield prepared["refusal"]
+        return
+
+    parts: list[str] = []
+    try:
+        # aclosing: on disconnect the Groq stream is closed now, not whenever it is collected
+        async with aclosing(routed_stream(
+            "chat",
+            messages=prepared["messages"],
+            max_tokens=300,
+            temperature=0.8,
+        )) as stream:
+            async for delta in stream:
+                parts.append(delta)
+                yield delta
+    except Exception as e:
+        print(f"Groq API error (stream): {e}")
+        if not parts:
+            # Nothing reached the user yet: fall back exactly like send_message
+            fallback = _fallback_reply(prepared["language"])
+            parts.append(fallback)
+            yield fallback
+
+    # Save what the user actually saw
+    await _save_assistant_message(session_id, "".join(parts))
+    chat_context.schedule_fold(session_id, prepared["unsummarized"] + 1)
+
+
 async def get_session_messages(user_id: str, session_id: str) -> list[dict]:
     """Retrieve all messages for a session, verifying ownership."""
     supabase = get_supabase_client()
 
     # Verify session ownership
-    session_check = (
+    session_check = await run_query(
         supabase.table("chat_sessions")
         .select("id")
         .eq("id", session_id)
         .eq("user_id", user_id)
-        .execute()
     )
 
     if not session_check.data:
         return []
 
-    result = (
+    result = await run_query(
         supabase.table("chat_messages")
         .select("id, role, content, created_at")
         .eq("session_id", session_id)
         .order("created_at", desc=False)
-        .execute()
     )
 
     return result.data or []
@@ -199,12 +276,11 @@ async def end_session(user_id: str, session_id: str) -> Optional[dict]:
     supabase = get_supabase_client()
 
     # Get session to compute duration
-    session_result = (
+    session_result = await run_query(
         supabase.table("chat_sessions")
         .select("*")
         .eq("id", session_id)
         .eq("user_id", user_id)
-        .execute()
     )
 
     if not session_result.data:
@@ -220,7 +296,7 @@ async def end_session(user_id: str, session_id: str) -> Optional[dict]:
     started = datetime.fromisoformat(started_at.replace("Z", "+00:00"))
     duration_s = int((now - started).total_seconds())
 
-    update_result = (
+    update_result = await run_query(
         supabase.table("chat_sessions")
         .update({
             "ended_at": now.isoformat(),
@@ -228,7 +304,6 @@ async def end_session(user_id: str, session_id: str) -> Optional[dict]:
         })
         .eq("id", session_id)
         .eq("user_id", user_id)
-        .execute()
     )
 
     if not update_result.data:
@@ -237,29 +312,64 @@ async def end_session(user_id: str, session_id: str) -> Optional[dict]:
     return update_result.data[0]
 
 
-async def convert_session_to_journal(user_id: str, session_id: str) -> dict:
-    """Summarize a chat session and save it as a journal entry."""
+async def _conversion_source(user_id: str, session_id: str) -> tuple[dict, list[dict]]:
+    """The session and its messages, if it can be converted to a journal entry (else ValueError)."""
     supabase = get_supabase_client()
 
     # Get session
-    session_check = (
+    session_check = await run_query(
         supabase.table("chat_sessions")
-        .select("id, language")
+        .select("id, language, saved")
         .eq("id", session_id)
         .eq("user_id", user_id)
-        .execute()
     )
 
     if not session_check.data:
         raise ValueError("Session not found or not owned by user")
 
-    session_lang = session_check.data[0].get("language", "en")
-
     # Get messages
     messages = await get_session_messages(user_id, session_id)
     if len(messages) < 2:
         raise ValueError("Not enough messages to summarize.")
 
+    return session_check.data[0], messages
+
+
+async def queue_session_conversion(user_id: str, session_id: str) -> Optional[int]:
+    """
+    Check that a session can be converted, then queue convert_session_to_journal()
+    as a "chat.convert_to_journal" job and return its id. Raises ValueError if not.
+    """
+    await _conversion_source(user_id, session_id)
+    return await jobs.enqueue(
+        "chat.convert_to_journal",
+        {"user_id": user_id, "session_id": session_id},
+        key=f"chat-journal:{session_id}",
+    )
+
+
+async def convert_session_to_journal(user_id: str, session_id: str) -> Optional[dict]:
+    """
+    Summarize a chat session and save it as a journal entry.
+    Safe to run more than once (job retries, expired leases): the entry is written
+    and the session marked saved in one transaction, so only one run writes an
+    entry; the others return None. A run that dies before that leaves the session
+    unsaved for its retry.
+    """
+    session, messages = await _conversion_source(user_id, session_id)
+    if session.get("saved"):
+        print(f"Session {session_id} is already saved as a journal entry; skipping")
+        return None
+
+    title, summary = await _summarize_session(messages)
+    entry = await journal_service.create_session_entry(user_id, session_id, title, summary)
+    if entry is None:
+        print(f"Session {session_id} was saved as a journal entry by another run; skipping")
+    return entry
+
+
+async def _summarize_session(messages: list[dict]) -> tuple[str, str]:
+    """Summary + title LLM calls for a session's transcript: (title, summary)."""
     # Format transcript
     transcript = "\n".join(
         f"{m['role'].capitalize()}: {m['content']}" for m in messages
@@ -267,7 +377,6 @@ async def convert_session_to_journal(user_id: str, session_id: str) -> dict:
 
     # Ask Groq to summarize
     try:
-        client = _get_groq_client()
         prompt = (
             "You are a helpful assistant. Read the following transcript of a conversation "
             "between a user and the emoDiary AI companion. Summarize the conversation into a well-written, "
@@ -275,8 +384,8 @@ async def convert_session_to_journal(user_id: str, session_id: str) -> dict:
             "Keep it between 2 to 4 paragraphs. Do not include any tags, titles, or JSON. Just write the raw text."
         )
 
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
+        response = await routed_completion(
+            "summary",
             messages=[
                 {"role": "system", "content": prompt},
                 {"role": "user", "content": transcript[:5000]}
@@ -287,10 +396,10 @@ async def convert_session_to_journal(user_id: str, session_id: str) -> dict:
         summary = response.choices[0].message.content.strip()
 
         # Generate a title
-        title_response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
+        title_response = await routed_completion(
+            "title",
             messages=[
-                {"role": "user", "content": f"Write a short, 3 to 5 word title for this journal entry. Do not use quotes or prefixes. Entry: {summary[:500]}"}
+                {"role": "user", "content": TITLE_PROMPT.format(entry=summary[:500])}
             ],
             temperature=0.6,
             max_tokens=20,
@@ -299,16 +408,17 @@ async def convert_session_to_journal(user_id: str, session_id: str) -> dict:
 
     except Exception as e:
         print(f"Error summarizing session: {e}")
-        raise ValueError("Failed to summarize the conversation.")
+        raise RuntimeError("Failed to summarize the conversation.") from e
 
-    # Create journal entry (this will automatically trigger auto-tagging via journal_service)
-    entry = await journal_service.create_entry(
-        user_id=user_id,
-        title=title,
-        content=summary,
-    )
+    return title, summary
 
-    # Mark session as saved
-    supabase.table("chat_sessions").update({"saved": True}).eq("id", session_id).execute()
 
-    return entry
+async def _convert_session_job(payload: dict, last_attempt: bool) -> None:
+    """Summarization failures are retried; a session that can't be converted is dead-lettered."""
+    try:
+        await convert_session_to_journal(payload["user_id"], payload["session_id"])
+    except ValueError as e:
+        raise jobs.PermanentJobError(str(e)) from e
+
+
+jobs.register("chat.convert_to_journal", _convert_session_job)
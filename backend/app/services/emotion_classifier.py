@@ -0,0 +1,328 @@
+# [FILENAME: app/services/emotion_classifier.py]
+# [PURPOSE: Local lexicon classifier over EMOTION_LIST (en / hi / Hinglish / gu) as a fast path before the LLM]
+# [DEPENDENCIES: numpy, app.config]
+# [PHASE: Performance - Local emotion classifier]
+
+import re
+import time
+import unicodedata
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+
+from app.config import get_settings
+
+# Same order as emotion_service.EMOTION_LIST (kept here to avoid an import cycle)
+EMOTIONS = (
+    "joy", "sadness", "anger", "fear", "anxiety",
+    "calm", "gratitude", "love", "hope", "confusion",
+    "loneliness", "excitement", "frustration", "guilt", "neutral",
+)
+
+# Emotion → space-separated terms per language. "term*" matches any token starting
+# with "term"; "term=0.5" sets the weight (default 1). A term listed under several
+# emotions splits its evidence between them. Words that are mostly not emotional
+# ("fed", "content") are left out.
+LEXICON = {
+    "joy": {
+        "en": "happy happier happiest happiness joy joyful glad delighted cheerful smil* laugh* "
+              "fun great amazing awesome wonderful fantastic yay proud best",
+        "hi": "खुश खुशी आनंद मज़ा मजा हँसी हंसी प्रसन्न",
+        "hinglish": "khush khushi maza mazaa mast badhiya hasi hasaya hassi",
+        "gu": "ખુશ ખુશી આનંદ મજા મજ્જા",
+    },
+    "sadness": {
+        "en": "sad sadness unhappy depress* cry cried crying tears heartbroken upset miserable gloomy "
+              "hopeless grief griev* hurt hurting numb empty terrible=0.7 awful=0.7 horrible=0.7 "
+              "worst=0.7 miss=0.5 missed=0.5 missing=0.5",
+        "hi": "दुख दुःख दुखी उदास रोना रोई रोया आंसू आँसू निराश",
+        "hinglish": "dukh dukhi udaas udas rona royi roya aansu",
+        "gu": "દુઃખ દુખ દુઃખી ઉદાસ રડવું રડી રડ્યો આંસુ",
+    },
+    "anger": {
+        "en": "angry anger furious mad rage hate hated annoyed irritat* pissed livid outraged resent*",
+        "hi": "गुस्सा ग़ुस्सा क्रोध नाराज़ नाराज चिढ़",
+        "hinglish": "gussa naraz naraaz chidh",
+        "gu": "ગુસ્સો ક્રોધ નારાજ",
+    },
+    "fear": {
+        "en": "afraid scared fear feared fearful terrified frightened panic* dread* horror scary",
+        "hi": "डर डरा डरी डरता डरती भय",
+        "hinglish": "darr darta darti dara",
+        "gu": "ડર બીક ભય ડરી",
+    },
+    "anxiety": {
+        "en": "anxious anxiety worr* nervous stress* tense uneasy overthink* restless overwhelm*",
+        "hi": "चिंता घबराहट घबरा तनाव बेचैन बेचैनी परेशान",
+        "hinglish": "tension chinta ghabrahat ghabra pareshan bechain",
+        "gu": "ચિંતા તણાવ ગભરામણ બેચેન",
+    },
+    "calm": {
+        "en": "calm peace peaceful relax* serene rested soothing tranquil",
+        "hi": "शांति शांत सुकून आराम चैन",
+        "hinglish": "shanti sukoon sukun aaram",
+        "gu": "શાંતિ શાંત સુકૂન આરામ",
+    },
+    "gratitude": {
+        "en": "grateful gratitude thankful thank thanks blessed appreciat*",
+        "hi": "शुक्रिया धन्यवाद आभारी आभार शुक्र",
+        "hinglish": "shukriya dhanyavaad dhanyawad shukr",
+        "gu": "આભાર આભારી ધન્યવાદ",
+    },
+    "love": {
+        "en": "love loved loving adore* cherish* affection",
+        "hi": "प्यार प्रेम मोहब्बत",
+        "hinglish": "pyaar pyar mohabbat ishq",
+        "gu": "પ્રેમ પ્યાર વહાલ",
+    },
+    "hope": {
+        "en": "hope hopeful hoping optimis* wish motivated determined",
+        "hi": "उम्मीद आशा भरोसा",
+        "hinglish": "umeed ummeed asha",
+        "gu": "આશા ઉમ્મીદ",
+    },
+    "confusion": {
+        "en": "confused confusing confusion unsure uncertain puzzled clueless torn dilemma",
+        "hi": "उलझन उलझा भ्रम दुविधा",
+        "hinglish": "uljhan",
+        "gu": "મૂંઝવણ ગૂંચવણ",
+    },
+    "loneliness": {
+        "en": "lonely loneliness alone isolat* abandoned ignored nobody "
+              "miss=0.5 missed=0.5 missing=0.5",
+        "hi": "अकेला अकेली अकेलापन तन्हा",
+        "hinglish": "akela akeli akelapan tanha",
+        "gu": "એકલો એકલી એકલતા",
+    },
+    "excitement": {
+        "en": "excited exciting excitement thrill* ecstatic pumped eager",
+        "hi": "उत्साह उत्साहित रोमांच",
+        "hinglish": "utsah",
+        "gu": "ઉત્સાહ ઉત્સાહિત",
+    },
+    "frustration": {
+        "en": "frustrat* stuck annoying useless ugh exhausted=0.6 drained=0.6",
+        "hi": "झुंझलाहट खीज तंग बेकार थकान=0.6 थका=0.6 थकी=0.6",
+        "hinglish": "bekaar bekar thak=0.6 thaka=0.6 thaki=0.6",
+        "gu": "કંટાળો કંટાળી થાક=0.6",
+    },
+    "guilt": {
+        "en": "guilt guilty ashamed shame regret* sorry apologi* fault blame*",
+        "hi": "शर्म शर्मिंदा पछतावा गलती ग़लती माफ़ी माफी",
+        "hinglish": "sharam sharminda sharmindi galti maafi",
+        "gu": "શરમ પસ્તાવો ભૂલ માફી",
+    },
+    "neutral": {
+        "en": "okay ok fine normal usual routine ordinary meh alright",
+        "hi": "ठीक सामान्य",
+        "hinglish": "theek thik",
+        "gu": "ઠીક સામાન્ય",
+    },
+}
+
+# A negator drops the emotion terms in the next NEGATION_WINDOW tokens ("not happy")
+# and halves the confidence; one right after a term ("khush nahi", "મજા નથી") only
+# halves it. An intensifier boosts the next term within INTENSIFIER_WINDOW tokens.
+# Neither reaches past clause punctuation ("not sad, I'm great" keeps "great").
+NEGATORS = frozenset(
+    "not no never dont cant wont isnt wasnt didnt nahi nahin na mat नहीं ना मत નથી ના નહીં".split()
+)
+INTENSIFIERS = frozenset(
+    "very so really extremely too super totally bahut bohot bahot bht ekdum itna "
+    "बहुत बेहद अत्यंत બહુ ખૂબ અતિ".split()
+)
+NEGATION_WINDOW = 3
+INTENSIFIER_WINDOW = 2
+INTENSIFIER_WEIGHT = 1.5
+# Evidence: one full-weight emotion word is enough for a short text, but long texts
+# need proportionally more: full confidence needs MIN_EVIDENCE units of emotion
+# weight, and one unit per 1 / EVIDENCE_DENSITY tokens. Calibrated with
+# benchmarks/eval_emotion_classifier.py against EMOTION_LOCAL_MIN_CONFIDENCE.
+MIN_EVIDENCE = 1.0
+EVIDENCE_DENSITY = 0.08
+# Emotions whose share of the evidence is at or below this are left out of the map
+MIN_SHARE = 0.1
+
+# Letters, digits and the Devanagari / Gujarati blocks (vowel signs included, dandas
+# excluded), or one clause-ending punctuation mark (dandas included)
+_TOKEN = re.compile(r"[\w\u0900-\u0963\u0966-\u097f\u0a80-\u0aff]+|[.,;:!?\u0964\u0965]")
+CLAUSE_BREAKS = frozenset(".,;:!?\u0964\u0965")
+_MIN_PREFIX = 3
+
+
+def _build_lexicon() -> tuple[dict[str, int], dict[str, int], np.ndarray]:
+    """Exact-term index, prefix index and the (terms × emotions) weight matrix."""
+    rows: dict[str, dict[int, float]] = {}
+    for column, emotion in enumerate(EMOTIONS):
+        for terms in LEXICON[emotion].values():
+            for spec in terms.split():
+                term, _, weight = spec.partition("=")
+                term = unicodedata.normalize("NFC", term)
+                row = rows.setdefault(term, {})
+                row[column] = row.get(column, 0.0) + float(weight or 1)
+
+    exact: dict[str, int] = {}
+    prefixes: dict[str, int] = {}
+    weights = np.zeros((len(rows), len(EMOTIONS)), dtype=np.float32)
+    for index, (term, row) in enumerate(rows.items()):
+        if term.endswith("*"):
+            prefixes[term[:-1]] = index
+        else:
+            exact[term] = index
+        for column, weight in row.items():
+            weights[index, column] = weight
+    return exact, prefixes, weights
+
+
+_EXACT, _PREFIXES, _WEIGHTS = _build_lexicon()
+_NEUTRAL = EMOTIONS.index("neutral")
+
+_stats = {"local": 0, "escalated": 0, "local_us": 0.0}
+
+
+@lru_cache(maxsize=50_000)
+def _term_index(token: str) -> int:
+    """Lexicon row for a token (exact match, then longest prefix), or -1."""
+    index = _EXACT.get(token)
+    if index is not None:
+        return index
+    for end in range(len(token), _MIN_PREFIX - 1, -1):
+        index = _PREFIXES.get(token[:end])
+        if index is not None:
+            return index
+    return -1
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased word tokens, with clause punctuation kept as single-character tokens."""
+    text = unicodedata.normalize("NFC", text).lower().replace("'", "").replace("’", "")
+    return _TOKEN.findall(text)
+
+
+def _hits(tokens: list[str]) -> tuple[list[int], list[float], bool]:
+    """Lexicon rows and their multipliers for one text, and whether a negator hid a term."""
+    rows, multipliers = [], []
+    negated_until = boosted_until = last_term = -NEGATION_WINDOW - 1
+    negated = False
+    for position, token in enumerate(tokens):
+        if token in CLAUSE_BREAKS:
+            negated_until = boosted_until = last_term = -NEGATION_WINDOW - 1
+            continue
+        if token in NEGATORS:
+            negated_until = position + NEGATION_WINDOW
+            negated = negated or position - last_term <= NEGATION_WINDOW
+            continue
+        if token in INTENSIFIERS:
+            boosted_until = position + INTENSIFIER_WINDOW
+            continue
+        index = _term_index(token)
+        if index < 0:
+            continue
+        if position <= negated_until:
+            negated = True
+            continue
+        last_term = position
+        rows.append(index)
+        multipliers.append(INTENSIFIER_WEIGHT if position <= boosted_until else 1.0)
+    return rows, multipliers, negated
+
+
+def classify_batch(texts: list[str]) -> list[dict]:
+    """
+    Score many texts in one pass: per-text lexicon hits are scattered into an
+    (n × emotions) matrix and shares, margins and confidences are computed on the
+    whole batch at once. Each result is {"emotions", "primary_emotion", "confidence"};
+    a text with no emotion words is neutral with confidence 0.
+    """
+    text_ids: list[int] = []
+    rows: list[int] = []
+    multipliers: list[float] = []
+    lengths = np.zeros(len(texts), dtype=np.float32)
+    negated = np.zeros(len(texts), dtype=bool)
+    for text_id, text in enumerate(texts):
+        tokens = tokenize(text)
+        hit_rows, hit_multipliers, negated[text_id] = _hits(tokens)
+        lengths[text_id] = sum(token not in CLAUSE_BREAKS for token in tokens)
+        text_ids.extend([text_id] * len(hit_rows))
+        rows.extend(hit_rows)
+        multipliers.extend(hit_multipliers)
+
+    scores = np.zeros((len(texts), len(EMOTIONS)), dtype=np.float32)
+    if rows:
+        np.add.at(
+            scores,
+            np.asarray(text_ids),
+            _WEIGHTS[np.asarray(rows)] * np.asarray(multipliers, dtype=np.float32)[:, None],
+        )
+
+    totals = scores.sum(axis=1)
+    safe_totals = np.where(totals > 0, totals, 1.0)
+    shares = scores / safe_totals[:, None]
+    top_two = np.sort(shares, axis=1)[:, -2:]
+    margin = top_two[:, 1] - top_two[:, 0]
+    evidence = np.minimum(1.0, totals / MIN_EVIDENCE) * np.minimum(
+        1.0, totals / np.maximum(lengths * EVIDENCE_DENSITY, 1e-6)
+    )
+    confidence = np.where(totals > 0, margin * evidence * np.where(negated, 0.5, 1.0), 0.0)
+    primary = np.where(totals > 0, shares.argmax(axis=1), _NEUTRAL)
+
+    results = []
+    for i in range(len(texts)):
+        if totals[i] > 0:
+            emotions = {
+                EMOTIONS[column]: round(float(shares[i, column]), 2)
+                for column in np.flatnonzero(shares[i] > MIN_SHARE)
+            }
+        else:
+            emotions = {"neutral": 1.0}
+        results.append({
+            "emotions": emotions,
+            "primary_emotion": EMOTIONS[primary[i]],
+            "confidence": round(float(confidence[i]), 3),
+        })
+    return results
+
+
+def classify(text: str) -> dict:
+    return classify_batch([text])[0]
+
+
+def classify_confident(text: str) -> Optional[dict]:
+    """
+    Local answer ({"emotions", "primary_emotion"}) when the classifier is enabled
+    and at least EMOTION_LOCAL_MIN_CONFIDENCE sure, else None (escalate to the LLM).
+    """
+    settings = get_settings()
+    if not settings.emotion_local_enabled:
+        return None
+    start = time.perf_counter()
+    result = classify(text)
+    if result["confidence"] < settings.emotion_local_min_confidence:
+        _stats["escalated"] += 1
+        return None
+    _stats["local"] += 1
+    _stats["local_us"] += (time.perf_counter() - start) * 1_000_000
+    return {"emotions": result["emotions"], "primary_emotion": result["primary_emotion"]}
+
+
+def best_guess(text: str) -> Optional[dict]:
+    """The classifier's answer regardless of confidence, or None if the text has no emotion words."""
+    result = classify(text)
+    if result["confidence"] <= 0:
+        return None
+    return {"emotions": result["emotions"], "primary_emotion": result["primary_emotion"]}
+
+
+def get_classifier_stats() -> dict:
+    """Texts answered locally vs escalated to the LLM, and the local path's average latency."""
+    decided = _stats["local"] + _stats["escalated"]
+    return {
+        "enabled": get_settings().emotion_local_enabled,
+        "min_confidence": get_settings().emotion_local_min_confidence,
+        "lexicon_terms": len(_WEIGHTS),
+        "local": _stats["local"],
+        "escalated": _stats["escalated"],
+        "local_rate": round(_stats["local"] / decided, 3) if decided else 0,
+        "avg_local_us": round(_stats["local_us"] / _stats["local"], 1) if _stats["local"] else 0,
+    }
@@ -1,14 +1,18 @@
 # [FILENAME: app/services/emotion_service.py]
-# [PURPOSE: Emotion detection & sentiment analysis using TextBlob + Groq]
-# [DEPENDENCIES: textblob, groq, supabase]
+# [PURPOSE: Emotion detection & sentiment analysis using a local classifier + Groq, with TextBlob-scale sentiment]
+# [DEPENDENCIES: numpy, groq, supabase, app.services.sentiment]
 # [PHASE: Phase 5 - Emotion Detection]
 
+import asyncio
 import json
+from datetime import datetime, timezone
 from typing import Optional
-from textblob import TextBlob
 
-from app.models.database import get_supabase_client
-from app.services.ai_client import get_groq_client
+from app.config import get_settings
+from app.models.database import get_supabase_client, run_query
+from app.services import cache, emotion_classifier, jobs, llm_telemetry, sentiment
+from app.services.model_router import model_for, routed_completion
+from app.services.batcher import MicroBatcher
 
 
 # ── Emotion vocabulary ──
@@ -19,59 +23,156 @@ EMOTION_LIST = [
 ]
 
 
+# Column projections for emotion history reads (`view` query parameter).
+# The summary view drops the per-emotion confidence map, which trend charts don't use.
+EMOTION_VIEW_COLUMNS = {
+    "full": "id, user_id, source_type, source_id, sentiment_score, emotions, primary_emotion, created_at",
+    "summary": "id, source_type, source_id, sentiment_score, primary_emotion, created_at",
+}
+
+
 def _textblob_sentiment(text: str) -> float:
-    """Get sentiment polarity from TextBlob (-1.0 to 1.0)."""
-    blob = TextBlob(text)
-    return round(blob.sentiment.polarity, 3)
+    """TextBlob sentiment polarity (-1.0 to 1.0), from the shared sentiment engine."""
+    return sentiment.score(text)
 
 
-async def analyze_emotions_with_ai(text: str) -> dict:
+EMOTION_SYSTEM_PROMPT = (
+    "You are an emotion analysis engine. Analyze the given text and output "
+    "ONLY a JSON object with exactly two keys:\n"
+    '1. "emotions": an object mapping emotion names to confidence scores (0.0-1.0). '
+    f"Use ONLY these emotions: {', '.join(EMOTION_LIST)}. "
+    "Include only emotions with confidence > 0.1.\n"
+    '2. "primary_emotion": the single most dominant emotion.\n'
+    "Output ONLY valid JSON, no markdown, no explanation."
+)
+# Batched variant: one system prompt for several texts, results matched back by id
+EMOTION_BATCH_PROMPT = (
+    "You are an emotion analysis engine. The user message is a JSON array of "
+    'objects {"id": ..., "text": ...}. Analyze each text independently and output '
+    'ONLY a JSON object {"results": [...]} with one entry per input, each with exactly three keys:\n'
+    '1. "id": the id of the input it belongs to.\n'
+    '2. "emotions": an object mapping emotion names to confidence scores (0.0-1.0). '
+    f"Use ONLY these emotions: {', '.join(EMOTION_LIST)}. "
+    "Include only emotions with confidence > 0.1.\n"
+    '3. "primary_emotion": the single most dominant emotion.\n'
+    "Output ONLY valid JSON, no markdown, no explanation."
+)
+# Output budget per item in a batched call (a single call gets 200)
+EMOTION_BATCH_ITEM_TOKENS = 120
+
+# Cache key component: changes whenever the prompts or sampling parameters change
+EMOTION_PROMPT_VERSION = cache.prompt_version(
+    EMOTION_SYSTEM_PROMPT, EMOTION_BATCH_PROMPT, 0.1, 200, EMOTION_BATCH_ITEM_TOKENS
+)
+
+
+def _record_usage(response) -> None:
+    _emotion_batcher.add_tokens(getattr(getattr(response, "usage", None), "total_tokens", None))
+
+
+async def _call_emotion_model(text: str) -> dict:
+    """One Groq call for the emotion map. Raises on any failure (nothing gets cached)."""
+    response = await routed_completion(
+        "emotion",
+        messages=[
+            {"role": "system", "content": EMOTION_SYSTEM_PROMPT},
+            {"role": "user", "content": text},
+        ],
+        max_tokens=200,
+        temperature=0.1,  # low temp for consistent structured output
+    )
+
+    _record_usage(response)
+
+    raw = response.choices[0].message.content.strip()
+    # Strip markdown fences if present
+    if raw.startswith("```"):
+        raw = raw.split("\n", 1)[-1].rsplit("```", 1)[0].strip()
+
+    result = json.loads(raw)
+    return normalize_emotion_result(result.get("emotions"), result.get("primary_emotion"))
+
+
+async def _analyze_batch(items: list[tuple[str, Optional[str]]]) -> list:
     """
-    Use Groq Llama to detect nuanced emotions from text.
-    Returns dict with emotions (name -> confidence) and primary_emotion.
-    Falls back to TextBlob-only analysis if Groq fails.
+    Micro-batch handler for (text, user_id) items: a batch of one uses the
+    single-text prompt; larger batches go out as one call with per-item ids, its
+    token usage split across the items' users. Items missing from the reply fail alone.
     """
-    try:
-        client = get_groq_client()
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
+    texts = [text for text, _ in items]
+    with llm_telemetry.attributed(tuple(user for _, user in items)):
+        if len(texts) == 1:
+            return [await _call_emotion_model(texts[0])]
+
+        payload = json.dumps(
+            [{"id": str(i), "text": text} for i, text in enumerate(texts)], ensure_ascii=False
+        )
+        response = await routed_completion(
+            "emotion",
             messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are an emotion analysis engine. Analyze the given text and output "
-                        "ONLY a JSON object with exactly two keys:\n"
-                        '1. "emotions": an object mapping emotion names to confidence scores (0.0-1.0). '
-                        f"Use ONLY these emotions: {', '.join(EMOTION_LIST)}. "
-                        "Include only emotions with confidence > 0.1.\n"
-                        '2. "primary_emotion": the single most dominant emotion.\n'
-                        "Output ONLY valid JSON, no markdown, no explanation."
-                    ),
-                },
-                {"role": "user", "content": text[:1500]},  # cap input length
+                {"role": "system", "content": EMOTION_BATCH_PROMPT},
+                {"role": "user", "content": payload},
             ],
-            max_tokens=200,
-            temperature=0.1,  # low temp for consistent structured output
+            max_tokens=EMOTION_BATCH_ITEM_TOKENS * len(texts) + 50,
+            temperature=0.1,
+            response_format={"type": "json_object"},
         )
+    _record_usage(response)
 
-        raw = response.choices[0].message.content.strip()
-        # Strip markdown fences if present
-        if raw.startswith("```"):
-            raw = raw.split("\n", 1)[-1].rsplit("```", 1)[0].strip()
+    results = json.loads(response.choices[0].message.content.strip()).get("results") or []
+    by_id = {str(r.get("id")): r for r in results if isinstance(r, dict)}
+    return [
+        normalize_emotion_result(by_id[str(i)].get("emotions"), by_id[str(i)].get("primary_emotion"))
+        if str(i) in by_id
+        else ValueError(f"Batched emotion reply is missing item {i}")
+        for i in range(len(texts))
+    ]
 
-        result = json.loads(raw)
-        emotions = result.get("emotions", {})
-        primary = result.get("primary_emotion", "neutral")
 
-        # Validate primary_emotion is in our list
-        if primary not in EMOTION_LIST:
-            primary = max(emotions, key=emotions.get, default="neutral")
+_emotion_batcher = MicroBatcher(
+    "emotion_analysis",
+    _analyze_batch,
+    max_items=lambda: get_settings().emotion_batch_max_items,
+    max_wait_ms=lambda: get_settings().emotion_batch_max_wait_ms,
+)
 
-        return {"emotions": emotions, "primary_emotion": primary}
 
+def normalize_emotion_result(emotions, primary) -> dict:
+    """
+    Coerce model output into {"emotions", "primary_emotion"}: the primary emotion must
+    be in EMOTION_LIST, otherwise the highest-scoring emotion (or "neutral") is used.
+    """
+    if not isinstance(emotions, dict):
+        emotions = {}
+    if primary not in EMOTION_LIST:
+        primary = max(emotions, key=emotions.get, default="neutral")
+    return {"emotions": emotions, "primary_emotion": primary}
+
+
+async def analyze_emotions_with_ai(text: str) -> dict:
+    """
+    Use Groq Llama to detect nuanced emotions from text.
+    Returns dict with emotions (name -> confidence) and primary_emotion.
+    Texts the local classifier is confident about are answered without an LLM call.
+    Results are cached by content (see cache.content_cached); cache misses arriving
+    close together share one batched LLM call.
+    Falls back to the local classifier's best guess, then TextBlob, if Groq fails.
+    """
+    capped = text[:1500]  # cap input length
+    local = emotion_classifier.classify_confident(capped)
+    if local:
+        return local
+    try:
+        return await cache.content_cached(
+            "llm:emotions",
+            model_for("emotion"),
+            EMOTION_PROMPT_VERSION,
+            capped,
+            lambda: _emotion_batcher.submit((capped, llm_telemetry.current_user())),
+        )
     except Exception as e:
-        print(f"Groq emotion analysis failed, using TextBlob fallback: {e}")
-        return _fallback_analysis(text)
+        print(f"Groq emotion analysis failed, using local fallback: {e}")
+        return emotion_classifier.best_guess(capped) or _fallback_analysis(text)
 
 
 def _fallback_analysis(text: str) -> dict:
@@ -94,66 +195,164 @@ def _fallback_analysis(text: str) -> dict:
     return {"emotions": emotions, "primary_emotion": primary}
 
 
+# Latest-wins coalescing of analyze_and_store() calls for the same source in this
+# process: while one analysis runs, later requests replace each other and only the
+# newest is analyzed next (its callers, replaced ones included, get that result)
+_inflight: dict[tuple[str, str, str], dict] = {}
+_store_stats = {"analyses": 0, "superseded": 0, "stale_skipped": 0}
+
+
 async def analyze_and_store(
     user_id: str,
     source_type: str,
     source_id: str,
     text: str,
+    source_version: Optional[str] = None,
 ) -> dict:
     """
     Full pipeline: sentiment + AI emotion detection → store in DB.
-    Called automatically when journal entries are created/updated.
+    Used for chat sessions and POST /api/emotion/analyze; journal entries get their
+    emotions from the unified journal analysis and call store_analysis() directly.
+    `source_version` (ISO timestamp) is the version of `text`, default now; queued
+    jobs pass the time they were enqueued.
+    Overlapping calls for the same source are coalesced (see _inflight).
     """
-    supabase = get_supabase_client()
+    key = (user_id, source_type, source_id)
+    slot = _inflight.get(key)
+    if slot is None:
+        slot = _inflight[key] = {"request": None, "future": None}
+        slot["task"] = asyncio.create_task(_analyze_latest(key, slot))
+    # Versioned at request time, so a slow older analysis never replaces this one
+    source_version = source_version or datetime.now(timezone.utc).isoformat()
+    if slot["future"] is None:
+        slot["future"] = asyncio.get_running_loop().create_future()
+        slot["request"] = (text, source_version)
+    else:
+        _store_stats["superseded"] += 1
+        # A retried older job must not displace a newer text waiting its turn
+        if _parse_version(source_version) >= _parse_version(slot["request"][1]):
+            slot["request"] = (text, source_version)
+    return await asyncio.shield(slot["future"])
 
-    # Get sentiment score
-    sentiment_score = _textblob_sentiment(text)
 
-    # Get AI emotion analysis
-    emotion_result = await analyze_emotions_with_ai(text)
+def _parse_version(version: str) -> datetime:
+    return datetime.fromisoformat(version.replace("Z", "+00:00"))
 
-    # Upsert — delete existing analysis for this source, then insert fresh
-    supabase.table("emotion_analyses").delete().eq(
-        "source_id", source_id
-    ).eq("source_type", source_type).execute()
 
-    result = supabase.table("emotion_analyses").insert({
-        "user_id": user_id,
-        "source_type": source_type,
-        "source_id": source_id,
-        "sentiment_score": sentiment_score,
-        "emotions": emotion_result["emotions"],
-        "primary_emotion": emotion_result["primary_emotion"],
-    }).execute()
+async def queue_analysis(user_id: str, source_type: str, source_id: str, text: str) -> Optional[int]:
+    """
+    Queue analyze_and_store() as an "emotion.analyze" job and return its id.
+    A newer text for the same source replaces one that is still queued. The text
+    is versioned now, at enqueue time, so a retried older job can never overwrite
+    the analysis of a newer one that ran first.
+    """
+    return await jobs.enqueue(
+        "emotion.analyze",
+        {
+            "user_id": user_id,
+            "source_type": source_type,
+            "source_id": source_id,
+            "text": text,
+            "source_version": datetime.now(timezone.utc).isoformat(),
+        },
+        key=f"emotion:{user_id}:{source_type}:{source_id}",
+    )
 
-    if not result.data:
+
+async def _analyze_and_store_job(payload: dict, last_attempt: bool) -> None:
+    await analyze_and_store(
+        payload["user_id"],
+        payload["source_type"],
+        payload["source_id"],
+        payload["text"],
+        payload.get("source_version"),
+    )
+
+
+jobs.register("emotion.analyze", _analyze_and_store_job)
+
+
+async def _analyze_latest(key: tuple[str, str, str], slot: dict) -> None:
+    """Run the newest queued request for a source until none is left."""
+    user_id, source_type, source_id = key
+    try:
+        while slot["request"] is not None:
+            (text, source_version), future = slot["request"], slot["future"]
+            slot["request"] = slot["future"] = None
+            _store_stats["analyses"] += 1
+            try:
+                emotion_result = await analyze_emotions_with_ai(text)
+                result = await store_analysis(
+                    user_id, source_type, source_id, text, emotion_result, source_version=source_version
+                )
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+    finally:
+        _inflight.pop(key, None)
+
+
+async def store_analysis(
+    user_id: str,
+    source_type: str,
+    source_id: str,
+    text: str,
+    emotion_result: dict,
+    source_version: Optional[str] = None,
+) -> dict:
+    """
+    Store an emotion analysis ({"emotions", "primary_emotion"}) plus TextBlob sentiment
+    for a source in one upsert. `source_version` (ISO timestamp, default now) is the
+    version of `text`: if the stored analysis is newer it is kept and returned instead.
+    """
+    supabase = get_supabase_client()
+    sentiment_score = (await sentiment.score_texts([text]))[0]
+
+    result = await run_query(supabase.rpc("upsert_emotion_analysis", {
+        "p_user_id": user_id,
+        "p_source_type": source_type,
+        "p_source_id": source_id,
+        "p_source_version": source_version or datetime.now(timezone.utc).isoformat(),
+        "p_sentiment_score": sentiment_score,
+        "p_emotions": emotion_result["emotions"],
+        "p_primary_emotion": emotion_result["primary_emotion"],
+    }))
+
+    stored = result.data or {}
+    if not stored.get("analysis"):
         raise Exception("Failed to store emotion analysis")
+    if not stored.get("applied"):
+        _store_stats["stale_skipped"] += 1
+        print(f"Kept newer emotion analysis for {source_type} {source_id}; discarded a stale result")
+    return stored["analysis"]
+
 
-    return result.data[0]
+def get_store_stats() -> dict:
+    """Analyses run, requests coalesced into a newer one, and stale results discarded."""
+    return {**_store_stats, "in_flight": len(_inflight)}
 
 
 async def get_analysis_for_source(source_type: str, source_id: str) -> Optional[dict]:
     """Get emotion analysis for a specific journal entry or chat session."""
     supabase = get_supabase_client()
-    result = (
+    result = await run_query(
         supabase.table("emotion_analyses")
         .select("*")
         .eq("source_type", source_type)
         .eq("source_id", source_id)
-        .execute()
     )
     return result.data[0] if result.data else None
 
 
-async def get_user_emotion_history(user_id: str, limit: int = 30) -> list[dict]:
+async def get_user_emotion_history(user_id: str, limit: int = 30, view: str = "full") -> list[dict]:
     """Get recent emotion analyses for a user, for trends/visualization."""
     supabase = get_supabase_client()
-    result = (
+    result = await run_query(
         supabase.table("emotion_analyses")
-        .select("*")
+        .select(EMOTION_VIEW_COLUMNS[view])
         .eq("user_id", user_id)
         .order("created_at", desc=True)
         .limit(limit)
-        .execute()
     )
     return result.data or []
@@ -0,0 +1,167 @@
+# [FILENAME: app/services/export_service.py]
+# [PURPOSE: Streaming bulk export of a user's full history as NDJSON or CSV (optionally gzipped)]
+# [DEPENDENCIES: app.models.database, app.utils.pagination]
+# [PHASE: Data Export]
+
+import csv
+import io
+import json
+import zlib
+from typing import Any, AsyncIterator, Callable, Optional
+
+from app.models.database import get_supabase_client, run_query
+from app.utils.pagination import apply_keyset, encode_cursor
+
+# Rows fetched per round trip. Only one page is held in memory at a time, so worker
+# memory stays flat however long the user's history is.
+EXPORT_PAGE_SIZE = 500
+# Session ids per chat_messages `in` filter. The ids go in the GET query string
+# (~37 bytes each), so 50 keeps the URL under ~2 KB, well inside gateway limits.
+EXPORT_SESSION_CHUNK = 50
+
+# Exportable resources, in the order they are streamed, with their columns.
+# The column lists double as the CSV header.
+EXPORT_COLUMNS = {
+    "journal_entries": [
+        "id", "title", "content", "emotion_tag", "ai_multi_tags",
+        "detailed_sentiment_report", "word_count", "created_at", "updated_at",
+    ],
+    "chat_sessions": [
+        "id", "mode", "language", "saved", "started_at", "ended_at", "duration_s",
+    ],
+    "chat_messages": ["id", "session_id", "role", "content", "created_at"],
+    "emotion_analyses": [
+        "id", "source_type", "source_id", "sentiment_score", "emotions",
+        "primary_emotion", "created_at",
+    ],
+}
+
+EXPORT_FORMATS = ("ndjson", "csv")
+
+
+def parse_resources(include: Optional[str], fmt: str) -> list[str]:
+    """
+    Validate the `include` list (comma-separated, default: everything) against the
+    format. CSV has one header per file, so it takes exactly one resource.
+    Raises ValueError with a user-facing message.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+
+    if include:
+        resources = [name.strip() for name in include.split(",") if name.strip()]
+    else:
+        resources = list(EXPORT_COLUMNS)
+    unknown = [name for name in resources if name not in EXPORT_COLUMNS]
+    if unknown:
+        raise ValueError(
+            f"Unknown resource(s): {', '.join(unknown)}. "
+            f"Choose from: {', '.join(EXPORT_COLUMNS)}"
+        )
+    if fmt == "csv" and len(resources) != 1:
+        raise ValueError("CSV export needs exactly one resource in `include`")
+    # Stream in the canonical order whatever order they were requested in
+    return [name for name in EXPORT_COLUMNS if name in resources]
+
+
+async def _iter_pages(
+    build_query: Callable[[], Any], sort_column: str
+) -> AsyncIterator[list[dict]]:
+    """Walk a query oldest-first with keyset cursors, one page per round trip."""
+    cursor = None
+    while True:
+        query = apply_keyset(build_query(), cursor, sort_column, descending=False)
+        rows = (await run_query(query.limit(EXPORT_PAGE_SIZE))).data or []
+        if rows:
+            yield rows
+        if len(rows) < EXPORT_PAGE_SIZE:
+            return
+        last = rows[-1]
+        cursor = encode_cursor(last[sort_column], last["id"])
+
+
+def _owned_pages(user_id: str, table: str, columns: str, sort_column: str):
+    supabase = get_supabase_client()
+    return _iter_pages(
+        lambda: supabase.table(table).select(columns).eq("user_id", user_id),
+        sort_column,
+    )
+
+
+async def _iter_chat_messages(user_id: str) -> AsyncIterator[list[dict]]:
+    """
+    Messages carry no user_id: walk the user's sessions a page at a time and page
+    their messages, EXPORT_SESSION_CHUNK sessions per query.
+    """
+    supabase = get_supabase_client()
+    columns = ", ".join(EXPORT_COLUMNS["chat_messages"])
+    async for sessions in _owned_pages(user_id, "chat_sessions", "id, started_at", "started_at"):
+        for start in range(0, len(sessions), EXPORT_SESSION_CHUNK):
+            session_ids = [session["id"] for session in sessions[start:start + EXPORT_SESSION_CHUNK]]
+            async for rows in _iter_pages(
+                lambda: supabase.table("chat_messages").select(columns).in_("session_id", session_ids),
+                "created_at",
+            ):
+                yield rows
+
+
+def _iter_resource(user_id: str, resource: str) -> AsyncIterator[list[dict]]:
+    if resource == "chat_messages":
+        return _iter_chat_messages(user_id)
+    sort_column = "started_at" if resource == "chat_sessions" else "created_at"
+    return _owned_pages(user_id, resource, ", ".join(EXPORT_COLUMNS[resource]), sort_column)
+
+
+def _csv_value(value: Any) -> Any:
+    """JSON columns (tags, emotion maps) are written as JSON text inside the cell."""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+async def _iter_ndjson(user_id: str, resources: list[str]) -> AsyncIterator[bytes]:
+    for resource in resources:
+        async for rows in _iter_resource(user_id, resource):
+            yield "".join(
+                json.dumps({"type": resource, **row}, ensure_ascii=False) + "\n"
+                for row in rows
+            ).encode()
+
+
+async def _iter_csv(user_id: str, resource: str) -> AsyncIterator[bytes]:
+    columns = EXPORT_COLUMNS[resource]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for rows in _iter_resource(user_id, resource):
+        writer.writerows([_csv_value(row.get(column)) for column in columns] for row in rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # No rows at all: still emit the header
+        yield buffer.getvalue().encode()
+
+
+async def _gzip(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)  # 31 = gzip container
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def stream_export(
+    user_id: str, resources: list[str], fmt: str, gzip: bool = False
+) -> AsyncIterator[bytes]:
+    """
+    Byte stream of the export, for a StreamingResponse. `resources` and `fmt` must
+    already be validated with parse_resources(). NDJSON lines carry a "type" field
+    naming the resource they came from.
+    """
+    if fmt == "csv":
+        chunks = _iter_csv(user_id, resources[0])
+    else:
+        chunks = _iter_ndjson(user_id, resources)
+    return _gzip(chunks) if gzip else chunks
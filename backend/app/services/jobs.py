@@ -0,0 +1,290 @@
+# [FILENAME: app/services/jobs.py]
+# [PURPOSE: Durable job queue (public.jobs) for post-write AI work, with retries, backoff and dead-lettering]
+# [DEPENDENCIES: app.config, app.models.database, app.services.llm_telemetry]
+# [PHASE: Performance - Durable jobs]
+
+import asyncio
+import os
+import random
+import socket
+import time
+from typing import Awaitable, Callable, Optional
+
+from app.config import get_settings
+from app.models.database import get_supabase_client, run_query
+from app.services import llm_telemetry
+
+# Jobs live in Postgres, so they survive restarts and deploys and any API process
+# can run them. Each process runs one dispatcher that claims ready jobs (claim_jobs,
+# FOR UPDATE SKIP LOCKED) into its free slots. A claimed job holds a lease; if the
+# process dies mid-job the lease expires and another process claims it again
+# (unless that was its last attempt), so handlers must be safe to run more than
+# once. Failed or timed-out jobs are retried with exponential backoff and
+# dead-lettered after JOBS_MAX_ATTEMPTS.
+#
+# Handlers are registered per kind by the service that owns the work and get
+# (payload, last_attempt): on its last attempt a handler should store whatever
+# fallback result it has rather than fail.
+
+Handler = Callable[[dict, bool], Awaitable]
+
+# Rows per enqueue_jobs call
+ENQUEUE_BATCH_SIZE = 500
+# Claim order (lower first): work a user is waiting on ahead of bulk backfills
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 10
+# How long a queue depth snapshot is served before job_queue_stats runs again
+DEPTH_SNAPSHOT_TTL_S = 10.0
+# A handler is cancelled once this fraction of its lease has passed, so a live
+# worker always reports (and retries) a hung job before another process claims it
+HANDLER_LEASE_FRACTION = 0.8
+
+_handlers: dict[str, Handler] = {}
+_dispatcher: Optional[asyncio.Task] = None
+_running: set[asyncio.Task] = set()
+_wake: Optional[asyncio.Event] = None
+_rate_lock: Optional[asyncio.Lock] = None
+_next_start = 0.0
+_worker_id = f"{socket.gethostname()}:{os.getpid()}"
+_stats = {"enqueued": 0, "claim_errors": 0, "finish_errors": 0}
+_kind_stats: dict[str, dict] = {}
+_depth: dict = {"at": 0.0, "value": None}
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler for a job that can never succeed: it is dead-lettered without retries."""
+
+
+def register(kind: str, handler: Handler) -> None:
+    """Run jobs of `kind` with `handler(payload, last_attempt)`."""
+    _handlers[kind] = handler
+
+
+async def enqueue(
+    kind: str,
+    payload: dict,
+    key: Optional[str] = None,
+    delay_s: float = 0,
+    priority: int = PRIORITY_INTERACTIVE,
+) -> Optional[int]:
+    """
+    Queue one job and return its id. While a job with the same `key` is still
+    queued, enqueueing again only replaces its payload (and returns its id).
+    """
+    ids = await enqueue_many([
+        {"kind": kind, "payload": payload, "key": key, "delay_s": delay_s, "priority": priority}
+    ])
+    return ids[0] if ids else None
+
+
+async def enqueue_many(jobs: list[dict]) -> list[int]:
+    """
+    Queue {kind, payload, key?, delay_s?, priority?} jobs with one RPC per ENQUEUE_BATCH_SIZE.
+    A key repeated within the list keeps its last payload.
+    """
+    max_attempts = get_settings().jobs_max_attempts
+    unique: dict = {}
+    for i, job in enumerate(jobs):
+        unique[job.get("key") or ("", i)] = {
+            "kind": job["kind"],
+            "payload": job.get("payload") or {},
+            "key": job.get("key"),
+            "max_attempts": max_attempts,
+            "delay_s": job.get("delay_s", 0),
+            "priority": job.get("priority", PRIORITY_INTERACTIVE),
+        }
+    items = list(unique.values())
+
+    supabase = get_supabase_client()
+    ids: list[int] = []
+    for start in range(0, len(items), ENQUEUE_BATCH_SIZE):
+        result = await run_query(
+            supabase.rpc("enqueue_jobs", {"p_jobs": items[start:start + ENQUEUE_BATCH_SIZE]})
+        )
+        ids.extend(result.data or [])
+    _stats["enqueued"] += len(ids)
+    if _wake is not None and ids:
+        _wake.set()  # this process's dispatcher claims them without waiting for its next poll
+    return ids
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff after the `attempts`-th failure, capped, with jitter (50-100%)."""
+    settings = get_settings()
+    delay = min(settings.jobs_retry_base_s * 2 ** max(attempts - 1, 0), settings.jobs_retry_max_s)
+    return delay * random.uniform(0.5, 1.0)
+
+
+async def start_job_workers() -> None:
+    """Start this process's dispatcher (unless JOBS_ENABLED is off). Called from the app lifespan."""
+    global _dispatcher, _wake, _rate_lock
+
+    if _dispatcher is not None or not get_settings().jobs_enabled:
+        return
+    _wake = asyncio.Event()
+    _rate_lock = asyncio.Lock()
+    _dispatcher = asyncio.create_task(_dispatch())
+
+
+async def stop_job_workers() -> None:
+    """
+    Cancel the dispatcher and the jobs it is running. Interrupted jobs are claimed
+    again (by any process) once their lease expires. Called on application shutdown.
+    """
+    global _dispatcher, _wake, _rate_lock
+
+    tasks = ([_dispatcher] if _dispatcher is not None else []) + list(_running)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    _running.clear()
+    _dispatcher = None
+    _wake = None
+    _rate_lock = None
+
+
+async def _dispatch() -> None:
+    """Claim jobs into free slots, then sleep until a slot frees, a job is queued or the poll interval passes."""
+    settings = get_settings()
+    supabase = get_supabase_client()
+    while True:
+        _wake.clear()
+        free = settings.jobs_concurrency - len(_running)
+        if free > 0:
+            try:
+                result = await run_query(supabase.rpc("claim_jobs", {
+                    "p_worker": _worker_id,
+                    "p_limit": free,
+                    "p_lease_s": settings.jobs_lease_s,
+                }))
+                claimed = result.data or []
+            except Exception as e:
+                print(f"Job claim failed: {e}")
+                _stats["claim_errors"] += 1
+                claimed = []
+            for job in claimed:
+                task = asyncio.create_task(_run(job))
+                _running.add(task)
+                task.add_done_callback(_job_done)
+        try:
+            await asyncio.wait_for(_wake.wait(), settings.jobs_poll_interval_s)
+        except asyncio.TimeoutError:
+            pass
+
+
+def _job_done(task: asyncio.Task) -> None:
+    _running.discard(task)
+    if _wake is not None:
+        _wake.set()
+
+
+async def _throttle() -> None:
+    """Space job starts at least 1 / jobs_rate_per_s apart in this process."""
+    global _next_start
+
+    rate = get_settings().jobs_rate_per_s
+    if rate <= 0:
+        return
+    async with _rate_lock:
+        now = time.monotonic()
+        wait = _next_start - now
+        _next_start = max(now, _next_start) + 1 / rate
+    if wait > 0:
+        await asyncio.sleep(wait)
+
+
+def _kind(kind: str) -> dict:
+    return _kind_stats.setdefault(kind, {
+        "claimed": 0, "completed": 0, "retried": 0, "dead": 0, "superseded": 0,
+        "wait_s_total": 0.0, "wait_s_max": 0.0, "run_s_total": 0.0,
+    })
+
+
+async def _run(job: dict) -> None:
+    """Run one claimed job and record its outcome with finish_job."""
+    kind, payload = job["kind"], job.get("payload") or {}
+    stats = _kind(kind)
+    stats["claimed"] += 1
+    waited = float(job.get("waited_s") or 0)
+    stats["wait_s_total"] += waited
+    stats["wait_s_max"] = max(stats["wait_s_max"], waited)
+
+    lease_end = time.monotonic() + get_settings().jobs_lease_s * HANDLER_LEASE_FRACTION
+    await _throttle()
+    handler = _handlers.get(kind)
+    error, dead = None, False
+    started = time.perf_counter()
+    try:
+        if handler is None:
+            raise PermanentJobError(f"No handler registered for job kind {kind!r}")
+        with llm_telemetry.attributed(payload.get("user_id")):
+            await asyncio.wait_for(
+                handler(payload, job["attempts"] >= job["max_attempts"]),
+                max(lease_end - time.monotonic(), 0),
+            )
+    except PermanentJobError as e:
+        error, dead = str(e) or type(e).__name__, True
+    except asyncio.TimeoutError:
+        error = f"Timed out after {time.perf_counter() - started:.1f}s (lease {get_settings().jobs_lease_s}s)"
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    stats["run_s_total"] += time.perf_counter() - started
+
+    try:
+        result = await run_query(get_supabase_client().rpc("finish_job", {
+            "p_id": job["id"],
+            "p_error": error,
+            "p_retry_in_s": retry_delay(job["attempts"]) if error else 0,
+            "p_dead": dead,
+        }))
+    except Exception as e:
+        # The lease runs out and the job is claimed again
+        print(f"Could not record the outcome of job {job['id']} ({kind}): {e}")
+        _stats["finish_errors"] += 1
+        return
+
+    outcome = result.data
+    if outcome == "done":
+        stats["completed"] += 1
+    elif outcome == "retry":
+        stats["retried"] += 1
+        print(f"Job {job['id']} ({kind}) failed on attempt {job['attempts']}, retrying: {error}")
+    elif outcome == "dead":
+        stats["dead"] += 1
+        print(f"Job {job['id']} ({kind}) dead-lettered after {job['attempts']} attempt(s): {error}")
+    elif outcome == "superseded":
+        stats["superseded"] += 1
+
+
+async def _queue_depth() -> Optional[dict]:
+    """job_queue_stats snapshot, refreshed at most every DEPTH_SNAPSHOT_TTL_S."""
+    now = time.monotonic()
+    if _depth["value"] is None or now - _depth["at"] >= DEPTH_SNAPSHOT_TTL_S:
+        try:
+            result = await run_query(get_supabase_client().rpc("job_queue_stats", {}))
+            _depth["value"] = result.data
+        except Exception as e:
+            print(f"Could not read job queue depth: {e}")
+        _depth["at"] = now
+    return _depth["value"]
+
+
+async def get_job_stats() -> dict:
+    """Queue depth (all processes), this process's slots in use, and per-kind outcomes and latencies."""
+    kinds = {}
+    for kind, stats in _kind_stats.items():
+        claimed = stats["claimed"] or 1
+        kinds[kind] = {
+            **{key: stats[key] for key in ("claimed", "completed", "retried", "dead", "superseded")},
+            "avg_wait_s": round(stats["wait_s_total"] / claimed, 3),
+            "max_wait_s": round(stats["wait_s_max"], 3),
+            "avg_run_s": round(stats["run_s_total"] / claimed, 3),
+        }
+    return {
+        "running": _dispatcher is not None,
+        "worker": _worker_id,
+        "in_flight": len(_running),
+        "queue": await _queue_depth() if get_settings().supabase_url else None,
+        **_stats,
+        "kinds": kinds,
+    }
@@ -4,46 +4,234 @@
 # [PHASE: Phase 3 - Core Journaling]
 
 from typing import Optional
-from app.models.database import get_supabase_client
-from app.services.ai_client import get_groq_client
+from app.config import get_settings
+from app.models import postgres
+from app.models.database import get_supabase_client, run_query
+from app.services import cache, emotion_classifier, emotion_service, jobs, llm_telemetry
+from app.services.batcher import MicroBatcher
+from app.services.model_router import model_for, routed_completion
+from app.utils.pagination import apply_keyset, next_cursor
+import csv
+import io
 import json
 
-async def _generate_journal_analysis(content: str) -> dict:
-    """Uses Groq to generate ai_multi_tags and a detailed_sentiment_report."""
-    try:
-        client = _get_groq_client()
-        prompt = (
-            "You are an empathetic psychological analyzer. Read the following journal entry "
-            "and provide two things:\n"
-            "1. 'ai_multi_tags': An array of 1 to 4 nuanced emotion tags (e.g., ['Joyful', 'Nostalgic', 'Anxious']).\n"
-            "2. 'detailed_sentiment_report': A 2-3 sentence narrative summarizing the emotional arc of the entry in the second person (e.g., 'You started the day feeling anxious, but found peace by the evening.').\n"
-            "Respond ONLY with a valid JSON object containing these two exact keys and nothing else."
+# Column projections for journal reads (`view` query parameter).
+# The summary view ships the server-generated content_excerpt column (see migration.sql)
+# instead of the full text and sentiment report — roughly 10x smaller for list pages.
+JOURNAL_VIEW_COLUMNS = {
+    "full": (
+        "id, user_id, title, content, emotion_tag, ai_multi_tags, "
+        "detailed_sentiment_report, analysis_status, word_count, created_at, updated_at"
+    ),
+    "summary": (
+        "id, user_id, title, content_excerpt, emotion_tag, ai_multi_tags, "
+        "analysis_status, word_count, created_at, updated_at"
+    ),
+}
+
+# Bulk import: rows per multi-row INSERT, and the most entries one request may carry
+IMPORT_BATCH_SIZE = 200
+IMPORT_MAX_ENTRIES = 5000
+
+
+# One structured call covers both the entry's tags/report and its emotion_analyses row
+JOURNAL_ANALYSIS_PROMPT = (
+    "You are an empathetic psychological analyzer. Read the following journal entry "
+    "and provide four things:\n"
+    "1. 'ai_multi_tags': An array of 1 to 4 nuanced emotion tags (e.g., ['Joyful', 'Nostalgic', 'Anxious']).\n"
+    "2. 'detailed_sentiment_report': A 2-3 sentence narrative summarizing the emotional arc of the entry in the second person (e.g., 'You started the day feeling anxious, but found peace by the evening.').\n"
+    "3. 'emotions': An object mapping emotion names to confidence scores (0.0-1.0). "
+    f"Use ONLY these emotions: {', '.join(emotion_service.EMOTION_LIST)}. "
+    "Include only emotions with confidence > 0.1.\n"
+    "4. 'primary_emotion': The single most dominant emotion from that same list.\n"
+    "Respond ONLY with a valid JSON object containing these four exact keys and nothing else."
+)
+# Batched variant: several entries in one call, results matched back by id
+JOURNAL_ANALYSIS_BATCH_PROMPT = (
+    "You are an empathetic psychological analyzer. The user message is a JSON array of "
+    'objects {"id": ..., "text": ...}, each a journal entry. Analyze each entry independently '
+    'and respond ONLY with a valid JSON object {"results": [...]} with one entry per input, '
+    "each with exactly five keys:\n"
+    "1. 'id': the id of the input it belongs to.\n"
+    "2. 'ai_multi_tags': An array of 1 to 4 nuanced emotion tags (e.g., ['Joyful', 'Nostalgic', 'Anxious']).\n"
+    "3. 'detailed_sentiment_report': A 2-3 sentence narrative summarizing the emotional arc of the entry in the second person.\n"
+    "4. 'emotions': An object mapping emotion names to confidence scores (0.0-1.0). "
+    f"Use ONLY these emotions: {', '.join(emotion_service.EMOTION_LIST)}. "
+    "Include only emotions with confidence > 0.1.\n"
+    "5. 'primary_emotion': The single most dominant emotion from that same list."
+)
+# Output budget per entry in a batched call (a single call gets 400)
+JOURNAL_ANALYSIS_BATCH_ITEM_TOKENS = 350
+# Cache key component: changes whenever the prompts or sampling parameters change
+JOURNAL_ANALYSIS_VERSION = cache.prompt_version(
+    JOURNAL_ANALYSIS_PROMPT, JOURNAL_ANALYSIS_BATCH_PROMPT, 0.3, 400, JOURNAL_ANALYSIS_BATCH_ITEM_TOKENS
+)
+
+# Columns of the unified analysis that live on journal_entries (the rest go to emotion_analyses)
+ENTRY_ANALYSIS_FIELDS = ("ai_multi_tags", "detailed_sentiment_report")
+
+# journal_entries.analysis_status: entries are saved first and analyzed by a
+# "journal.analyze" job: pending (queued) → running → done, or failed when the
+# LLM never answered (the fallback analysis is stored) or the job was dead-lettered
+ANALYSIS_PENDING, ANALYSIS_RUNNING, ANALYSIS_DONE, ANALYSIS_FAILED = "pending", "running", "done", "failed"
+
+
+async def _call_journal_analysis(text: str) -> dict:
+    """One Groq call for tags, report and emotions. Raises on any failure (nothing gets cached)."""
+    response = await routed_completion(
+        "tags",
+        messages=[
+            {"role": "system", "content": JOURNAL_ANALYSIS_PROMPT},
+            {"role": "user", "content": text}
+        ],
+        temperature=0.3,
+        max_tokens=400,
+        response_format={"type": "json_object"}
+    )
+
+    _record_usage(response)
+    raw = response.choices[0].message.content.strip()
+    return _journal_analysis_result(json.loads(raw))
+
+
+def _record_usage(response) -> None:
+    _journal_batcher.add_tokens(getattr(getattr(response, "usage", None), "total_tokens", None))
+
+
+def _journal_analysis_result(result: dict) -> dict:
+    return {
+        "ai_multi_tags": result.get("ai_multi_tags", []),
+        "detailed_sentiment_report": result.get("detailed_sentiment_report", "Unable to generate report."),
+        **emotion_service.normalize_emotion_result(result.get("emotions"), result.get("primary_emotion")),
+    }
+
+
+async def _analyze_journal_batch(items: list[tuple[str, Optional[str]]]) -> list:
+    """
+    Micro-batch handler for (text, user_id) items: a batch of one uses the
+    single-entry prompt; larger batches go out as one call with per-item ids, its
+    token usage split across the items' users. Items missing from the reply fail alone.
+    """
+    texts = [text for text, _ in items]
+    with llm_telemetry.attributed(tuple(user for _, user in items)):
+        if len(texts) == 1:
+            return [await _call_journal_analysis(texts[0])]
+
+        payload = json.dumps(
+            [{"id": str(i), "text": text} for i, text in enumerate(texts)], ensure_ascii=False
         )
-        
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
+        response = await routed_completion(
+            "tags",
             messages=[
-                {"role": "system", "content": prompt},
-                {"role": "user", "content": content[:2000]}
+                {"role": "system", "content": JOURNAL_ANALYSIS_BATCH_PROMPT},
+                {"role": "user", "content": payload},
             ],
             temperature=0.3,
-            max_tokens=250,
-            response_format={"type": "json_object"}
+            max_tokens=JOURNAL_ANALYSIS_BATCH_ITEM_TOKENS * len(texts) + 50,
+            response_format={"type": "json_object"},
+        )
+    _record_usage(response)
+
+    results = json.loads(response.choices[0].message.content.strip()).get("results") or []
+    by_id = {str(r.get("id")): r for r in results if isinstance(r, dict)}
+    return [
+        _journal_analysis_result(by_id[str(i)])
+        if str(i) in by_id
+        else ValueError(f"Batched journal analysis reply is missing item {i}")
+        for i in range(len(texts))
+    ]
+
+
+# Analyses run as "journal.analyze" jobs (one per saved or imported entry), so an
+# import or a burst of saves reaches the LLM as a few batched calls
+_journal_batcher = MicroBatcher(
+    "journal_analysis",
+    _analyze_journal_batch,
+    max_items=lambda: get_settings().journal_batch_max_items,
+    max_wait_ms=lambda: get_settings().journal_batch_max_wait_ms,
+)
+
+
+async def _generate_journal_analysis(content: str, strict: bool = False) -> dict:
+    """
+    Uses Groq to generate, in one call, ai_multi_tags, a detailed_sentiment_report,
+    the emotion confidences and the primary emotion.
+    Results are cached by content, so unchanged text (edits that keep the content,
+    retries, re-saved chat summaries) never pays for a second call; cache misses
+    arriving close together share one batched call.
+    With `strict`, a failed call raises instead of returning the fallback analysis.
+    """
+    text = content[:2000]
+    try:
+        return await cache.content_cached(
+            "llm:journal_analysis",
+            model_for("tags"),
+            JOURNAL_ANALYSIS_VERSION,
+            text,
+            lambda: _journal_batcher.submit((text, llm_telemetry.current_user())),
         )
-        
-        raw = response.choices[0].message.content.strip()
-        result = json.loads(raw)
-        return {
-            "ai_multi_tags": result.get("ai_multi_tags", []),
-            "detailed_sentiment_report": result.get("detailed_sentiment_report", "Unable to generate report.")
-        }
     except Exception as e:
+        if strict:
+            raise
         print(f"Error generating journal analysis: {e}")
-        return {"ai_multi_tags": [], "detailed_sentiment_report": None}
+        return _fallback_journal_analysis(content)
+
+
+def _fallback_journal_analysis(content: str) -> dict:
+    """No tags or report; emotions from the local classifier's best guess, then TextBlob."""
+    return {
+        "ai_multi_tags": [],
+        "detailed_sentiment_report": None,
+        **(emotion_classifier.best_guess(content[:2000]) or emotion_service._fallback_analysis(content)),
+    }
+
+
+async def _set_analysis_status(
+    user_id: str, entry_id: str, status: str, source_version: Optional[str] = None
+) -> bool:
+    """
+    Set an entry's analysis_status. With `source_version`, only if the entry hasn't
+    been edited since (a newer edit owns the status). Returns whether a row changed.
+    """
+    supabase = get_supabase_client()
+    query = (
+        supabase.table("journal_entries")
+        .update({"analysis_status": status})
+        .eq("id", entry_id)
+        .eq("user_id", user_id)
+    )
+    if source_version is not None:
+        query = query.eq("updated_at", source_version)
+    result = await run_query(query)
+    if not result.data:
+        return False
+    await cache.invalidate_user(user_id)
+    return True
+
+
+async def _queue_entry_write_analysis(user_id: str, entry: dict) -> dict:
+    """
+    Queue the analysis of a just-written entry. If the queue is unreachable the
+    entry is kept and marked failed rather than left pending forever.
+    """
+    try:
+        await queue_entry_analysis(user_id, [entry])
+    except Exception as e:
+        print(f"Failed to queue analysis for entry {entry['id']}: {e}")
+        try:
+            await _set_analysis_status(user_id, entry["id"], ANALYSIS_FAILED, entry.get("updated_at"))
+        except Exception as e:
+            print(f"Failed to mark analysis of entry {entry['id']} as failed: {e}")
+        return {**entry, "analysis_status": ANALYSIS_FAILED}
+    return entry
 
 
 async def create_entry(user_id: str, title: Optional[str], content: str, emotion_tag: Optional[str] = None) -> dict:
-    """Create a new journal entry and return the created record."""
+    """
+    Create a new journal entry and return the created record.
+    The entry is saved with analysis_status "pending"; tags, report and emotions
+    are filled in by a queued "journal.analyze" job.
+    """
     supabase = get_supabase_client()
     word_count = len(content.split())
 
@@ -51,51 +239,96 @@ async def create_entry(user_id: str, title: Optional[str], content: str, emotion
         "user_id": user_id,
         "content": content,
         "word_count": word_count,
+        "analysis_status": ANALYSIS_PENDING,
     }
     if title is not None:
         data["title"] = title
     if emotion_tag is not None:
         data["emotion_tag"] = emotion_tag
 
-    # Generate AI insights
-    analysis = await _generate_journal_analysis(content)
-    data["ai_multi_tags"] = analysis["ai_multi_tags"]
-    data["detailed_sentiment_report"] = analysis["detailed_sentiment_report"]
-
-    result = supabase.table("journal_entries").insert(data).execute()
+    result = await run_query(supabase.table("journal_entries").insert(data))
 
     if not result.data:
         raise Exception("Failed to create journal entry")
 
-    return result.data[0]
+    await cache.invalidate_user(user_id)
+    return await _queue_entry_write_analysis(user_id, result.data[0])
+
+
+async def create_session_entry(user_id: str, session_id: str, title: str, content: str) -> Optional[dict]:
+    """
+    Create the journal entry for a chat session and mark the session saved, in one
+    transaction (save_session_journal). Returns None if the session was already
+    saved, so conversion retries never write a second entry.
+    """
+    supabase = get_supabase_client()
+    result = await run_query(supabase.rpc("save_session_journal", {
+        "p_user_id": user_id,
+        "p_session_id": session_id,
+        "p_title": title,
+        "p_content": content,
+        "p_word_count": len(content.split()),
+    }))
+    if not result.data:
+        return None
 
+    await cache.invalidate_user(user_id)
+    return await _queue_entry_write_analysis(user_id, result.data)
 
-async def get_entries(user_id: str, limit: int = 20, offset: int = 0) -> list[dict]:
+
+@cache.user_cached("journal:list")
+async def get_entries(
+    user_id: str, limit: int = 20, offset: int = 0, view: str = "full"
+) -> list[dict]:
     """List journal entries for a user, newest first."""
+    columns = JOURNAL_VIEW_COLUMNS[view]
+    if postgres.is_enabled():
+        return await postgres.fetch_journal_entries(user_id, limit, offset, columns)
+
     supabase = get_supabase_client()
 
-    result = (
+    result = await run_query(
         supabase.table("journal_entries")
-        .select("*")
+        .select(columns)
         .eq("user_id", user_id)
         .order("created_at", desc=True)
         .range(offset, offset + limit - 1)
-        .execute()
     )
 
     return result.data or []
 
 
-async def get_entry(user_id: str, entry_id: str) -> Optional[dict]:
+async def get_entries_page(
+    user_id: str, limit: int = 20, cursor: Optional[str] = None, view: str = "full"
+) -> dict:
+    """
+    Keyset-paginated journal list, newest first.
+    Returns {"entries": [...], "next_cursor": str | None}; pass next_cursor back to get the
+    following page. Cost stays flat however deep the page, unlike offset paging.
+    Raises ValueError for a malformed cursor.
+    """
+    columns = JOURNAL_VIEW_COLUMNS[view]
+    if postgres.is_enabled():
+        rows = await postgres.fetch_journal_page(user_id, limit + 1, cursor, columns)
+    else:
+        supabase = get_supabase_client()
+        query = supabase.table("journal_entries").select(columns).eq("user_id", user_id)
+        result = await run_query(apply_keyset(query, cursor).limit(limit + 1))
+        rows = result.data or []
+
+    return {"entries": rows[:limit], "next_cursor": next_cursor(rows, limit)}
+
+
+@cache.user_cached("journal:entry")
+async def get_entry(user_id: str, entry_id: str, view: str = "full") -> Optional[dict]:
     """Get a single journal entry. Returns None if not found or not owned by user."""
     supabase = get_supabase_client()
 
-    result = (
+    result = await run_query(
         supabase.table("journal_entries")
-        .select("*")
+        .select(JOURNAL_VIEW_COLUMNS[view])
         .eq("id", entry_id)
         .eq("user_id", user_id)
-        .execute()
     )
 
     if not result.data:
@@ -111,7 +344,10 @@ async def update_entry(
     content: Optional[str] = None,
     emotion_tag: Optional[str] = None,
 ) -> Optional[dict]:
-    """Update a journal entry. Returns updated record or None if not found."""
+    """
+    Update a journal entry. Returns updated record or None if not found.
+    A content change resets analysis_status to "pending" and queues a new analysis.
+    """
     supabase = get_supabase_client()
 
     updates: dict = {}
@@ -123,55 +359,253 @@ async def update_entry(
     if emotion_tag is not None:
         updates["emotion_tag"] = emotion_tag
 
-    # Re-analyze if content changed
+    # Re-analyze (asynchronously) if content changed
     if content is not None:
-        analysis = await _generate_journal_analysis(content)
-        updates["ai_multi_tags"] = analysis["ai_multi_tags"]
-        updates["detailed_sentiment_report"] = analysis["detailed_sentiment_report"]
+        updates["analysis_status"] = ANALYSIS_PENDING
 
     if not updates:
         return await get_entry(user_id, entry_id)
 
     updates["updated_at"] = "now()"
 
-    result = (
+    result = await run_query(
         supabase.table("journal_entries")
         .update(updates)
         .eq("id", entry_id)
         .eq("user_id", user_id)
-        .execute()
     )
 
     if not result.data:
         return None
 
-    return result.data[0]
+    entry = result.data[0]
+    await cache.invalidate_user(user_id)
+    if content is not None:
+        # Same job key as the previous version's: a still-queued job is replaced
+        entry = await _queue_entry_write_analysis(user_id, entry)
+    return entry
 
 
 async def delete_entry(user_id: str, entry_id: str) -> bool:
     """Delete a journal entry. Returns True if deleted."""
     supabase = get_supabase_client()
 
-    result = (
+    result = await run_query(
         supabase.table("journal_entries")
         .delete()
         .eq("id", entry_id)
         .eq("user_id", user_id)
-        .execute()
     )
 
+    if result.data:
+        await cache.invalidate_user(user_id)
     return bool(result.data)
 
 
+@cache.user_cached("journal:count")
 async def get_entry_count(user_id: str) -> int:
     """Get total count of journal entries for a user."""
     supabase = get_supabase_client()
 
-    result = (
+    result = await run_query(
         supabase.table("journal_entries")
         .select("id", count="exact")
         .eq("user_id", user_id)
-        .execute()
     )
 
     return result.count or 0
+
+
+def parse_import_file(data: bytes, filename: str) -> list[dict]:
+    """
+    Parse an uploaded import file into raw entry dicts (validated by the caller).
+    Accepts a JSON array (or {"entries": [...]}), NDJSON (.ndjson / .jsonl) and CSV
+    with title / content / emotion_tag / created_at columns. Files produced by
+    GET /api/export round-trip: NDJSON lines for other resources are skipped.
+    Raises ValueError if the file can't be parsed.
+    """
+    try:
+        text = data.decode("utf-8-sig")
+        name = (filename or "").lower()
+        if name.endswith(".csv"):
+            # Empty cells mean "not set", not an empty string
+            items = [
+                {key: value for key, value in row.items() if value not in ("", None)}
+                for row in csv.DictReader(io.StringIO(text))
+            ]
+        elif name.endswith((".ndjson", ".jsonl")):
+            items = [json.loads(line) for line in text.splitlines() if line.strip()]
+        else:
+            items = json.loads(text)
+            if isinstance(items, dict):
+                items = items.get("entries")
+    except (UnicodeDecodeError, json.JSONDecodeError, csv.Error) as e:
+        raise ValueError(f"Could not parse import file: {e}") from e
+
+    if not isinstance(items, list):
+        raise ValueError("Import must be a JSON array of entries or an object with an 'entries' array")
+    return [
+        item for item in items
+        if not (isinstance(item, dict) and item.get("type", "journal_entries") != "journal_entries")
+    ]
+
+
+async def import_entries(user_id: str, entries: list[dict]) -> dict:
+    """
+    Insert already-validated entries with multi-row INSERTs of IMPORT_BATCH_SIZE,
+    queueing each batch's analysis (bulk priority) as soon as it is inserted, so a
+    later failed batch never strands earlier ones as pending. Original created_at
+    timestamps are preserved. No AI work happens here.
+    Returns {"imported", "queued_for_analysis"}.
+    """
+    supabase = get_supabase_client()
+    imported = queued = 0
+
+    try:
+        for start in range(0, len(entries), IMPORT_BATCH_SIZE):
+            rows = []
+            for entry in entries[start:start + IMPORT_BATCH_SIZE]:
+                row = {
+                    "user_id": user_id,
+                    "title": entry.get("title"),
+                    "content": entry["content"],
+                    "emotion_tag": entry.get("emotion_tag"),
+                    "word_count": len(entry["content"].split()),
+                }
+                if entry.get("created_at") is not None:
+                    row["created_at"] = entry["created_at"].isoformat()
+                    row["updated_at"] = row["created_at"]
+                rows.append(row)
+
+            # default_to_null=False: rows without created_at get the column default (now())
+            # instead of NULL when other rows in the batch do carry one
+            result = await run_query(
+                supabase.table("journal_entries")
+                .insert(rows, default_to_null=False)
+                .select("id, content, updated_at")
+            )
+            if not result.data:
+                raise Exception(f"Failed to import journal entries ({imported} of {len(entries)} imported)")
+            imported += len(result.data)
+            queued += await _queue_import_analysis(user_id, result.data)
+    finally:
+        if imported:
+            await cache.invalidate_user(user_id)
+    return {"imported": imported, "queued_for_analysis": queued}
+
+
+async def _queue_import_analysis(user_id: str, rows: list[dict]) -> int:
+    """
+    Queue the analysis of one inserted import batch. If the queue is unreachable
+    the rows are marked failed rather than left pending forever.
+    """
+    try:
+        return await queue_entry_analysis(user_id, rows, jobs.PRIORITY_BULK)
+    except Exception as e:
+        print(f"Failed to queue analysis for {len(rows)} imported entries: {e}")
+    try:
+        await run_query(
+            get_supabase_client().table("journal_entries")
+            .update({"analysis_status": ANALYSIS_FAILED})
+            .eq("user_id", user_id)
+            .in_("id", [row["id"] for row in rows])
+        )
+    except Exception as e:
+        print(f"Failed to mark analysis of {len(rows)} imported entries as failed: {e}")
+    return 0
+
+
+async def analyze_entry(
+    user_id: str,
+    entry_id: str,
+    content: str,
+    source_version: Optional[str] = None,
+    strict: bool = False,
+) -> None:
+    """
+    AI work for an entry saved without it (create, update, bulk import): one unified
+    analysis, written to the entry (tags + report) and to emotion_analyses, moving
+    analysis_status from running to done (failed if the fallback had to be stored).
+    With `source_version` (the entry's updated_at when it was queued) nothing is
+    written if the entry has been edited since: its own analysis is newer.
+    With `strict`, an LLM failure raises instead of storing the fallback analysis.
+    """
+    if not await _set_analysis_status(user_id, entry_id, ANALYSIS_RUNNING, source_version):
+        print(f"Entry {entry_id} changed or was deleted since it was queued; skipping its analysis")
+        return
+
+    try:
+        analysis, status = await _generate_journal_analysis(content, strict=True), ANALYSIS_DONE
+    except Exception as e:
+        if strict:
+            raise
+        print(f"Error generating journal analysis: {e}")
+        analysis, status = _fallback_journal_analysis(content), ANALYSIS_FAILED
+
+    supabase = get_supabase_client()
+    query = (
+        supabase.table("journal_entries")
+        .update({**{field: analysis[field] for field in ENTRY_ANALYSIS_FIELDS}, "analysis_status": status})
+        .eq("id", entry_id)
+        .eq("user_id", user_id)
+    )
+    if source_version is not None:
+        query = query.eq("updated_at", source_version)
+    result = await run_query(query)
+    if source_version is not None and not result.data:
+        print(f"Entry {entry_id} changed since it was queued; skipping its stale analysis")
+        return
+    await emotion_service.store_analysis(
+        user_id, "journal", entry_id, content, analysis, source_version=source_version
+    )
+    await cache.invalidate_user(user_id)
+
+
+async def queue_entry_analysis(
+    user_id: str, rows: list[dict], priority: int = jobs.PRIORITY_INTERACTIVE
+) -> int:
+    """Queue a "journal.analyze" job per entry row (id, content, updated_at); returns how many were queued."""
+    ids = await jobs.enqueue_many([
+        {
+            "kind": "journal.analyze",
+            "key": f"journal-analysis:{row['id']}",
+            "priority": priority,
+            "payload": {
+                "user_id": user_id,
+                "entry_id": row["id"],
+                "content": row["content"],
+                "source_version": row.get("updated_at"),
+            },
+        }
+        for row in rows
+    ])
+    return len(ids)
+
+
+async def _analyze_entry_job(payload: dict, last_attempt: bool) -> None:
+    """
+    LLM failures are retried; the last attempt stores the fallback analysis instead.
+    A failed attempt leaves the entry pending (retry queued) or failed (dead-lettered).
+    """
+    try:
+        await analyze_entry(
+            payload["user_id"],
+            payload["entry_id"],
+            payload["content"],
+            payload.get("source_version"),
+            strict=not last_attempt,
+        )
+    except Exception:
+        try:
+            await _set_analysis_status(
+                payload["user_id"],
+                payload["entry_id"],
+                ANALYSIS_FAILED if last_attempt else ANALYSIS_PENDING,
+                payload.get("source_version"),
+            )
+        except Exception as e:
+            print(f"Failed to reset analysis status of entry {payload['entry_id']}: {e}")
+        raise
+
+
+jobs.register("journal.analyze", _analyze_entry_job)
@@ -0,0 +1,160 @@
+# [FILENAME: app/services/llm_telemetry.py]
+# [PURPOSE: Per-call LLM telemetry: tokens, latency and estimated cost by task, model and user]
+# [DEPENDENCIES: none]
+# [PHASE: Performance - LLM telemetry]
+
+import json
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date, datetime, timezone
+from typing import Any, Iterator, Optional, Union
+
+# Who an LLM call is attributed to. Set from the auth dependency for request paths;
+# background jobs inherit the context of the request that queued them. A tuple
+# splits a shared (batched) call evenly across several users.
+_user: ContextVar[Union[str, tuple, None]] = ContextVar("llm_user", default=None)
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+# USD per million (prompt, completion) tokens, for cost attribution. Models not
+# listed are counted in tokens only.
+MODEL_PRICES_PER_M = {
+    "llama-3.3-70b-versatile": (0.59, 0.79),
+    "llama-3.1-8b-instant": (0.05, 0.08),
+}
+
+_by_task: dict[tuple[str, str], dict] = {}
+_daily: dict[str, Any] = {"date": None, "users": {}}
+
+
+def set_user(user_id: Optional[str]) -> None:
+    """Attribute LLM calls made from the current context to `user_id`."""
+    _user.set(user_id)
+
+
+def current_user() -> Optional[str]:
+    user = _user.get()
+    return user if isinstance(user, str) else None
+
+
+@contextmanager
+def attributed(users: Union[str, tuple, None]) -> Iterator[None]:
+    """Attribute the calls inside the block to `users` (a tuple splits them evenly)."""
+    token = _user.set(users)
+    try:
+        yield
+    finally:
+        _user.reset(token)
+
+
+def _tokens(usage: Any, field: str) -> int:
+    value = getattr(usage, field, None)
+    return value if isinstance(value, int) else 0
+
+
+def _cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    prices = MODEL_PRICES_PER_M.get(model)
+    if not prices:
+        return 0.0
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+
+
+def _roll_day(today: date) -> None:
+    """Log yesterday's per-user roll-up (one line per user) when the UTC day changes."""
+    if _daily["date"] is not None and _daily["date"] != today:
+        flush_daily_rollup()
+    _daily["date"] = today
+
+
+def record(
+    task: str,
+    model: Optional[str],
+    latency_ms: float,
+    usage: Any = None,
+    error: bool = False,
+) -> None:
+    """Record one LLM call (called by ai_client for every call, successful or not)."""
+    model = model or "unknown"
+    prompt_tokens = _tokens(usage, "prompt_tokens")
+    completion_tokens = _tokens(usage, "completion_tokens")
+    cost = _cost(model, prompt_tokens, completion_tokens)
+
+    stats = _by_task.setdefault((task, model), {
+        "calls": 0, "errors": 0, "prompt_tokens": 0, "completion_tokens": 0,
+        "cost_usd": 0.0, "latency_ms_sum": 0.0,
+        "latency_ms_buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+    })
+    stats["calls"] += 1
+    stats["errors"] += int(error)
+    stats["prompt_tokens"] += prompt_tokens
+    stats["completion_tokens"] += completion_tokens
+    stats["cost_usd"] += cost
+    stats["latency_ms_sum"] += latency_ms
+    bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if latency_ms <= bound), len(LATENCY_BUCKETS_MS))
+    stats["latency_ms_buckets"][bucket] += 1
+
+    _roll_day(datetime.now(timezone.utc).date())
+    users = _user.get() or ("anonymous",)
+    if isinstance(users, str):
+        users = (users,)
+    share = 1 / len(users)
+    for user in users:
+        day = _daily["users"].setdefault(user or "anonymous", {
+            "calls": 0.0, "prompt_tokens": 0.0, "completion_tokens": 0.0, "cost_usd": 0.0,
+        })
+        day["calls"] += share
+        day["prompt_tokens"] += prompt_tokens * share
+        day["completion_tokens"] += completion_tokens * share
+        day["cost_usd"] += cost * share
+
+
+def _rounded(day: dict) -> dict:
+    return {
+        "calls": round(day["calls"], 2),
+        "prompt_tokens": round(day["prompt_tokens"]),
+        "completion_tokens": round(day["completion_tokens"]),
+        "cost_usd": round(day["cost_usd"], 6),
+    }
+
+
+def _by_tokens(users: dict) -> list[tuple[str, dict]]:
+    return sorted(
+        users.items(), key=lambda item: item[1]["prompt_tokens"] + item[1]["completion_tokens"], reverse=True
+    )
+
+
+def flush_daily_rollup() -> None:
+    """Log the current day's per-user usage and start a new roll-up (also called on shutdown)."""
+    day = _daily["date"]
+    for user, usage in _by_tokens(_daily["users"]):
+        print(json.dumps({"event": "llm_daily_usage", "date": str(day), "user_id": user, **_rounded(usage)}))
+    _daily["users"] = {}
+
+
+def get_telemetry_stats() -> dict:
+    """
+    Counters and latency histograms per task/model, plus today's totals. Per-user
+    usage is never exposed here, only logged by flush_daily_rollup().
+    """
+    tasks = {}
+    for (task, model), stats in sorted(_by_task.items()):
+        tasks[f"{task}:{model}"] = {
+            **stats,
+            "cost_usd": round(stats["cost_usd"], 6),
+            "avg_latency_ms": round(stats["latency_ms_sum"] / stats["calls"], 1),
+            "latency_ms_sum": round(stats["latency_ms_sum"], 1),
+        }
+    totals = {"calls": 0.0, "prompt_tokens": 0.0, "completion_tokens": 0.0, "cost_usd": 0.0}
+    for usage in _daily["users"].values():
+        for key in totals:
+            totals[key] += usage[key]
+    return {
+        "latency_buckets_ms": list(LATENCY_BUCKETS_MS),
+        "tasks": tasks,
+        "today": {
+            "date": str(_daily["date"]) if _daily["date"] else None,
+            "users": len(_daily["users"]),
+            **_rounded(totals),
+        },
+    }
@@ -0,0 +1,209 @@
+# [FILENAME: app/services/model_router.py]
+# [PURPOSE: Map each LLM task to a model tier with its own latency budget and fallback tier]
+# [DEPENDENCIES: app.config, app.services.ai_client, app.services.resilience]
+# [PHASE: Performance - Model routing]
+
+import asyncio
+import time
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Optional
+
+from app.config import get_settings
+from app.services.ai_client import chat_completion, stream_chat_completion
+from app.services.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    get_hedge_stats,
+    hedged,
+)
+
+# Every LLM call names one of these tasks; LLM_TASK_TIERS says which tier serves it
+TASKS = ("chat", "title", "tags", "emotion", "insights", "triage", "summary")
+TIERS = ("fast", "large")
+
+_stats: dict[str, dict] = {}
+
+# One breaker per tier: a slow or failing model is skipped (straight to the fallback
+# tier, or to the caller's own fallback) until its cooldown has passed
+_breakers = {
+    name: CircuitBreaker(
+        f"llm:{name}",
+        failure_threshold=lambda: get_settings().llm_breaker_failures,
+        cooldown_s=lambda: get_settings().llm_breaker_cooldown_s,
+    )
+    for name in TIERS
+}
+
+
+def get_tier(name: str) -> dict:
+    """Model, latency budget (seconds) and fallback tier for one tier, from settings."""
+    if name not in TIERS:
+        raise ValueError(f"Unknown model tier: {name}")
+    settings = get_settings()
+    return {
+        "name": name,
+        "model": getattr(settings, f"llm_tier_{name}_model"),
+        "budget_s": getattr(settings, f"llm_tier_{name}_budget_s"),
+        "fallback": getattr(settings, f"llm_tier_{name}_fallback") or None,
+    }
+
+
+def tier_for(task: str) -> str:
+    if task not in TASKS:
+        raise ValueError(f"Unknown LLM task: {task}")
+    return get_settings().llm_task_tier_map.get(task, "large")
+
+
+def model_for(task: str) -> str:
+    """Primary model for a task (part of LLM cache keys, so re-routing re-computes)."""
+    return get_tier(tier_for(task))["model"]
+
+
+def _chain(task: str) -> list[dict]:
+    """The task's tier followed by its fallbacks, each tier at most once."""
+    chain: list[dict] = []
+    name: Optional[str] = tier_for(task)
+    while name and name not in [tier["name"] for tier in chain]:
+        tier = get_tier(name)
+        chain.append(tier)
+        name = tier["fallback"]
+    return chain
+
+
+def _deadline_s(task: str) -> float:
+    """Overall deadline for a task, fallback tiers included (defaults to the large tier budget)."""
+    settings = get_settings()
+    return settings.llm_task_deadline_map.get(task, settings.llm_tier_large_budget_s)
+
+
+def _count(task: str, key: str, amount: float = 1) -> None:
+    stats = _stats.setdefault(task, {
+        "calls": 0, "fallbacks": 0, "failures": 0, "short_circuits": 0, "latency_ms": 0.0,
+    })
+    stats[key] += amount
+
+
+def _record_outcome(tier: dict, elapsed_s: float) -> None:
+    """A success slower than llm_breaker_slow_fraction of the tier budget counts against the breaker."""
+    if elapsed_s > tier["budget_s"] * get_settings().llm_breaker_slow_fraction:
+        _breakers[tier["name"]].record_failure()
+    else:
+        _breakers[tier["name"]].record_success()
+
+
+def _attempts(task: str, start: float):
+    """
+    Yield (tier, budget) for each tier worth trying: skips tiers whose breaker is
+    open and stops once the task deadline has passed. Each budget is the tier's
+    own, capped by what is left of the deadline.
+    """
+    deadline = start + _deadline_s(task)
+    for tier in _chain(task):
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            return
+        if not _breakers[tier["name"]].allow():
+            _count(task, "short_circuits")
+            continue
+        yield tier, min(tier["budget_s"], remaining)
+
+
+def _note_fallback(task: str, tier: dict, last_error: Optional[Exception]) -> None:
+    """Count and log an attempt on a tier other than the task's own (failed or skipped)."""
+    if tier["name"] == tier_for(task):
+        return
+    _count(task, "fallbacks")
+    reason = last_error if last_error is not None else "earlier tier skipped, circuit open"
+    print(f"LLM task {task}: falling back to {tier['name']} tier after: {reason}")
+
+
+async def routed_completion(task: str, **kwargs: Any):
+    """
+    chat_completion() on the task's tier. Each attempt is bounded by the tier's
+    budget (queueing for a slot included) and the whole call by the task deadline;
+    on timeout or error the fallback tier is tried. Tiers with an open circuit are
+    skipped without a call. Tasks in LLM_HEDGE_TASKS may send a second request if
+    the first is slow. Raises the last error (CircuitOpenError if no tier was
+    tried) when every tier fails.
+    """
+    _count(task, "calls")
+    start = time.perf_counter()
+    settings = get_settings()
+    hedge = task in settings.llm_hedge_task_set
+    last_error: Optional[Exception] = None
+    for tier, budget in _attempts(task, start):
+        _note_fallback(task, tier, last_error)
+
+        def call(tier=tier, budget=budget):
+            return chat_completion(model=tier["model"], timeout=budget, task=task, **kwargs)
+
+        attempt_start = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(
+                hedged(call, settings.llm_hedge_delay_ms / 1000) if hedge else call(), budget
+            )
+        except Exception as e:
+            _breakers[tier["name"]].record_failure()
+            last_error = e
+            continue
+        _record_outcome(tier, time.perf_counter() - attempt_start)
+        _count(task, "latency_ms", (time.perf_counter() - start) * 1000)
+        return response
+
+    _count(task, "failures")
+    raise last_error or CircuitOpenError(f"LLM task {task}: no model tier available")
+
+
+async def routed_stream(task: str, **kwargs: Any) -> AsyncIterator[str]:
+    """
+    stream_chat_completion() on the task's tier. Falls back to the next tier only
+    if the stream fails before its first delta; later failures propagate. The
+    breaker judges a stream by its time to first delta.
+    """
+    _count(task, "calls")
+    start = time.perf_counter()
+    last_error: Optional[Exception] = None
+    for tier, budget in _attempts(task, start):
+        _note_fallback(task, tier, last_error)
+        attempt_start = time.perf_counter()
+        started = False
+        try:
+            async with aclosing(stream_chat_completion(
+                model=tier["model"], timeout=budget, task=task, **kwargs
+            )) as stream:
+                async for delta in stream:
+                    if not started:
+                        started = True
+                        _record_outcome(tier, time.perf_counter() - attempt_start)
+                    yield delta
+        except Exception as e:
+            _breakers[tier["name"]].record_failure()
+            if started:
+                _count(task, "failures")
+                raise
+            last_error = e
+            continue
+        _count(task, "latency_ms", (time.perf_counter() - start) * 1000)
+        return
+
+    _count(task, "failures")
+    raise last_error or CircuitOpenError(f"LLM task {task}: no model tier available")
+
+
+def get_router_stats() -> dict:
+    """
+    Current task → tier → model routes with per-task call / fallback / failure /
+    short-circuit counters, plus breaker state per tier and hedging counters.
+    """
+    tasks = {}
+    for task in TASKS:
+        _count(task, "calls", 0)
+        counters = dict(_stats[task])
+        succeeded = counters["calls"] - counters["failures"]
+        counters["avg_latency_ms"] = round(counters.pop("latency_ms") / succeeded, 1) if succeeded > 0 else 0
+        tasks[task] = {"tier": tier_for(task), "model": model_for(task), **counters}
+    return {
+        "tasks": tasks,
+        "breakers": {name: breaker.stats() for name, breaker in _breakers.items()},
+        "hedging": get_hedge_stats(),
+    }
@@ -0,0 +1,107 @@
+# [FILENAME: app/services/resilience.py]
+# [PURPOSE: Circuit breakers and hedged requests for upstream AI calls]
+# [DEPENDENCIES: none]
+# [PHASE: Performance - LLM resilience]
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker. After `failure_threshold` failures (errors,
+    timeouts or slow responses) in a row it opens and rejects calls for
+    `cooldown_s`; then a single probe call is let through (half-open) and its
+    outcome closes or re-opens the circuit.
+
+    Limits are callables so they follow settings without re-creating the breaker.
+    """
+
+    def __init__(self, name: str, failure_threshold: Callable[[], int], cooldown_s: Callable[[], float]):
+        self.name = name
+        self._failure_threshold = failure_threshold
+        self._cooldown_s = cooldown_s
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_started: Optional[float] = None
+        self._stats = {"trips": 0, "rejected": 0, "failures": 0, "successes": 0}
+
+    def allow(self) -> bool:
+        """True if a call may go out now (counts a rejection otherwise)."""
+        now = time.monotonic()
+        if self.state == "open" and now - self._opened_at >= self._cooldown_s():
+            self.state = "half_open"
+            self._probe_started = None
+        if self.state == "half_open":
+            # One probe at a time; a probe that never reported back (cancelled) expires
+            if self._probe_started is None or now - self._probe_started >= self._cooldown_s():
+                self._probe_started = now
+                return True
+        elif self.state == "closed":
+            return True
+        self._stats["rejected"] += 1
+        return False
+
+    def record_success(self) -> None:
+        self._stats["successes"] += 1
+        self._failures = 0
+        self._probe_started = None
+        self.state = "closed"
+
+    def record_failure(self) -> None:
+        self._stats["failures"] += 1
+        self._failures += 1
+        self._probe_started = None
+        if self.state == "half_open" or self._failures >= max(1, self._failure_threshold()):
+            if self.state != "open":
+                self._stats["trips"] += 1
+                print(f"Circuit breaker {self.name} opened after {self._failures} consecutive failures")
+            self.state = "open"
+            self._opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {"state": self.state, "consecutive_failures": self._failures, **self._stats}
+
+
+_hedge_stats = {"hedged": 0, "hedge_wins": 0}
+
+
+async def hedged(call: Callable[[], Awaitable[Any]], delay_s: float) -> Any:
+    """
+    Run `call()`; if it hasn't finished after `delay_s`, start a second identical
+    call and return whichever succeeds first (the other is cancelled). Only for
+    short, idempotent calls. Raises the last error if both fail.
+    """
+    first = asyncio.ensure_future(call())
+    tasks = [first]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay_s)
+        if not done:
+            _hedge_stats["hedged"] += 1
+            tasks.append(asyncio.ensure_future(call()))
+
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is not first:
+                        _hedge_stats["hedge_wins"] += 1
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+def get_hedge_stats() -> dict:
+    return dict(_hedge_stats)
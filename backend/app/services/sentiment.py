@@ -0,0 +1,228 @@
+# [FILENAME: app/services/sentiment.py]
+# [PURPOSE: Batch sentiment scoring with TextBlob's pattern lexicon and rules, loaded once per process]
+# [DEPENDENCIES: textblob (imported lazily), numpy, app.config]
+# [PHASE: Performance - Sentiment engine]
+
+import asyncio
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+from app.config import get_settings
+
+# Scores are exactly TextBlob(text).sentiment.polarity rounded to 3 places (the
+# stored sentiment_score scale), computed without building a TextBlob per text:
+# the lexicon is flattened once, the tokenizer skips sentence splitting, and each
+# batch is averaged in one pass. textblob (and nltk behind it) is imported by
+# warm_up() in a thread at startup, not at module import.
+
+_lexicon: Optional[dict] = None
+_pool: Optional[ProcessPoolExecutor] = None
+_stats = {"texts": 0, "batches": 0, "pool_batches": 0}
+
+
+def load_lexicon() -> dict:
+    """
+    word → (polarity, intensity, is_modifier) from TextBlob's en-sentiment.xml,
+    using the part-of-speech-averaged scores TextBlob applies to plain strings,
+    plus the tokenizer and emoticon tables it uses. Loaded once per process.
+    """
+    global _lexicon
+    if _lexicon is None:
+        from textblob import _text
+        from textblob.en import sentiment as pattern
+
+        words = {}
+        for word in pattern:  # iterating loads the XML
+            scores = dict.__getitem__(pattern, word)
+            polarity, _, intensity = scores[None]
+            words[word] = (polarity, intensity, any(tag in scores for tag in pattern.modifiers))
+
+        emoticons: dict[str, float] = {}
+        for (_, polarity), faces in _text.EMOTICONS.items():
+            for face in faces:
+                emoticons.setdefault(face.lower(), polarity)
+
+        _lexicon = {
+            "words": words,
+            "negations": frozenset(pattern.negations),
+            "emoticons": emoticons,
+            "text": _text,
+            "contractions": re.compile("|".join(re.escape(k) for k in _text.replacements)),
+        }
+    return _lexicon
+
+
+async def warm_up() -> None:
+    """Load the lexicon in a thread at startup, so the first scored text doesn't block the event loop."""
+    try:
+        await asyncio.to_thread(load_lexicon)
+        print(f"🧠 Sentiment lexicon loaded ({len(_lexicon['words'])} words)")
+    except Exception as e:
+        print(f"⚠️ Sentiment lexicon not preloaded, it loads on first use: {e}")
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Lowercased tokens exactly as TextBlob's sentiment sees them (textblob._text.find_tokens,
+    joined across sentences): contractions and quotes split off, leading / trailing
+    punctuation split unless part of an abbreviation, "( ! )" and emoticons re-joined.
+    """
+    lexicon = load_lexicon()
+    _text = lexicon["text"]
+    replace = _text.replacements
+    leading = tuple(_text.PUNCTUATION.replace(".", ""))
+    trailing = leading + (".",)
+
+    text = lexicon["contractions"].sub(lambda m: replace[m.group(0)], text)
+    for quote in ("“", "”", "‘", "’", "'", '"'):
+        text = text.replace(quote, f" {quote} ")
+    text = re.sub(r"\n{2,}", f" {_text.EOS} ", text.replace("\r\n", "\n"))
+
+    tokens: list[str] = []
+    for token in text.split():
+        if token.isalnum():
+            tokens.append(token)
+            continue
+        tail = []
+        while token.startswith(leading) and token not in replace:
+            tokens.append(token[0])
+            token = token[1:]
+        while token.endswith(trailing) and token not in replace:
+            if token.endswith(leading):
+                tail.append(token[-1])
+                token = token[:-1]
+            if token.endswith("..."):
+                tail.append("...")
+                token = token[:-3].rstrip(".")
+            if token.endswith("."):
+                if (
+                    token in _text.ABBREVIATIONS
+                    or _text.RE_ABBR1.match(token)
+                    or _text.RE_ABBR2.match(token)
+                    or _text.RE_ABBR3.match(token)
+                ):
+                    break
+                tail.append(".")
+                token = token[:-1]
+        if token and token != _text.EOS:
+            tokens.append(token)
+        tokens.extend(reversed(tail))
+
+    joined = _text.RE_SARCASM.sub("(!)", " ".join(tokens))
+    joined = _text.RE_EMOTICONS.sub(lambda m: m.group(1).replace(" ", "") + m.group(2), joined)
+    return joined.lower().split()
+
+
+def _assess(tokens: list[str], lexicon: dict) -> list[float]:
+    """Polarity of each assessed chunk (pattern's Sentiment.assessments, polarity only)."""
+    words, negations, emoticons = lexicon["words"], lexicon["negations"], lexicon["emoticons"]
+    punctuation = lexicon["text"].PUNCTUATION
+    chunks: list[list] = []  # [polarity, intensity, negated]
+    modifier: Optional[str] = None
+    negation: Optional[str] = None
+    for word in tokens:
+        entry = words.get(word)
+        if entry is not None:
+            polarity, intensity, is_modifier = entry
+            if modifier is None:
+                chunks.append([polarity, intensity, False])
+            else:  # "really good"
+                chunks[-1][0] = max(-1.0, min(polarity * chunks[-1][1], 1.0))
+                chunks[-1][1] = intensity
+            if negation is not None:  # "not (really) good"
+                chunks[-1][1] = 1.0 / chunks[-1][1]
+                chunks[-1][2] = True
+            modifier = word if is_modifier else None
+            negation = word if word in negations else None
+            continue
+
+        if word in negations:
+            negation = word
+        elif negation and len(word.strip("'")) > 1:
+            negation = None  # negation carries across small words only ("not a good")
+        if negation is not None and modifier is not None and modifier.endswith("ly"):
+            chunks[-1][2] = True  # "really not good"
+            negation = None
+        elif modifier and len(word) > 2:
+            modifier = None
+        if word == "!" and chunks:
+            chunks[-1][0] = max(-1.0, min(chunks[-1][0] * 1.25, 1.0))
+        if word == "(!)":
+            chunks.append([0.0, 1.0, False])
+        if not word.isalpha() and len(word) <= 5 and word not in punctuation and word in emoticons:
+            chunks.append([emoticons[word], 1.0, False])
+    return [polarity * -0.5 if negated else polarity for polarity, _, negated in chunks]
+
+
+def score_batch(texts: list[str]) -> list[float]:
+    """Polarity (-1.0 to 1.0, 3 decimals) per text, in this process; averaged in one NumPy pass."""
+    lexicon = load_lexicon()
+    polarities: list[float] = []
+    counts = np.zeros(len(texts), dtype=np.int64)
+    for i, text in enumerate(texts):
+        assessed = _assess(tokenize(text), lexicon)
+        polarities.extend(assessed)
+        counts[i] = len(assessed)
+
+    sums = np.zeros(len(texts))
+    if polarities:
+        sums = np.bincount(np.repeat(np.arange(len(texts)), counts), weights=polarities, minlength=len(texts))
+    means = sums / np.maximum(counts, 1)
+    _stats["texts"] += len(texts)
+    _stats["batches"] += 1
+    return [round(float(mean), 3) for mean in means]
+
+
+def score(text: str) -> float:
+    return score_batch([text])[0]
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn, not fork: the API process has an event loop and thread pools running
+        _pool = ProcessPoolExecutor(
+            max_workers=get_settings().sentiment_pool_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=load_lexicon,
+        )
+    return _pool
+
+
+async def score_texts(texts: list[str]) -> list[float]:
+    """
+    score_batch() without blocking the event loop: batches of at least
+    SENTIMENT_POOL_MIN_BATCH texts are split across the process pool, smaller
+    ones run in a thread.
+    """
+    settings = get_settings()
+    loop = asyncio.get_running_loop()
+    if settings.sentiment_pool_workers <= 0 or len(texts) < settings.sentiment_pool_min_batch:
+        return await loop.run_in_executor(None, score_batch, texts)
+
+    pool = _get_pool()
+    size = -(-len(texts) // settings.sentiment_pool_workers)
+    chunks = [texts[i:i + size] for i in range(0, len(texts), size)]
+    results = await asyncio.gather(*(loop.run_in_executor(pool, score_batch, chunk) for chunk in chunks))
+    _stats["pool_batches"] += 1
+    _stats["texts"] += len(texts)  # the workers' counters are their own
+    return [value for chunk in results for value in chunk]
+
+
+def close_sentiment_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def get_sentiment_stats() -> dict:
+    return {
+        "lexicon_loaded": _lexicon is not None,
+        "pool_workers": get_settings().sentiment_pool_workers if _pool is not None else 0,
+        **_stats,
+    }
@@ -1,6 +1,9 @@
-from app.models.database import get_supabase_client
+import asyncio
+from app.models.database import get_supabase_client, run_query
+from app.services import cache
 from typing import Dict, Any
 
+@cache.user_cached("subscription:usage")
 async def get_usage_status(user_id: str) -> Dict[str, Any]:
     """Get current usage stats and subscription level for a user."""
     supabase = get_supabase_client()
@@ -8,13 +11,13 @@ async def get_usage_status(user_id: str) -> Dict[str, Any]:
     # Usage counts are still computed for display/analytics,
     # but the product is now completely free: no limits, no paywall.
     
-    # Get journal entry count
-    journal_count_res = supabase.table("journal_entries").select("id", count="exact").eq("user_id", user_id).execute()
-    journal_count = journal_count_res.count or 0
-    
-    # Get voice session count
+    # Get journal entry count and voice session count concurrently
     # Note: we check all sessions with mode='voice'
-    voice_count_res = supabase.table("chat_sessions").select("id", count="exact").eq("user_id", user_id).eq("mode", "voice").execute()
+    journal_count_res, voice_count_res = await asyncio.gather(
+        run_query(supabase.table("journal_entries").select("id", count="exact").eq("user_id", user_id)),
+        run_query(supabase.table("chat_sessions").select("id", count="exact").eq("user_id", user_id).eq("mode", "voice")),
+    )
+    journal_count = journal_count_res.count or 0
     voice_count = voice_count_res.count or 0
     
     return {
@@ -1,11 +1,17 @@
 # [FILENAME: app/services/voice_service.py]
 # [PURPOSE: Voice processing service using Groq Whisper (STT) and Sarvam AI (TTS)]
-# [DEPENDENCIES: groq, sarvamai, app.services.ai_client]
+# [DEPENDENCIES: groq, sarvamai, httpx, app.services.ai_client]
 # [PHASE: Phase 6 - Voice Chat]
 
 import base64
 import io
-from app.services.ai_client import get_groq_client
+from typing import Optional
+
+import httpx
+from sarvamai import AsyncSarvamAI
+from sarvamai.environment import SarvamAIEnvironment
+
+from app.services.ai_client import transcribe
 from app.config import get_settings
 
 
@@ -14,13 +20,11 @@ async def transcribe_audio(audio_bytes: bytes) -> str:
     Transcribe audio using Groq's whisper-large-v3 model.
     Uses BytesIO to avoid temp file disk I/O.
     """
-    client = get_groq_client()
-
     try:
         audio_buffer = io.BytesIO(audio_bytes)
         audio_buffer.name = "audio.webm"  # Groq uses this to detect format
 
-        transcription = client.audio.transcriptions.create(
+        transcription = await transcribe(
             file=(audio_buffer.name, audio_buffer),
             model="whisper-large-v3",
             response_format="json",
@@ -40,7 +44,40 @@ async def transcribe_audio(audio_bytes: bytes) -> str:
         raise e
 
 
-from sarvamai import SarvamAI
+# Shared async Sarvam client and its HTTP pool, created on first use and closed from
+# the app lifespan (the old per-call sync client blocked the event loop)
+_sarvam_client: Optional[AsyncSarvamAI] = None
+_sarvam_http: Optional[httpx.AsyncClient] = None
+
+
+def get_sarvam_client() -> AsyncSarvamAI:
+    """Shared async Sarvam client (one connection pool per process), honouring sarvam_base_url."""
+    global _sarvam_client, _sarvam_http
+
+    if _sarvam_client is None:
+        settings = get_settings()
+        kwargs = {}
+        if settings.sarvam_base_url:
+            base = settings.sarvam_base_url.rstrip("/")
+            kwargs["environment"] = SarvamAIEnvironment(
+                base=base, creative=f"{base}/dubbing", production=base.replace("http", "ws", 1)
+            )
+        _sarvam_http = httpx.AsyncClient(timeout=settings.llm_timeout_s)
+        _sarvam_client = AsyncSarvamAI(
+            api_subscription_key=settings.sarvam_api_key, httpx_client=_sarvam_http, **kwargs
+        )
+    return _sarvam_client
+
+
+async def close_sarvam_client() -> None:
+    """Close the shared Sarvam client's connection pool. Called on application shutdown."""
+    global _sarvam_client, _sarvam_http
+
+    if _sarvam_http is not None:
+        await _sarvam_http.aclose()
+    _sarvam_client = None
+    _sarvam_http = None
+
 
 async def synthesize_speech(text: str, language: str = "en") -> str:
     """
@@ -59,22 +96,19 @@ async def synthesize_speech(text: str, language: str = "en") -> str:
             sarvam_lang = "gu-IN"
         else:
             sarvam_lang = "en-IN"
-        
-        # Initialize Sarvam AI Client
-        client = SarvamAI(api_subscription_key=settings.sarvam_api_key)
 
         # Use the official SDK to convert text to speech
         # It handles the base64 conversion and endpoint formatting automatically
-        response = client.text_to_speech.convert(
+        response = await get_sarvam_client().text_to_speech.convert(
             text=text,
-            target_language_code=sarvam_lang,
+            language_code=sarvam_lang,
             speaker="shubh",
             pace=1.00,
             speech_sample_rate=22050,
             enable_preprocessing=True,
             model="bulbul:v3"
         )
-        
+
         # The response is typically a string of base64 audio depending on the SDK version formatting
         # We need to extract the base64 string
         # Assuming response returns an object with 'audios' attribute based on their REST spec
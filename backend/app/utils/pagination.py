@@ -0,0 +1,61 @@
+# [FILENAME: app/utils/pagination.py]
+# [PURPOSE: Opaque keyset (cursor) pagination helpers for PostgREST queries]
+# [DEPENDENCIES: none]
+# [PHASE: Performance - Keyset pagination]
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional
+from uuid import UUID
+
+
+def encode_cursor(sort_value: str, row_id: str) -> str:
+    """Encode the last row's (sort value, id) as an opaque URL-safe cursor."""
+    raw = json.dumps([sort_value, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, str]:
+    """Decode a cursor from encode_cursor(). Raises ValueError if it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        # Sort keys are timestamps and ids are UUIDs; reject anything else before it reaches a query
+        datetime.fromisoformat(sort_value.replace("Z", "+00:00"))
+        row_id = str(UUID(row_id))
+    except (ValueError, TypeError, AttributeError) as e:
+        raise ValueError("Invalid cursor") from e
+    return sort_value, row_id
+
+
+def apply_keyset(
+    query: Any,
+    cursor: Optional[str],
+    sort_column: str = "created_at",
+    descending: bool = True,
+) -> Any:
+    """
+    Restrict a PostgREST query to rows after `cursor` and order it by (sort_column, id).
+    Seeks straight to the position via the (user_id, sort_column) index instead of
+    walking and discarding earlier rows like .range() does.
+    """
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        op = "lt" if descending else "gt"
+        query = query.or_(
+            f'{sort_column}.{op}."{sort_value}",'
+            f'and({sort_column}.eq."{sort_value}",id.{op}.{row_id})'
+        )
+    return query.order(sort_column, desc=descending).order("id", desc=descending)
+
+
+def next_cursor(rows: list[dict], limit: int, sort_column: str = "created_at") -> Optional[str]:
+    """
+    Cursor for the page after `rows`. Callers fetch `limit + 1` rows: the extra row
+    only signals that another page exists and is trimmed off by the caller.
+    """
+    if len(rows) <= limit:
+        return None
+    last = rows[limit - 1]
+    return encode_cursor(last[sort_column], last["id"])
@@ -0,0 +1,116 @@
+"""
+Load test: LLM call throughput versus concurrency.
+
+Drives ai_client.chat_completion() against an in-process fake Groq endpoint
+(httpx.MockTransport with a fixed response latency), so it needs no API key or
+network. For comparison it also runs the old pattern: the synchronous Groq client
+called directly inside the event loop, which serialises every call.
+
+Usage (from backend/):
+
+    python -m benchmarks.bench_llm_concurrency --latency-ms 800 --requests 64 \\
+        --concurrency 1 4 16 64 --limit 16
+
+Expected shape: the sync baseline stays at ~1000/latency req/s whatever the
+concurrency; the async client scales roughly linearly up to --limit, then flattens.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+from groq import AsyncGroq, Groq
+
+from app.config import get_settings
+from app.services import ai_client
+
+FAKE_COMPLETION = {
+    "id": "chatcmpl-bench",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "llama-3.3-70b-versatile",
+    "choices": [{
+        "index": 0,
+        "message": {"role": "assistant", "content": "ok"},
+        "finish_reason": "stop",
+    }],
+    "usage": {"prompt_tokens": 10, "completion_tokens": 1, "total_tokens": 11},
+}
+
+MESSAGES = [{"role": "user", "content": "How was my day?"}]
+
+
+def _response() -> httpx.Response:
+    return httpx.Response(200, content=json.dumps(FAKE_COMPLETION), headers={"content-type": "application/json"})
+
+
+async def _run_async(total: int, concurrency: int, latency_s: float) -> float:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency_s)
+        return _response()
+
+    ai_client._client = AsyncGroq(
+        api_key="bench", max_retries=0,
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with gate:
+            await ai_client.chat_completion(model="llama-3.3-70b-versatile", messages=MESSAGES)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+    await ai_client.close_groq_client()
+    return total / elapsed
+
+
+async def _run_sync_baseline(total: int, concurrency: int, latency_s: float) -> float:
+    def handler(request: httpx.Request) -> httpx.Response:
+        time.sleep(latency_s)
+        return _response()
+
+    client = Groq(
+        api_key="bench", max_retries=0,
+        http_client=httpx.Client(transport=httpx.MockTransport(handler)),
+    )
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with gate:
+            # Blocking call on the event loop: what every service did before AsyncGroq
+            client.chat.completions.create(model="llama-3.3-70b-versatile", messages=MESSAGES)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+    client.close()
+    return total / elapsed
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency-ms", type=float, default=500)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--limit", type=int, default=None, help="llm_max_concurrency (default: from settings)")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    if args.limit is not None:
+        settings.llm_max_concurrency = args.limit
+    latency = args.latency_ms / 1000
+
+    print(f"fake latency {args.latency_ms:.0f} ms, {args.requests} requests, limit {settings.llm_max_concurrency}")
+    print(f"{'concurrency':>12}{'sync req/s':>14}{'async req/s':>14}{'speed-up':>10}")
+    for concurrency in args.concurrency:
+        sync_rps = await _run_sync_baseline(args.requests, concurrency, latency)
+        async_rps = await _run_async(args.requests, concurrency, latency)
+        print(f"{concurrency:>12}{sync_rps:>14.2f}{async_rps:>14.2f}{async_rps / sync_rps:>9.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,158 @@
+"""
+Benchmark: latency and output agreement of each model tier per LLM task.
+
+Runs the production prompts for the emotion, tags (unified journal analysis) and
+title tasks over a fixed multilingual corpus on every configured tier, then reports
+latency percentiles and how often each tier agrees with the reference tier:
+
+- emotion: same primary emotion
+- tags:    same primary emotion, and Jaccard overlap of ai_multi_tags
+- title:   Jaccard overlap of title words (a rough signal; titles legitimately vary)
+
+Needs GROQ_API_KEY (real models). Usage (from backend/):
+
+    python -m benchmarks.bench_model_tiers --tasks emotion tags title --reference large --repeat 1
+
+Use the output to choose LLM_TASK_TIERS: a task can move to the fast tier when its
+agreement is acceptable and the latency gain matters.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from app.config import get_settings
+from app.services import ai_client, emotion_service, journal_service, model_router
+from app.services.chat_service import TITLE_PROMPT
+
+CORPUS = [
+    "Finally finished the project I've been dreading for weeks. I feel so light and proud of myself.",
+    "Couldn't sleep again. My mind keeps replaying the argument with my sister and I don't know how to fix it.",
+    "Spent the evening with grandma making rotis. She told stories about her village. I miss those days.",
+    "The interview is tomorrow and my heart is racing every time I think about it.",
+    "Nothing really happened today. Work, dinner, scrolling. Just kind of numb.",
+    "My boss took credit for my idea in front of everyone. I'm furious and I said nothing.",
+    "Went for a long walk by the lake, watched the sunset. Everything felt calm for once.",
+    "I got the scholarship!!! I can't stop smiling, I called everyone I know.",
+    "आज बहुत थकान महसूस हो रही है। काम खत्म ही नहीं होता और कोई समझता भी नहीं।",
+    "मम्मी के साथ मंदिर गई, बहुत सुकून मिला। लगता है सब ठीक हो जाएगा।",
+    "Yaar aaj ka din bahut bekaar tha, exam mein sab bhool gaya. Ghar pe sab naraz honge.",
+    "Aaj dosto ke saath chai pe gaye, itna hasaya unhone ki pet dukh gaya. Best day!",
+    "આજે ઘરે બધા સાથે જમ્યા, બહુ મજા આવી. આવું રોજ થાય તો કેટલું સારું.",
+    "I keep comparing myself to everyone on Instagram. Why does everyone else have it figured out?",
+    "Therapy was hard today but I think I finally said something I've been holding in for years.",
+    "My dog is sick and the vet isn't sure what's wrong. I'm scared.",
+]
+
+
+def _jaccard(a, b) -> float:
+    a, b = {str(x).lower() for x in a}, {str(x).lower() for x in b}
+    return len(a & b) / len(a | b) if a | b else 1.0
+
+
+def _messages(task: str, text: str) -> tuple[list[dict], dict]:
+    """Production prompt and sampling parameters for one task."""
+    if task == "emotion":
+        return [
+            {"role": "system", "content": emotion_service.EMOTION_SYSTEM_PROMPT},
+            {"role": "user", "content": text},
+        ], {"temperature": 0.1, "max_tokens": 200, "response_format": {"type": "json_object"}}
+    if task == "tags":
+        return [
+            {"role": "system", "content": journal_service.JOURNAL_ANALYSIS_PROMPT},
+            {"role": "user", "content": text},
+        ], {"temperature": 0.3, "max_tokens": 400, "response_format": {"type": "json_object"}}
+    return [
+        {"role": "user", "content": TITLE_PROMPT.format(entry=text)},
+    ], {"temperature": 0.6, "max_tokens": 20}
+
+
+def _parse(task: str, raw: str) -> dict:
+    if task == "title":
+        return {"words": raw.strip().replace('"', "").split()}
+    result = json.loads(raw)
+    parsed = emotion_service.normalize_emotion_result(result.get("emotions"), result.get("primary_emotion"))
+    if task == "tags":
+        parsed["tags"] = result.get("ai_multi_tags", [])
+    return parsed
+
+
+def _agreement(task: str, output: dict, reference: dict) -> dict:
+    if task == "title":
+        return {"title_overlap": _jaccard(output["words"], reference["words"])}
+    scores = {"primary_match": float(output["primary_emotion"] == reference["primary_emotion"])}
+    if task == "tags":
+        scores["tag_overlap"] = _jaccard(output["tags"], reference["tags"])
+    return scores
+
+
+async def _run_tier(task: str, tier: dict, repeat: int) -> tuple[list[float], list]:
+    """Sequential calls (latency, not throughput); returns latencies and parsed outputs."""
+    latencies, outputs = [], []
+    for text in CORPUS:
+        messages, params = _messages(task, text)
+        output = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            try:
+                response = await ai_client.chat_completion(
+                    model=tier["model"], messages=messages, timeout=tier["budget_s"] * 3, **params
+                )
+                output = _parse(task, response.choices[0].message.content)
+            except Exception as e:
+                print(f"  {tier['name']}/{task}: {e}")
+            latencies.append((time.perf_counter() - start) * 1000)
+        outputs.append(output)
+    return latencies, outputs
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", nargs="+", default=["emotion", "tags", "title"], choices=["emotion", "tags", "title"])
+    parser.add_argument("--tiers", nargs="+", default=list(model_router.TIERS), choices=list(model_router.TIERS))
+    parser.add_argument("--reference", default="large", choices=list(model_router.TIERS))
+    parser.add_argument("--repeat", type=int, default=1, help="calls per corpus item (latency samples)")
+    args = parser.parse_args()
+
+    if not get_settings().groq_api_key:
+        raise SystemExit("GROQ_API_KEY is required: this benchmark compares real model outputs.")
+
+    tiers = sorted(set(args.tiers) | {args.reference}, key=model_router.TIERS.index)
+    print(f"corpus {len(CORPUS)} texts, repeat {args.repeat}, reference tier {args.reference}")
+    print(f"{'task':<8}{'tier':<7}{'model':<28}{'p50 ms':>8}{'p95 ms':>8}{'ok':>5}  agreement")
+
+    try:
+        for task in args.tasks:
+            results = {}
+            for name in tiers:
+                tier = model_router.get_tier(name)
+                results[name] = (tier, *await _run_tier(task, tier, args.repeat))
+
+            reference = results[args.reference][2]
+            for name in tiers:
+                tier, latencies, outputs = results[name]
+                pairs = [(o, r) for o, r in zip(outputs, reference) if o is not None and r is not None]
+                scores: dict[str, list[float]] = {}
+                for output, ref in pairs:
+                    for key, value in _agreement(task, output, ref).items():
+                        scores.setdefault(key, []).append(value)
+                agreement = ", ".join(f"{k} {statistics.mean(v):.2f}" for k, v in scores.items()) or "-"
+                ok = sum(o is not None for o in outputs)
+                print(
+                    f"{task:<8}{name:<7}{tier['model'][:27]:<28}"
+                    f"{_percentile(latencies, 0.5):>8.0f}{_percentile(latencies, 0.95):>8.0f}"
+                    f"{ok:>5}  {agreement}"
+                )
+    finally:
+        await ai_client.close_groq_client()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
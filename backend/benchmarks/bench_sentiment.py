@@ -0,0 +1,92 @@
+"""
+Benchmark: sentiment scoring, per-text TextBlob vs the batch sentiment engine.
+
+Builds a seeded corpus of journal-like entries (default 10,000) and scores it with:
+
+- textblob:  round(TextBlob(text).sentiment.polarity, 3) per text (the old path)
+- engine:    sentiment.score_batch() in-process (one call for the whole corpus)
+- pool:      sentiment.score_texts() across SENTIMENT_POOL_WORKERS processes
+
+and reports wall time, per-text cost, and how many scores differ from TextBlob's
+(expected: 0). Lexicon / worker start-up is timed separately. No network needed.
+Usage (from backend/):
+
+    python -m benchmarks.bench_sentiment --entries 10000 --workers 4
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from app.config import get_settings
+from app.services import sentiment
+from benchmarks.bench_model_tiers import CORPUS
+
+SENTENCES = [
+    "Work was exhausting and my manager was not happy with the report.",
+    "I had a really good talk with mom tonight!",
+    "Honestly I don't know what I'm doing anymore...",
+    "The weather was nice, so we walked to the lake :)",
+    "I'm not sad, just tired. Very tired.",
+    "Dinner with friends was great, best evening in weeks.",
+    "Nothing special happened today.",
+    "I feel terribly anxious about tomorrow's presentation.",
+    "Mr. Shah said my essay was excellent, I can't believe it!!",
+    "It wasn't a bad day at all (!)",
+    "Missed the bus again. Awful start :(",
+    "Grateful for small things: chai, sunlight, a quiet hour.",
+]
+
+
+def build_corpus(entries: int, seed: int = 0) -> list[str]:
+    """Entries of 1-12 sentences drawn from the corpora above (English and Indic mixed)."""
+    rng = random.Random(seed)
+    pool = SENTENCES + CORPUS
+    return [" ".join(rng.choice(pool) for _ in range(rng.randint(1, 12))) for _ in range(entries)]
+
+
+def _report(name: str, seconds: float, entries: int, mismatches: int = 0) -> None:
+    print(f"{name:<10}{seconds:>9.2f} s{seconds / entries * 1_000_000:>10.0f} us/entry{mismatches:>12}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=get_settings().sentiment_pool_workers)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    texts = build_corpus(args.entries, args.seed)
+    print(f"{len(texts)} entries, avg {sum(map(len, texts)) / len(texts):.0f} chars")
+
+    start = time.perf_counter()
+    from textblob import TextBlob
+
+    reference = [round(TextBlob(texts[0]).sentiment.polarity, 3)]
+    print(f"textblob import + lexicon load: {time.perf_counter() - start:.2f} s")
+    print(f"{'path':<10}{'wall':>11}{'per entry':>18}{'mismatches':>12}")
+
+    start = time.perf_counter()
+    reference = [round(TextBlob(text).sentiment.polarity, 3) for text in texts]
+    _report("textblob", time.perf_counter() - start, len(texts))
+
+    sentiment.load_lexicon()
+    start = time.perf_counter()
+    scores = sentiment.score_batch(texts)
+    _report("engine", time.perf_counter() - start, len(texts), sum(a != b for a, b in zip(scores, reference)))
+
+    if args.workers > 0:
+        settings = get_settings()
+        settings.sentiment_pool_workers, settings.sentiment_pool_min_batch = args.workers, 1
+        start = time.perf_counter()
+        await sentiment.score_texts(texts[: args.workers])  # start the workers
+        print(f"pool start-up ({args.workers} workers): {time.perf_counter() - start:.2f} s")
+        start = time.perf_counter()
+        scores = await sentiment.score_texts(texts)
+        _report("pool", time.perf_counter() - start, len(texts), sum(a != b for a, b in zip(scores, reference)))
+        sentiment.close_sentiment_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
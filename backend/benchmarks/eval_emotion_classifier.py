@@ -0,0 +1,113 @@
+"""
+Evaluation: local emotion classifier vs the emotion LLM.
+
+Classifies a corpus locally and with the production emotion prompt, then reports
+per confidence threshold how many texts would be answered locally (LLM calls
+avoided) and how often the local primary emotion agrees with the LLM's, on those
+texts and on the whole corpus. Also reports local latency (single and batched).
+
+Needs GROQ_API_KEY for the reference labels, unless --local-only. (The fake AI
+server answers emotions by hash, so agreement against it is meaningless.)
+Usage (from backend/):
+
+    python -m benchmarks.eval_emotion_classifier --file texts.txt --thresholds 0.4 0.5 0.6 0.7 0.8
+
+--file takes one text per line (default: the multilingual corpus from
+bench_model_tiers). Use the output to choose EMOTION_LOCAL_MIN_CONFIDENCE.
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.config import get_settings
+from app.services import ai_client, emotion_classifier, emotion_service
+from benchmarks.bench_model_tiers import CORPUS
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def _local_latency(texts: list[str]) -> None:
+    single = []
+    for text in texts:
+        start = time.perf_counter()
+        emotion_classifier.classify(text)
+        single.append((time.perf_counter() - start) * 1_000_000)
+    batch = texts * max(1, 10_000 // len(texts))
+    start = time.perf_counter()
+    emotion_classifier.classify_batch(batch)
+    per_text = (time.perf_counter() - start) * 1_000_000 / len(batch)
+    print(
+        f"local latency: single p50 {_percentile(single, 0.5):.0f} us, p99 {_percentile(single, 0.99):.0f} us; "
+        f"batch of {len(batch)} {per_text:.1f} us/text"
+    )
+
+
+async def _reference(texts: list[str], concurrency: int) -> list:
+    """LLM primary emotion per text (None where the call failed)."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(text: str):
+        async with semaphore:
+            try:
+                return (await emotion_service._call_emotion_model(text[:1500]))["primary_emotion"]
+            except Exception as e:
+                print(f"  LLM failed for {text[:40]!r}: {e}")
+                return None
+
+    return await asyncio.gather(*(one(text) for text in texts))
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", help="one text per line (default: built-in corpus)")
+    parser.add_argument("--thresholds", nargs="+", type=float, default=[0.4, 0.5, 0.6, 0.7, 0.8])
+    parser.add_argument("--concurrency", type=int, default=4, help="parallel reference LLM calls")
+    parser.add_argument("--local-only", action="store_true", help="skip the LLM; coverage and latency only")
+    parser.add_argument("--verbose", action="store_true", help="print every text with both labels")
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+    else:
+        texts = CORPUS
+    if not args.local_only and not get_settings().groq_api_key:
+        raise SystemExit("GROQ_API_KEY is required for reference labels (or pass --local-only).")
+
+    local = emotion_classifier.classify_batch(texts)
+    print(f"corpus {len(texts)} texts, configured threshold {get_settings().emotion_local_min_confidence}")
+    _local_latency(texts)
+
+    reference = [None] * len(texts)
+    if not args.local_only:
+        try:
+            reference = await _reference(texts, args.concurrency)
+        finally:
+            await ai_client.close_groq_client()
+
+    labelled = [(result, ref) for result, ref in zip(local, reference) if ref is not None]
+    if labelled:
+        overall = sum(result["primary_emotion"] == ref for result, ref in labelled) / len(labelled)
+        print(f"agreement on all {len(labelled)} labelled texts (local best guess vs LLM): {overall:.2f}")
+
+    print(f"{'threshold':>9}{'local':>7}{'avoided':>9}{'agree':>8}")
+    for threshold in sorted(args.thresholds):
+        answered = [i for i, result in enumerate(local) if result["confidence"] >= threshold]
+        checked = [i for i in answered if reference[i] is not None]
+        agree = (
+            f"{sum(local[i]['primary_emotion'] == reference[i] for i in checked) / len(checked):>8.2f}"
+            if checked else f"{'-':>8}"
+        )
+        print(f"{threshold:>9.2f}{len(answered):>7}{len(answered) / len(texts):>9.0%}{agree}")
+
+    if args.verbose:
+        for text, result, ref in zip(texts, local, reference):
+            print(f"  {result['confidence']:.2f} {result['primary_emotion']:<12} llm {ref or '-':<12} {text[:60]}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
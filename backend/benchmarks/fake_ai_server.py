@@ -0,0 +1,287 @@
+"""
+Local stand-in for the Groq (OpenAI-compatible) and Sarvam APIs, for load and
+latency testing without spending real quota.
+
+Speaks:
+- POST /openai/v1/chat/completions      (JSON or SSE streaming; Groq's path layout)
+- POST /openai/v1/audio/transcriptions  (multipart upload, JSON reply)
+- POST /text-to-speech                  (Sarvam TTS: base64 WAV in "audios")
+- GET  /stats                           (request / error counters)
+
+Replies are deterministic (derived from a hash of the request) and schema-valid
+for every prompt the backend sends: emotion maps (single and batched), the unified
+journal analysis, insights, the therapist triage score, titles, summaries and chat
+replies. Latency is log-normal around --latency-ms (--latency-sigma 0 makes it
+fixed); --error-rate injects --error-status responses. Latency and error draws come
+from a seeded RNG, so a run is reproducible for a given request order.
+
+Usage (from backend/):
+
+    python -m benchmarks.fake_ai_server --port 8100 --latency-ms 400 --latency-sigma 0.5 \\
+        --error-rate 0.02 --stream-chunk-ms 30
+
+    # then point the backend at it and run it (or any benchmark) as usual
+    GROQ_API_KEY=fake GROQ_BASE_URL=http://127.0.0.1:8100 \\
+    SARVAM_API_KEY=fake SARVAM_BASE_URL=http://127.0.0.1:8100 \\
+    python -m uvicorn app.main:app --port 8000
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import io
+import json
+import math
+import random
+import re
+import time
+import wave
+from typing import Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+from app.services.emotion_service import EMOTION_LIST
+
+
+class FakeServerConfig(BaseModel):
+    latency_ms: float = 300.0
+    latency_sigma: float = 0.0
+    stt_latency_ms: Optional[float] = None
+    tts_latency_ms: Optional[float] = None
+    error_rate: float = 0.0
+    error_status: int = 503
+    stream_chunk_ms: float = 20.0
+    seed: int = 0
+
+
+REPLIES = [
+    "That sounds like a lot to carry. What part of it is weighing on you the most?",
+    "I'm really glad you shared that with me. How did you feel once it was over?",
+    "It makes sense that you'd feel that way. Would it help to talk through what happened?",
+    "That's wonderful to hear! What do you think made today feel different?",
+    "Thank you for being so honest with yourself. What would feel like a small kind step right now?",
+]
+TITLES = ["A Quiet Turning Point", "Finding Calm Again", "Heavy Day, Small Light", "Moments Worth Keeping"]
+TRANSCRIPTS = [
+    "Today was a long day at work and I feel completely drained.",
+    "I finally talked to my sister and I feel so much lighter.",
+    "I can't stop worrying about the exam next week.",
+    "Aaj ka din accha tha, dosto ke saath bahut maza aaya.",
+]
+TAGS = ["Hopeful", "Anxious", "Nostalgic", "Grateful", "Drained", "Proud", "Restless", "Content"]
+
+
+def _digest(*parts: str) -> int:
+    return int.from_bytes(hashlib.sha256("\x00".join(parts).encode()).digest()[:8], "big")
+
+
+def _pick(seq, key: int, offset: int = 0):
+    return seq[(key >> offset) % len(seq)]
+
+
+def _emotions(key: int) -> dict:
+    primary = _pick(EMOTION_LIST, key)
+    secondary = _pick(EMOTION_LIST, key, 8)
+    emotions = {primary: round(0.6 + (key % 30) / 100, 2)}
+    if secondary != primary:
+        emotions[secondary] = round(0.2 + (key >> 16) % 30 / 100, 2)
+    return {"emotions": emotions, "primary_emotion": primary}
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def reply_for(messages: list[dict], json_mode: bool) -> str:
+    """Deterministic, schema-valid reply for the backend prompt in `messages`."""
+    system = next((m["content"] for m in messages if m["role"] == "system"), "")
+    user = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+    key = _digest(system, user)
+
+    if '"results"' in system:  # batched emotion analysis
+        try:
+            items = json.loads(user)
+        except ValueError:
+            items = []
+        return json.dumps({"results": [
+            {"id": item.get("id"), **_emotions(_digest(str(item.get("text"))))} for item in items
+        ]})
+    if "ai_multi_tags" in system:  # unified journal analysis
+        return json.dumps({
+            "ai_multi_tags": sorted({_pick(TAGS, key, shift) for shift in (0, 5, 10)}),
+            "detailed_sentiment_report": (
+                "You began the entry weighed down, but found some steadiness as you wrote. "
+                "By the end you sounded a little lighter."
+            ),
+            **_emotions(key),
+        })
+    if "primary_emotion" in system:  # single emotion analysis
+        return json.dumps(_emotions(key))
+    if "therapist_score" in system:
+        return json.dumps({
+            "therapist_score": key % 101,
+            "therapist_justification": "Entries show a mix of stress and recovery over the period.",
+        })
+    if "observation" in system or "observation" in user:  # insights
+        return json.dumps({"insights": [
+            {"observation": f"Pattern {i + 1}: your mood lifts on days you mention time outdoors.",
+             "actions": ["Take a short walk after work", "Note one good moment each evening"]}
+            for i in range(3)
+        ]})
+    if json_mode:
+        return json.dumps({"result": "ok"})
+    if "title" in user.lower() and "journal entry" in user.lower():
+        return _pick(TITLES, key)
+    if "running summary" in system or "transcript of a conversation" in system:
+        return "The user talked about a stressful week at work and felt calmer after reflecting on it."
+    return _pick(REPLIES, key)
+
+
+def _wav_base64(duration_ms: int, sample_rate: int = 22050) -> str:
+    """Short 440 Hz tone as a base64 WAV (valid audio for the frontend player)."""
+    frames = int(sample_rate * duration_ms / 1000)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(b"".join(
+            int(8000 * math.sin(2 * math.pi * 440 * i / sample_rate)).to_bytes(2, "little", signed=True)
+            for i in range(frames)
+        ))
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+def create_app(config: FakeServerConfig) -> FastAPI:
+    app = FastAPI(title="emoDiary fake AI server")
+    rng = random.Random(config.seed)
+    stats = {"chat": 0, "stream": 0, "transcription": 0, "tts": 0, "errors": 0}
+
+    async def delay(median_ms: Optional[float]) -> None:
+        median = config.latency_ms if median_ms is None else median_ms
+        sigma = config.latency_sigma
+        ms = median * math.exp(rng.gauss(0, sigma)) if sigma > 0 else median
+        await asyncio.sleep(ms / 1000)
+
+    def injected_error() -> Optional[JSONResponse]:
+        if config.error_rate > 0 and rng.random() < config.error_rate:
+            stats["errors"] += 1
+            return JSONResponse(
+                {"error": {"message": "Injected failure", "type": "server_error"}},
+                status_code=config.error_status,
+            )
+        return None
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        messages = body.get("messages", [])
+        model = body.get("model", "fake")
+        json_mode = (body.get("response_format") or {}).get("type") == "json_object"
+        content = reply_for(messages, json_mode)
+        prompt_tokens = sum(_tokens(str(m.get("content", ""))) for m in messages)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": _tokens(content),
+            "total_tokens": prompt_tokens + _tokens(content),
+        }
+        completion_id = f"chatcmpl-{_digest(content):x}"
+
+        await delay(None)
+        error = injected_error()
+        if error:
+            return error
+
+        if not body.get("stream"):
+            stats["chat"] += 1
+            return {
+                "id": completion_id, "object": "chat.completion", "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            }
+
+        stats["stream"] += 1
+
+        def chunk(delta: dict, finish: Optional[str] = None, **extra) -> str:
+            payload = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+                **extra,
+            }
+            return f"data: {json.dumps(payload)}\n\n"
+
+        async def events():
+            yield chunk({"role": "assistant", "content": ""})
+            for piece in re.findall(r"\S+\s*", content):
+                await asyncio.sleep(config.stream_chunk_ms / 1000)
+                yield chunk({"content": piece})
+            yield chunk({}, "stop", x_groq={"id": completion_id, "usage": usage})
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/openai/v1/audio/transcriptions")
+    async def transcriptions(request: Request):
+        form = await request.form()
+        upload = form.get("file")
+        audio = await upload.read() if upload is not None else b""
+        await delay(config.stt_latency_ms)
+        error = injected_error()
+        if error:
+            return error
+        stats["transcription"] += 1
+        if not audio:
+            return JSONResponse({"error": {"message": "could not process file"}}, status_code=400)
+        text = _pick(TRANSCRIPTS, _digest(audio[:4096].hex()))
+        return {"text": text, "x_groq": {"id": f"req-{_digest(text):x}"}}
+
+    @app.post("/text-to-speech")
+    async def text_to_speech(request: Request):
+        body = await request.json()
+        text = body.get("text", "")
+        await delay(config.tts_latency_ms)
+        error = injected_error()
+        if error:
+            return error
+        stats["tts"] += 1
+        # ~60 ms of audio per word, capped so large replies stay cheap to generate
+        duration_ms = min(3000, 60 * max(1, len(text.split())))
+        return {
+            "request_id": f"tts-{_digest(text):x}",
+            "audios": [_wav_base64(duration_ms, body.get("speech_sample_rate") or 22050)],
+        }
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    for field, info in FakeServerConfig.model_fields.items():
+        kind = int if info.annotation is int else float
+        parser.add_argument(f"--{field.replace('_', '-')}", type=kind, default=info.default)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    config = FakeServerConfig(**{field: getattr(args, field) for field in FakeServerConfig.model_fields})
+    print(f"Fake AI server on http://{args.host}:{args.port} with {config.model_dump()}")
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
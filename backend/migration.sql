@@ -224,3 +224,344 @@ ALTER TABLE public.profiles
   DROP COLUMN IF EXISTS razorpay_customer_id,
   DROP COLUMN IF EXISTS razorpay_subscription_id;
 
+
+-- ──────────────────────────────────────────────────────────
+-- Rolling chat summary (Performance: bounded chat context)
+-- Messages up to (summary_through_at, summary_through_id) are folded into
+-- `summary` by a background job; summary_version guards concurrent folds.
+-- ──────────────────────────────────────────────────────────
+ALTER TABLE public.chat_sessions
+  ADD COLUMN IF NOT EXISTS summary            TEXT,
+  ADD COLUMN IF NOT EXISTS summary_through_at TIMESTAMPTZ,
+  ADD COLUMN IF NOT EXISTS summary_through_id UUID,
+  ADD COLUMN IF NOT EXISTS summary_version    INT NOT NULL DEFAULT 0;
+
+-- ──────────────────────────────────────────────────────────
+-- Chat turn RPC (Performance: one round trip per chat turn)
+-- Verifies session ownership, stores the user message and returns the
+-- session language, its rolling summary, the most recent messages the
+-- summary does not cover yet and how many such messages there are.
+-- Returns NULL when the session does not exist or is not owned by the user.
+-- ──────────────────────────────────────────────────────────
+CREATE OR REPLACE FUNCTION public.begin_chat_turn(
+  p_session_id    UUID,
+  p_user_id       UUID,
+  p_content       TEXT,
+  p_history_limit INT DEFAULT 20
+)
+RETURNS JSONB AS $$
+DECLARE
+  v_session      public.chat_sessions%ROWTYPE;
+  v_history      JSONB;
+  v_unsummarized INT;
+BEGIN
+  SELECT * INTO v_session
+  FROM public.chat_sessions
+  WHERE id = p_session_id AND user_id = p_user_id;
+
+  IF NOT FOUND THEN
+    RETURN NULL;
+  END IF;
+
+  INSERT INTO public.chat_messages (session_id, role, content)
+  VALUES (p_session_id, 'user', p_content);
+
+  SELECT COALESCE(
+           jsonb_agg(jsonb_build_object('role', role, 'content', content) ORDER BY created_at, id),
+           '[]'::jsonb
+         )
+  INTO v_history
+  FROM (
+    SELECT id, role, content, created_at
+    FROM public.chat_messages
+    WHERE session_id = p_session_id
+      AND (v_session.summary_through_at IS NULL
+           OR (created_at, id) > (v_session.summary_through_at, v_session.summary_through_id))
+    ORDER BY created_at DESC, id DESC
+    LIMIT p_history_limit
+  ) recent;
+
+  SELECT count(*) INTO v_unsummarized
+  FROM public.chat_messages
+  WHERE session_id = p_session_id
+    AND (v_session.summary_through_at IS NULL
+         OR (created_at, id) > (v_session.summary_through_at, v_session.summary_through_id));
+
+  RETURN jsonb_build_object(
+    'language', v_session.language,
+    'summary', v_session.summary,
+    'history', v_history,
+    'unsummarized', v_unsummarized
+  );
+END;
+$$ LANGUAGE plpgsql;
+
+-- ──────────────────────────────────────────────────────────
+-- Journal summary view (Performance: list pages ship an excerpt, not full content)
+-- ──────────────────────────────────────────────────────────
+ALTER TABLE public.journal_entries
+  ADD COLUMN IF NOT EXISTS content_excerpt TEXT GENERATED ALWAYS AS (left(content, 200)) STORED;
+
+-- ──────────────────────────────────────────────────────────
+-- One emotion analysis per source (Performance: single-round-trip upsert)
+-- Duplicates left by the old delete-then-insert race are removed (newest kept).
+-- source_version is the version of the source text an analysis was computed
+-- from (the journal entry's updated_at, or the request time); an older result
+-- never replaces a newer one. created_at stays the time of the first analysis
+-- (emotion history is ordered by it); updated_at is when the row
+-- was last replaced.
+-- ──────────────────────────────────────────────────────────
+DELETE FROM public.emotion_analyses a
+USING public.emotion_analyses b
+WHERE a.source_type = b.source_type
+  AND a.source_id = b.source_id
+  AND (a.created_at, a.id) < (b.created_at, b.id);
+
+DROP INDEX IF EXISTS public.idx_emotions_source;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_emotions_source ON public.emotion_analyses(source_type, source_id);
+
+ALTER TABLE public.emotion_analyses
+  ADD COLUMN IF NOT EXISTS source_version TIMESTAMPTZ,
+  ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT now();
+
+-- Inserts or replaces the analysis for a source in one statement. The row is
+-- only replaced if it belongs to the same user and is not newer than
+-- p_source_version. Returns {"applied": bool, "analysis": row}; "analysis" is
+-- the row now stored (the newer one when this result was stale), or NULL when
+-- the source's analysis belongs to another user.
+CREATE OR REPLACE FUNCTION public.upsert_emotion_analysis(
+  p_user_id         UUID,
+  p_source_type     TEXT,
+  p_source_id       UUID,
+  p_source_version  TIMESTAMPTZ,
+  p_sentiment_score FLOAT,
+  p_emotions        JSONB,
+  p_primary_emotion TEXT
+)
+RETURNS JSONB AS $$
+DECLARE
+  v_row public.emotion_analyses%ROWTYPE;
+BEGIN
+  INSERT INTO public.emotion_analyses AS ea
+    (user_id, source_type, source_id, source_version, sentiment_score, emotions, primary_emotion)
+  VALUES
+    (p_user_id, p_source_type, p_source_id, p_source_version, p_sentiment_score, p_emotions, p_primary_emotion)
+  ON CONFLICT (source_type, source_id) DO UPDATE
+    SET source_version  = EXCLUDED.source_version,
+        sentiment_score = EXCLUDED.sentiment_score,
+        emotions        = EXCLUDED.emotions,
+        primary_emotion = EXCLUDED.primary_emotion,
+        updated_at      = now()
+    WHERE ea.user_id = EXCLUDED.user_id
+      AND (ea.source_version IS NULL OR ea.source_version <= EXCLUDED.source_version)
+  RETURNING * INTO v_row;
+
+  IF FOUND THEN
+    RETURN jsonb_build_object('applied', true, 'analysis', to_jsonb(v_row));
+  END IF;
+
+  SELECT * INTO v_row
+  FROM public.emotion_analyses
+  WHERE source_type = p_source_type AND source_id = p_source_id AND user_id = p_user_id;
+
+  RETURN jsonb_build_object('applied', false, 'analysis', CASE WHEN FOUND THEN to_jsonb(v_row) END);
+END;
+$$ LANGUAGE plpgsql;
+
+-- ──────────────────────────────────────────────────────────
+-- Durable job queue (Performance: post-write AI work survives restarts)
+-- Workers claim ready jobs with FOR UPDATE SKIP LOCKED under a lease; a job
+-- whose lease expires (crashed worker) is claimed again, or dead-lettered if that
+-- was its last attempt. Failures are retried with backoff until max_attempts,
+-- then kept as 'dead' for inspection.
+-- At most one *queued* job per idempotency_key: enqueueing the same key again
+-- replaces its payload instead of adding a duplicate. Finished jobs are deleted.
+-- Backend (service role) only: RLS on, no policies.
+-- ──────────────────────────────────────────────────────────
+CREATE TABLE IF NOT EXISTS public.jobs (
+  id              BIGSERIAL PRIMARY KEY,
+  kind            TEXT NOT NULL,
+  payload         JSONB NOT NULL DEFAULT '{}',
+  idempotency_key TEXT,
+  status          TEXT NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'dead')),
+  attempts        INT NOT NULL DEFAULT 0,
+  max_attempts    INT NOT NULL DEFAULT 5,
+  run_at          TIMESTAMPTZ NOT NULL DEFAULT now(),
+  locked_by       TEXT,
+  locked_until    TIMESTAMPTZ,
+  last_error      TEXT,
+  created_at      TIMESTAMPTZ NOT NULL DEFAULT now(),
+  finished_at     TIMESTAMPTZ
+);
+
+-- Lower runs first: interactive writes (0) ahead of bulk imports
+ALTER TABLE public.jobs ADD COLUMN IF NOT EXISTS priority INT NOT NULL DEFAULT 0;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_jobs_queued_key ON public.jobs(idempotency_key) WHERE status = 'queued';
+DROP INDEX IF EXISTS idx_jobs_ready;
+CREATE INDEX IF NOT EXISTS idx_jobs_ready_priority ON public.jobs(priority, run_at) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS idx_jobs_lease ON public.jobs(locked_until) WHERE status = 'running';
+
+ALTER TABLE public.jobs ENABLE ROW LEVEL SECURITY;
+
+-- p_jobs: [{"kind", "payload", "key", "max_attempts", "delay_s", "priority"}, ...]; keys
+-- must be distinct within one call. Returns the job ids (existing ids for merged keys);
+-- a merged job keeps the more urgent of the two priorities.
+CREATE OR REPLACE FUNCTION public.enqueue_jobs(p_jobs JSONB)
+RETURNS SETOF BIGINT AS $$
+  INSERT INTO public.jobs AS j (kind, payload, idempotency_key, max_attempts, run_at, priority)
+  SELECT item->>'kind',
+         COALESCE(item->'payload', '{}'::jsonb),
+         item->>'key',
+         COALESCE((item->>'max_attempts')::int, 5),
+         now() + make_interval(secs => COALESCE((item->>'delay_s')::float8, 0)),
+         COALESCE((item->>'priority')::int, 0)
+  FROM jsonb_array_elements(p_jobs) AS item
+  ON CONFLICT (idempotency_key) WHERE status = 'queued'
+  DO UPDATE SET payload = EXCLUDED.payload, max_attempts = EXCLUDED.max_attempts,
+                priority = LEAST(j.priority, EXCLUDED.priority)
+  RETURNING j.id;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION public.claim_jobs(p_worker TEXT, p_limit INT, p_lease_s INT)
+RETURNS TABLE (id BIGINT, kind TEXT, payload JSONB, attempts INT, max_attempts INT, waited_s FLOAT8) AS $$
+  -- A job whose lease expired on its last attempt (worker crashed or hung) is
+  -- dead-lettered instead of being claimed again forever
+  WITH expired AS (
+    SELECT q.id
+    FROM public.jobs q
+    WHERE q.status = 'running' AND q.locked_until < now() AND q.attempts >= q.max_attempts
+    FOR UPDATE SKIP LOCKED
+  )
+  UPDATE public.jobs j
+  SET status = 'dead',
+      last_error = 'Lease expired on the last attempt (worker crashed or hung)',
+      finished_at = now(),
+      locked_by = NULL,
+      locked_until = NULL
+  FROM expired
+  WHERE j.id = expired.id;
+
+  WITH ready AS (
+    SELECT q.id
+    FROM public.jobs q
+    WHERE (q.status = 'queued' AND q.run_at <= now())
+       OR (q.status = 'running' AND q.locked_until < now() AND q.attempts < q.max_attempts)
+    ORDER BY q.priority, q.run_at
+    LIMIT p_limit
+    FOR UPDATE SKIP LOCKED
+  )
+  UPDATE public.jobs j
+  SET status = 'running',
+      attempts = j.attempts + 1,
+      locked_by = p_worker,
+      locked_until = now() + make_interval(secs => p_lease_s)
+  FROM ready
+  WHERE j.id = ready.id
+  RETURNING j.id, j.kind, j.payload, j.attempts, j.max_attempts,
+            EXTRACT(EPOCH FROM now() - j.created_at)::float8;
+$$ LANGUAGE sql;
+
+-- Success deletes the job. A failure is re-queued after p_retry_in_s, unless it
+-- was the last attempt or p_dead (permanent error): then it is dead-lettered.
+-- A failed job whose key was queued again meanwhile is dropped (superseded).
+-- Returns 'done', 'retry', 'dead' or 'superseded'.
+CREATE OR REPLACE FUNCTION public.finish_job(
+  p_id         BIGINT,
+  p_error      TEXT DEFAULT NULL,
+  p_retry_in_s FLOAT8 DEFAULT 0,
+  p_dead       BOOLEAN DEFAULT FALSE
+)
+RETURNS TEXT AS $$
+DECLARE
+  v_job public.jobs%ROWTYPE;
+BEGIN
+  IF p_error IS NULL THEN
+    DELETE FROM public.jobs WHERE id = p_id;
+    RETURN 'done';
+  END IF;
+
+  SELECT * INTO v_job FROM public.jobs WHERE id = p_id FOR UPDATE;
+  IF NOT FOUND THEN
+    RETURN 'done';
+  END IF;
+
+  IF p_dead OR v_job.attempts >= v_job.max_attempts THEN
+    UPDATE public.jobs
+    SET status = 'dead', last_error = p_error, finished_at = now(), locked_by = NULL, locked_until = NULL
+    WHERE id = p_id;
+    RETURN 'dead';
+  END IF;
+
+  IF v_job.idempotency_key IS NOT NULL AND EXISTS (
+    SELECT 1 FROM public.jobs
+    WHERE idempotency_key = v_job.idempotency_key AND status = 'queued' AND id <> p_id
+  ) THEN
+    DELETE FROM public.jobs WHERE id = p_id;
+    RETURN 'superseded';
+  END IF;
+
+  UPDATE public.jobs
+  SET status = 'queued', last_error = p_error, locked_by = NULL, locked_until = NULL,
+      run_at = now() + make_interval(secs => p_retry_in_s)
+  WHERE id = p_id;
+  RETURN 'retry';
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION public.job_queue_stats()
+RETURNS JSONB AS $$
+  SELECT jsonb_build_object(
+    'ready',   count(*) FILTER (WHERE status = 'queued' AND run_at <= now()),
+    'delayed', count(*) FILTER (WHERE status = 'queued' AND run_at > now()),
+    'running', count(*) FILTER (WHERE status = 'running'),
+    'dead',    count(*) FILTER (WHERE status = 'dead'),
+    'oldest_ready_s', COALESCE(
+      EXTRACT(EPOCH FROM now() - min(run_at) FILTER (WHERE status = 'queued' AND run_at <= now())), 0
+    )
+  )
+  FROM public.jobs;
+$$ LANGUAGE sql;
+
+-- ──────────────────────────────────────────────────────────
+-- Journal analysis status (Performance: entries are saved before they are analyzed)
+-- pending → running → done | failed, driven by the "journal.analyze" job.
+-- Existing rows were analyzed inline, so they start as done.
+-- ──────────────────────────────────────────────────────────
+ALTER TABLE public.journal_entries ADD COLUMN IF NOT EXISTS analysis_status TEXT NOT NULL DEFAULT 'done';
+ALTER TABLE public.journal_entries ALTER COLUMN analysis_status SET DEFAULT 'pending';
+ALTER TABLE public.journal_entries DROP CONSTRAINT IF EXISTS journal_entries_analysis_status_check;
+ALTER TABLE public.journal_entries ADD CONSTRAINT journal_entries_analysis_status_check
+  CHECK (analysis_status IN ('pending', 'running', 'done', 'failed'));
+
+-- ──────────────────────────────────────────────────────────
+-- Chat → journal conversion (Performance: safe under job retries)
+-- Marks the session saved and inserts its journal entry in one transaction, so
+-- a crash can never leave a saved session without its entry (or the reverse).
+-- Returns the new entry, or NULL when the session is already saved (or not the
+-- user's).
+-- ──────────────────────────────────────────────────────────
+CREATE OR REPLACE FUNCTION public.save_session_journal(
+  p_user_id    UUID,
+  p_session_id UUID,
+  p_title      TEXT,
+  p_content    TEXT,
+  p_word_count INT
+)
+RETURNS JSONB AS $$
+DECLARE
+  v_entry public.journal_entries%ROWTYPE;
+BEGIN
+  UPDATE public.chat_sessions
+  SET saved = TRUE
+  WHERE id = p_session_id AND user_id = p_user_id AND saved IS NOT TRUE;
+  IF NOT FOUND THEN
+    RETURN NULL;
+  END IF;
+
+  INSERT INTO public.journal_entries (user_id, title, content, word_count, analysis_status)
+  VALUES (p_user_id, p_title, p_content, p_word_count, 'pending')
+  RETURNING * INTO v_entry;
+  RETURN to_jsonb(v_entry);
+END;
+$$ LANGUAGE plpgsql;
@@ -4,16 +4,16 @@ Mocks out Supabase and Groq so tests run without real credentials.
 """
 
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 
 @pytest.fixture
 def mock_groq_client():
-    """Return a MagicMock that quacks like a Groq client."""
+    """Return a MagicMock that quacks like an AsyncGroq client (awaitable create())."""
     client = MagicMock()
-    client.chat.completions.create.return_value = MagicMock(
+    client.chat.completions.create = AsyncMock(return_value=MagicMock(
         choices=[MagicMock(message=MagicMock(content='{"emotions": {"joy": 0.9}, "primary_emotion": "joy"}'))]
-    )
+    ))
     return client
 
 
@@ -27,3 +27,19 @@ def mock_supabase():
     )
     client.table.return_value.select.return_value.eq.return_value.execute.return_value = MagicMock(data=[])
     return client
+
+
+@pytest.fixture(autouse=True)
+def closed_llm_breakers():
+    """Every test starts with the model tiers' circuit breakers closed."""
+    from app.services import model_router
+
+    def reset():
+        for name, breaker in model_router._breakers.items():
+            model_router._breakers[name] = type(breaker)(
+                breaker.name, breaker._failure_threshold, breaker._cooldown_s
+            )
+
+    reset()
+    yield
+    reset()
@@ -0,0 +1,135 @@
+"""
+Tests for app/services/ai_client.py
+
+Covers:
+- Default and per-call timeouts are forwarded to the SDK
+- The global semaphore caps concurrent LLM calls
+- Errors and timeouts are counted and release their slot
+- Streams yield deltas and always close the upstream response
+"""
+
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+from groq import APITimeoutError
+
+from app.config import Settings
+from app.services import ai_client
+
+
+@pytest.fixture
+def limited_settings():
+    settings = Settings(llm_max_concurrency=2, llm_timeout_s=30.0)
+    with patch("app.services.ai_client.get_settings", return_value=settings):
+        ai_client._limiter = None
+        for key in ai_client._stats:
+            ai_client._stats[key] = 0
+        yield settings
+        ai_client._limiter = None
+
+
+class TestChatCompletion:
+    @pytest.mark.asyncio
+    async def test_forwards_default_and_override_timeouts(self, limited_settings, mock_groq_client):
+        with patch("app.services.ai_client.get_groq_client", return_value=mock_groq_client):
+            await ai_client.chat_completion(model="m", messages=[])
+            await ai_client.chat_completion(model="m", messages=[], timeout=5.0)
+
+        calls = mock_groq_client.chat.completions.create.call_args_list
+        assert calls[0].kwargs["timeout"] == 30.0
+        assert calls[1].kwargs["timeout"] == 5.0
+
+    @pytest.mark.asyncio
+    async def test_caps_concurrent_calls(self, limited_settings):
+        running = 0
+        peak = 0
+
+        async def slow_create(**kwargs):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return MagicMock()
+
+        client = MagicMock()
+        client.chat.completions.create = slow_create
+        with patch("app.services.ai_client.get_groq_client", return_value=client):
+            await asyncio.gather(*(ai_client.chat_completion(model="m", messages=[]) for _ in range(6)))
+
+        assert peak == 2
+        stats = ai_client.get_llm_stats()
+        assert (stats["calls"], stats["in_flight"], stats["waiting"]) == (6, 0, 0)
+
+    @pytest.mark.asyncio
+    async def test_counts_failures_and_releases_slot(self, limited_settings, mock_groq_client):
+        request = httpx.Request("POST", "https://api.groq.com")
+        mock_groq_client.chat.completions.create.side_effect = [
+            APITimeoutError(request=request),
+            RuntimeError("boom"),
+            MagicMock(),
+        ]
+        with patch("app.services.ai_client.get_groq_client", return_value=mock_groq_client):
+            with pytest.raises(APITimeoutError):
+                await ai_client.chat_completion(model="m", messages=[])
+            with pytest.raises(RuntimeError):
+                await ai_client.chat_completion(model="m", messages=[])
+            await ai_client.chat_completion(model="m", messages=[])
+
+        stats = ai_client.get_llm_stats()
+        assert (stats["timeouts"], stats["errors"], stats["in_flight"]) == (1, 1, 0)
+
+
+class _FakeStream:
+    """Async-iterable stand-in for groq.AsyncStream."""
+
+    def __init__(self, deltas, hang=False):
+        self._deltas = deltas
+        self._hang = hang
+        self.closed = False
+
+    async def __aiter__(self):
+        for delta in self._deltas:
+            yield MagicMock(choices=[MagicMock(delta=MagicMock(content=delta))])
+        if self._hang:
+            await asyncio.Event().wait()
+
+    async def close(self):
+        self.closed = True
+
+
+class TestStreamChatCompletion:
+    @pytest.mark.asyncio
+    async def test_yields_content_deltas(self, limited_settings, mock_groq_client):
+        stream = _FakeStream(["Hel", None, "lo"])
+        mock_groq_client.chat.completions.create.return_value = stream
+
+        with patch("app.services.ai_client.get_groq_client", return_value=mock_groq_client):
+            deltas = [d async for d in ai_client.stream_chat_completion(model="m", messages=[])]
+
+        assert deltas == ["Hel", "lo"]
+        assert stream.closed
+        assert mock_groq_client.chat.completions.create.call_args.kwargs["stream"] is True
+
+    @pytest.mark.asyncio
+    async def test_cancel_closes_upstream_and_frees_slot(self, limited_settings, mock_groq_client):
+        stream = _FakeStream(["a"], hang=True)
+        mock_groq_client.chat.completions.create.return_value = stream
+
+        async def consume():
+            async for _ in ai_client.stream_chat_completion(model="m", messages=[]):
+                pass
+
+        with patch("app.services.ai_client.get_groq_client", return_value=mock_groq_client):
+            task = asyncio.create_task(consume())
+            await asyncio.sleep(0.01)
+            assert ai_client.get_llm_stats()["in_flight"] == 1
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        assert stream.closed
+        assert ai_client.get_llm_stats()["in_flight"] == 0
+
@@ -0,0 +1,120 @@
+"""
+Tests for app/services/background.py
+
+Covers:
+- Jobs run on the workers and are counted
+- Failures are isolated and counted
+- Concurrency is capped and starts are rate limited
+- Jobs are rejected when the workers aren't running or the queue is full
+- Jobs run in the context they were queued from (LLM telemetry attribution)
+"""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+
+from app.config import Settings
+from app.services import background, llm_telemetry
+
+
+@pytest_asyncio.fixture
+async def workers():
+    settings = Settings(background_concurrency=2, background_queue_size=3, background_rate_per_s=0)
+    with patch("app.services.background.get_settings", return_value=settings):
+        for key in background._stats:
+            background._stats[key] = 0
+        await background.start_background_workers()
+        yield settings
+        await background.stop_background_workers()
+
+
+class TestBackgroundWorkers:
+    @pytest.mark.asyncio
+    async def test_runs_jobs_and_isolates_failures(self, workers):
+        done = []
+
+        async def ok():
+            done.append(1)
+
+        async def boom():
+            raise RuntimeError("llm down")
+
+        assert background.enqueue("ok", ok)
+        assert background.enqueue("boom", boom)
+        await background.drain()
+
+        stats = background.get_background_stats()
+        assert done == [1]
+        assert (stats["completed"], stats["failed"]) == (1, 1)
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_capped(self, workers):
+        running = 0
+        peak = 0
+
+        async def job():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        for _ in range(3):
+            background.enqueue("job", job)
+        await background.drain()
+
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_full(self, workers):
+        gate = asyncio.Event()
+
+        async def blocked():
+            await gate.wait()
+
+        # 2 picked up by workers + 3 waiting fill the queue
+        results = []
+        for _ in range(6):
+            results.append(background.enqueue("blocked", blocked))
+            await asyncio.sleep(0)
+        gate.set()
+        await background.drain()
+
+        assert results.count(False) == 1
+        assert background.get_background_stats()["rejected"] == 1
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_spaces_job_starts(self, workers):
+        workers.background_rate_per_s = 50
+        starts = []
+
+        async def job():
+            starts.append(time.monotonic())
+
+        for _ in range(3):
+            background.enqueue("job", job)
+        await background.drain()
+
+        assert starts[-1] - starts[0] >= 2 / 50 * 0.9
+
+    def test_enqueue_without_workers_is_rejected(self):
+        assert background.enqueue("job", lambda: None) is False
+
+
+class TestJobContext:
+    @pytest.mark.asyncio
+    async def test_job_runs_in_enqueuers_context(self, workers):
+        seen = []
+
+        async def job():
+            seen.append(llm_telemetry.current_user())
+
+        with llm_telemetry.attributed("u1"):
+            background.enqueue("attributed", job)
+        background.enqueue("anonymous", job)
+        await asyncio.wait_for(background.drain(), 1)
+
+        assert sorted(seen, key=str) == [None, "u1"]
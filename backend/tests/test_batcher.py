@@ -0,0 +1,122 @@
+"""
+Tests for app/services/batcher.py and batched emotion analysis
+
+Covers:
+- A batch flushes when it reaches max_items, or after max_wait_ms
+- A failed slot (or a failed handler) only fails its own callers
+- Batched emotion prompt fans results back out by id
+- A batch of one uses the single-text prompt
+"""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.services import emotion_service
+from app.services.batcher import MicroBatcher
+
+
+def _batcher(handler, max_items=4, max_wait_ms=20):
+    return MicroBatcher("test", handler, lambda: max_items, lambda: max_wait_ms)
+
+
+def _completion(content, tokens=100):
+    response = MagicMock()
+    response.choices = [MagicMock()]
+    response.choices[0].message.content = content
+    response.usage.total_tokens = tokens
+    return response
+
+
+class TestMicroBatcher:
+    @pytest.mark.asyncio
+    async def test_flushes_on_size(self):
+        calls = []
+
+        async def handler(items):
+            calls.append(items)
+            return [i * 2 for i in items]
+
+        batcher = _batcher(handler, max_items=3, max_wait_ms=10_000)
+        results = await asyncio.wait_for(asyncio.gather(*(batcher.submit(i) for i in range(3))), 1)
+
+        assert results == [0, 2, 4]
+        assert calls == [[0, 1, 2]]
+
+    @pytest.mark.asyncio
+    async def test_flushes_on_timer(self):
+        calls = []
+
+        async def handler(items):
+            calls.append(items)
+            return items
+
+        batcher = _batcher(handler, max_items=100, max_wait_ms=10)
+        assert await asyncio.gather(batcher.submit("a"), batcher.submit("b")) == ["a", "b"]
+        assert calls == [["a", "b"]]
+        stats = batcher.stats()
+        assert stats["batches"] == 1 and stats["items"] == 2 and stats["avg_batch"] == 2
+
+    @pytest.mark.asyncio
+    async def test_exception_slot_fails_only_that_caller(self):
+        async def handler(items):
+            return [ValueError("bad") if item == "x" else item for item in items]
+
+        batcher = _batcher(handler, max_items=2)
+        ok, bad = await asyncio.gather(batcher.submit("a"), batcher.submit("x"), return_exceptions=True)
+
+        assert ok == "a"
+        assert isinstance(bad, ValueError)
+        assert batcher.stats()["failed_items"] == 1
+
+    @pytest.mark.asyncio
+    async def test_handler_failure_fails_whole_batch(self):
+        async def handler(items):
+            raise RuntimeError("down")
+
+        batcher = _batcher(handler, max_items=2)
+        results = await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    @pytest.mark.asyncio
+    async def test_tokens_per_item(self):
+        batcher = _batcher(AsyncMock(return_value=[1, 2]), max_items=2)
+        await asyncio.gather(batcher.submit(1), batcher.submit(2))
+        batcher.add_tokens(300)
+        batcher.add_tokens(None)
+        assert batcher.stats()["tokens_per_item"] == 150
+
+
+class TestBatchedEmotions:
+    @pytest.mark.asyncio
+    async def test_batch_fans_out_by_id(self):
+        reply = json.dumps({"results": [
+            {"id": "1", "emotions": {"Sad": 0.9}, "primary_emotion": "Sad"},
+            {"id": "0", "emotions": {"Joyful": 0.8}, "primary_emotion": "Joyful"},
+        ]})
+        mock_call = AsyncMock(return_value=_completion(reply))
+
+        with patch("app.services.model_router.chat_completion", mock_call):
+            results = await emotion_service._analyze_batch([("great day", "u1"), ("awful day", "u2"), ("meh", None)])
+
+        assert mock_call.await_count == 1
+        sent = json.loads(mock_call.call_args.kwargs["messages"][1]["content"])
+        assert [item["id"] for item in sent] == ["0", "1", "2"]
+        assert results[0]["primary_emotion"] == "Joyful"
+        assert results[1]["primary_emotion"] == "Sad"
+        # Item 2 was missing from the reply: only that slot fails
+        assert isinstance(results[2], ValueError)
+
+    @pytest.mark.asyncio
+    async def test_single_item_uses_single_prompt(self):
+        reply = json.dumps({"emotions": {"Calm": 0.7}, "primary_emotion": "Calm"})
+        mock_call = AsyncMock(return_value=_completion(reply))
+
+        with patch("app.services.model_router.chat_completion", mock_call):
+            results = await emotion_service._analyze_batch([("quiet evening", "u1")])
+
+        assert results[0]["primary_emotion"] == "Calm"
+        system = mock_call.call_args.kwargs["messages"][0]["content"]
+        assert system == emotion_service.EMOTION_SYSTEM_PROMPT
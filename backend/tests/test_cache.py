@@ -0,0 +1,333 @@
+"""
+Tests for app/services/cache.py (in-memory stand-in backend)
+
+Covers:
+- Read-through: first read misses and loads, second read hits
+- Per-user versioned invalidation
+- Backend selection: bounded in-memory stand-in in development, pass-through elsewhere
+- Decorator keys normalise positional / keyword arguments
+- Backend failures fall through to the loader
+- Journal reads are cached and invalidated by writes
+- Local LRU/TTL tier: bounds, expiry, per-user eviction, pub/sub invalidation
+- Content-addressed LLM cache: normalised keys, prompt versions, single-flight
+"""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+import pytest_asyncio
+
+from app.config import Settings
+from app.services import cache
+
+
+@pytest_asyncio.fixture
+async def memory_cache():
+    """Initialise the in-memory backend (no Redis URL configured)."""
+    with patch("app.services.cache.get_settings", return_value=Settings(upstash_redis_url="")):
+        await cache.init_cache()
+        cache._stats.clear()
+        yield cache._backend
+        await cache.close_cache()
+        cache._stats.clear()
+
+
+class TestReadThrough:
+    @pytest.mark.asyncio
+    async def test_bypasses_cache_when_not_initialised(self):
+        loader = AsyncMock(return_value=[1])
+        assert await cache.cached("u1", "ns", "k", loader) == [1]
+        assert await cache.cached("u1", "ns", "k", loader) == [1]
+        assert loader.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_second_read_hits(self, memory_cache):
+        loader = AsyncMock(return_value={"a": 1})
+        assert await cache.cached("u1", "ns", "k", loader) == {"a": 1}
+        assert await cache.cached("u1", "ns", "k", loader) == {"a": 1}
+
+        loader.assert_awaited_once()
+        stats = cache.get_cache_stats()
+        assert stats["backend"] == "memory"
+        assert (stats["hits"], stats["misses"]) == (1, 1)
+        assert stats["by_namespace"]["ns"]["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_invalidate_user_only_affects_that_user(self, memory_cache):
+        loader = AsyncMock(return_value="v")
+        await cache.cached("u1", "ns", "k", loader)
+        await cache.cached("u2", "ns", "k", loader)
+
+        await cache.invalidate_user("u1")
+        await cache.cached("u1", "ns", "k", loader)
+        await cache.cached("u2", "ns", "k", loader)
+
+        # u1 reloaded after invalidation, u2 still served from cache
+        assert loader.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_backend_failure_falls_through(self, memory_cache):
+        memory_cache.get = AsyncMock(side_effect=ConnectionError("redis down"))
+        loader = AsyncMock(return_value=42)
+
+        assert await cache.cached("u1", "ns", "k", loader) == 42
+        assert cache.get_cache_stats()["errors"] == 1
+
+
+class TestBackendSelection:
+    @pytest.mark.asyncio
+    async def test_memory_backend_is_bounded(self):
+        settings = Settings(upstash_redis_url="", cache_local_max_entries=3)
+        with patch("app.services.cache.get_settings", return_value=settings):
+            await cache.init_cache()
+            try:
+                # Each invalidation orphans the previous version's keys
+                for i in range(10):
+                    await cache.cached("u1", "ns", "k", AsyncMock(return_value=i))
+                    await cache.invalidate_user("u1")
+                stats = cache.get_cache_stats()["memory"]
+                assert stats["entries"] <= 3
+                assert stats["evictions"] >= 7
+                # Version counters are never evicted, so old versions can't come back
+                assert await cache.cached("u1", "ns", "k", AsyncMock(return_value="fresh")) == "fresh"
+            finally:
+                await cache.close_cache()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("url", ["", "https://eu1-example.upstash.io"])
+    async def test_no_redis_outside_development_passes_through(self, url):
+        settings = Settings(environment="production", upstash_redis_url=url)
+        with patch("app.services.cache.get_settings", return_value=settings):
+            await cache.init_cache()
+            try:
+                assert cache._backend is None
+                loader = AsyncMock(return_value=[1])
+                await cache.cached("u1", "ns", "k", loader)
+                await cache.cached("u1", "ns", "k", loader)
+                assert loader.await_count == 2
+                # LLM results are immutable, so their per-worker cache stays on
+                assert cache._content_local is not None
+            finally:
+                await cache.close_cache()
+
+
+class TestLocalCache:
+    def test_lru_evicts_least_recently_used(self):
+        local = cache.LocalCache(max_entries=2, max_bytes=1024, ttl_s=60)
+        local.set("u1", "a", "1", 60, local.generation)
+        local.set("u1", "b", "2", 60, local.generation)
+        local.get("a")
+        local.set("u1", "c", "3", 60, local.generation)
+
+        assert local.get("b") is None
+        assert local.get("a") == "1"
+        assert local.stats()["evictions"] == 1
+
+    def test_byte_bound(self):
+        local = cache.LocalCache(max_entries=100, max_bytes=10, ttl_s=60)
+        local.set("u1", "a", "x" * 6, 60, local.generation)
+        local.set("u1", "b", "y" * 6, 60, local.generation)
+
+        assert local.get("a") is None
+        assert local.stats()["bytes"] == 6
+
+    def test_entries_expire(self):
+        local = cache.LocalCache(max_entries=10, max_bytes=1024, ttl_s=60)
+        local.set("u1", "a", "1", 60, local.generation)
+        with patch("app.services.cache.time.monotonic", return_value=time.monotonic() + 61):
+            assert local.get("a") is None
+        assert local.stats()["expirations"] == 1
+
+    def test_drop_user_and_stale_set(self):
+        local = cache.LocalCache(max_entries=10, max_bytes=1024, ttl_s=60)
+        local.set("u1", "u1:a", "1", 60, local.generation)
+        local.set("u2", "u2:a", "2", 60, local.generation)
+        generation = local.generation
+
+        local.drop_user("u1")
+        # A load that started before the invalidation must not repopulate the tier
+        local.set("u1", "u1:a", "stale", 60, generation)
+
+        assert local.get("u1:a") is None
+        assert local.get("u2:a") == "2"
+        assert local.stats()["invalidations"] == 1
+
+
+@pytest_asyncio.fixture
+async def two_tier_cache(memory_cache):
+    """Memory backend standing in for Redis, with a local tier in front of it."""
+    memory_cache.publish = AsyncMock()
+    cache._local = cache.LocalCache(max_entries=100, max_bytes=1 << 20, ttl_s=30)
+    yield memory_cache
+    cache._local = None
+
+
+class TestTwoTier:
+    @pytest.mark.asyncio
+    async def test_local_hit_skips_shared_tier(self, two_tier_cache):
+        loader = AsyncMock(return_value=[1, 2])
+        await cache.cached("u1", "ns", "k", loader)
+        two_tier_cache.get = AsyncMock(side_effect=AssertionError("shared tier read"))
+
+        assert await cache.cached("u1", "ns", "k", loader) == [1, 2]
+        assert cache.get_cache_stats()["local_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_invalidate_evicts_locally_and_publishes(self, two_tier_cache):
+        loader = AsyncMock(return_value="v")
+        await cache.cached("u1", "ns", "k", loader)
+
+        await cache.invalidate_user("u1")
+        two_tier_cache.publish.assert_awaited_once_with(cache.INVALIDATION_CHANNEL, "u1")
+
+        await cache.cached("u1", "ns", "k", loader)
+        assert loader.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_listener_applies_remote_invalidations(self, two_tier_cache):
+        published = asyncio.Event()
+
+        async def subscribe(channel):
+            yield None
+            await published.wait()
+            yield "u1"
+            await asyncio.Event().wait()
+
+        two_tier_cache.subscribe = subscribe
+        task = asyncio.create_task(cache._listen_for_invalidations())
+        await asyncio.sleep(0.01)
+
+        loader = AsyncMock(return_value="v")
+        await cache.cached("u1", "ns", "k", loader)
+        await cache.cached("u2", "ns", "k", loader)
+        published.set()
+        await asyncio.sleep(0.01)
+        task.cancel()
+
+        assert cache._local.get("u1:ns:k") is None
+        assert cache._local.get("u2:ns:k") == '"v"'
+
+
+class TestUserCachedDecorator:
+    @pytest.mark.asyncio
+    async def test_positional_and_keyword_calls_share_a_key(self, memory_cache):
+        calls = []
+
+        @cache.user_cached("test:list")
+        async def list_things(user_id: str, limit: int = 20, offset: int = 0):
+            calls.append((limit, offset))
+            return [limit, offset]
+
+        await list_things("u1", 20)
+        await list_things("u1", limit=20, offset=0)
+        await list_things(user_id="u1")
+        await list_things("u1", 10)
+
+        assert calls == [(20, 0), (10, 0)]
+
+
+class TestJournalCaching:
+    @pytest.mark.asyncio
+    async def test_write_invalidates_cached_list(self, memory_cache):
+        select = MagicMock()
+        select.eq.return_value = select
+        select.order.return_value = select
+        select.range.return_value = select
+        select.execute.return_value = MagicMock(data=[{"id": "e1"}])
+        supabase = MagicMock()
+        supabase.table.return_value.select.return_value = select
+        supabase.table.return_value.delete.return_value.eq.return_value.eq.return_value.execute.return_value = (
+            MagicMock(data=[{"id": "e1"}])
+        )
+
+        with patch("app.services.journal_service.get_supabase_client", return_value=supabase):
+            from app.services.journal_service import delete_entry, get_entries
+            await get_entries("u1")
+            await get_entries("u1")
+            assert select.execute.call_count == 1
+
+            await delete_entry("u1", "e1")
+            await get_entries("u1")
+            assert select.execute.call_count == 2
+
+
+class TestContentCached:
+    @pytest.mark.asyncio
+    async def test_identical_text_loads_once(self, memory_cache):
+        loader = AsyncMock(return_value={"tags": ["Calm"]})
+        v = cache.prompt_version("prompt", 0.3)
+
+        first = await cache.content_cached("llm:test", "m", v, "A calm  day.\n", loader)
+        second = await cache.content_cached("llm:test", "m", v, " A calm day.", loader)
+
+        assert first == second == {"tags": ["Calm"]}
+        loader.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_prompt_or_model_change_misses(self, memory_cache):
+        loader = AsyncMock(return_value="r")
+        await cache.content_cached("llm:test", "m", cache.prompt_version("p1"), "text", loader)
+        await cache.content_cached("llm:test", "m", cache.prompt_version("p2"), "text", loader)
+        await cache.content_cached("llm:test", "m2", cache.prompt_version("p2"), "text", loader)
+
+        assert loader.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_calls_share_one_load(self, memory_cache):
+        calls = 0
+
+        async def slow():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return [1]
+
+        results = await asyncio.gather(
+            *(cache.content_cached("llm:test", "m", "v", "same", slow) for _ in range(5))
+        )
+
+        assert results == [[1]] * 5
+        assert calls == 1
+        assert cache.get_cache_stats()["by_namespace"]["llm:test"]["coalesced"] == 4
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_coalesce_during_shared_tier_read(self, memory_cache):
+        async def slow_get(key):
+            await asyncio.sleep(0.01)
+            return None
+
+        redis = MagicMock(spec=cache.RedisBackend)
+        redis.get = slow_get
+        redis.set = AsyncMock()
+        loader = AsyncMock(return_value={"tags": ["Calm"]})
+
+        with patch("app.services.cache._backend", redis):
+            results = await asyncio.gather(
+                cache.content_cached("llm:test", "m", "v", "same", loader),
+                cache.content_cached("llm:test", "m", "v", "same", loader),
+            )
+
+        assert results == [{"tags": ["Calm"]}] * 2
+        loader.assert_awaited_once()
+        redis.set.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_failures_are_not_cached(self, memory_cache):
+        loader = AsyncMock(side_effect=[RuntimeError("llm down"), "ok"])
+
+        with pytest.raises(RuntimeError):
+            await cache.content_cached("llm:test", "m", "v", "text", loader)
+        assert await cache.content_cached("llm:test", "m", "v", "text", loader) == "ok"
+
+    @pytest.mark.asyncio
+    async def test_emotion_analysis_calls_llm_once_per_text(self, memory_cache, mock_groq_client):
+        from app.services.emotion_service import analyze_emotions_with_ai
+
+        with patch("app.services.ai_client.get_groq_client", return_value=mock_groq_client):
+            await analyze_emotions_with_ai("Such a good day")
+            await analyze_emotions_with_ai("Such a good day")
+
+        mock_groq_client.chat.completions.create.assert_awaited_once()
+
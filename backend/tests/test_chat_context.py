@@ -0,0 +1,153 @@
+"""
+Tests for app/services/chat_context.py
+
+Covers:
+- Context = system prompt + summary + newest messages within the token budget
+- Folds are queued only once enough messages aged out, one per session
+- Folding summarises the oldest unsummarized messages and advances the cursor
+  under a summary_version guard
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.config import get_settings
+from app.services import chat_context
+
+
+def _msg(i, role="user", content=None):
+    return {
+        "id": f"00000000-0000-0000-0000-{i:012d}",
+        "role": role,
+        "content": content or f"message {i}",
+        "created_at": f"2024-01-01T00:00:{i:02d}+00:00",
+    }
+
+
+def _completion(text):
+    response = MagicMock()
+    response.choices = [MagicMock()]
+    response.choices[0].message.content = text
+    return response
+
+
+class TestBuildMessages:
+    def test_summary_follows_system_prompt(self):
+        messages = chat_context.build_messages("SYS", "User is stressed about exams.", [_msg(1)])
+
+        assert messages[0] == {"role": "system", "content": "SYS"}
+        assert messages[1]["role"] == "system" and "stressed about exams" in messages[1]["content"]
+        assert messages[2] == {"role": "user", "content": "message 1"}
+
+    def test_budget_drops_oldest_first(self):
+        settings = get_settings()
+        saved = settings.chat_context_token_budget
+        settings.chat_context_token_budget = 60
+        try:
+            history = [_msg(i, content="x" * 80) for i in range(5)]  # ~21 tokens each
+            messages = chat_context.build_messages("SYS", None, history)
+        finally:
+            settings.chat_context_token_budget = saved
+
+        assert [m["content"] for m in messages[1:]] == ["x" * 80] * 2
+        assert len(messages) == 3
+
+    def test_newest_message_always_sent(self):
+        settings = get_settings()
+        saved = settings.chat_context_token_budget
+        settings.chat_context_token_budget = 1
+        try:
+            messages = chat_context.build_messages("SYS", None, [_msg(1), _msg(2, content="y" * 400)])
+        finally:
+            settings.chat_context_token_budget = saved
+
+        assert messages[1:] == [{"role": "user", "content": "y" * 400}]
+
+    def test_non_ascii_costs_more(self):
+        assert chat_context.estimate_tokens("आज बहुत थकान है") > chat_context.estimate_tokens("I am so tired")
+
+
+class TestScheduleFold:
+    def test_below_threshold_does_nothing(self):
+        with patch("app.services.chat_context.background.enqueue") as enqueue:
+            chat_context.schedule_fold("s1", chat_context.history_limit() - 1)
+        enqueue.assert_not_called()
+
+    def test_one_job_per_session(self):
+        with patch("app.services.chat_context.background.enqueue", return_value=True) as enqueue:
+            chat_context.schedule_fold("s1", chat_context.history_limit())
+            chat_context.schedule_fold("s1", chat_context.history_limit() + 2)
+        try:
+            assert enqueue.call_count == 1
+        finally:
+            chat_context._folding.discard("s1")
+
+    def test_rejected_job_can_be_retried(self):
+        with patch("app.services.chat_context.background.enqueue", return_value=False):
+            chat_context.schedule_fold("s1", chat_context.history_limit())
+        assert "s1" not in chat_context._folding
+
+
+class TestFoldSessionSummary:
+    def _supabase(self, state, messages, updated=True):
+        supabase = MagicMock()
+        run = AsyncMock(side_effect=[
+            MagicMock(data=[state]),
+            MagicMock(data=messages),
+            MagicMock(data=[{"id": "s1"}] if updated else []),
+        ])
+        return supabase, run
+
+    @pytest.mark.asyncio
+    async def test_folds_oldest_and_advances_cursor(self):
+        state = {"summary": "Earlier: work stress.", "summary_through_at": "2024-01-01T00:00:00+00:00",
+                 "summary_through_id": "00000000-0000-0000-0000-000000000000", "summary_version": 3}
+        supabase, run = self._supabase(state, [_msg(1), _msg(2, role="assistant")])
+        llm = AsyncMock(return_value=_completion("Work stress, then a good talk."))
+        unsummarized = chat_context.recent_messages() + 2
+
+        with patch("app.services.chat_context.get_supabase_client", return_value=supabase), \
+             patch("app.services.chat_context.run_query", run), \
+             patch("app.services.chat_context.routed_completion", llm):
+            assert await chat_context.fold_session_summary("s1", unsummarized) is True
+
+        # Only the messages older than the recent window are read, after the cursor
+        messages_query = supabase.table.return_value.select.return_value.eq.return_value
+        assert "00000000-0000-0000-0000-000000000000" in messages_query.or_.call_args.args[0]
+        messages_query.or_.return_value.order.return_value.order.return_value.limit.assert_called_once_with(2)
+
+        prompt = llm.call_args.kwargs["messages"][1]["content"]
+        assert "Earlier: work stress." in prompt and "Assistant: message 2" in prompt
+
+        update = supabase.table.return_value.update
+        assert update.call_args.args[0] == {
+            "summary": "Work stress, then a good talk.",
+            "summary_through_at": _msg(2)["created_at"],
+            "summary_through_id": _msg(2)["id"],
+            "summary_version": 4,
+        }
+        update.return_value.eq.return_value.eq.assert_called_once_with("summary_version", 3)
+
+    @pytest.mark.asyncio
+    async def test_concurrent_update_loses(self):
+        state = {"summary": None, "summary_through_at": None, "summary_through_id": None, "summary_version": 0}
+        supabase, run = self._supabase(state, [_msg(1)], updated=False)
+
+        with patch("app.services.chat_context.get_supabase_client", return_value=supabase), \
+             patch("app.services.chat_context.run_query", run), \
+             patch("app.services.chat_context.routed_completion", AsyncMock(return_value=_completion("s"))):
+            assert await chat_context.fold_session_summary("s1", chat_context.recent_messages() + 1) is False
+
+    @pytest.mark.asyncio
+    async def test_nothing_to_fold_skips_llm(self):
+        state = {"summary": None, "summary_through_at": None, "summary_through_id": None, "summary_version": 0}
+        supabase, run = self._supabase(state, [])
+        llm = AsyncMock()
+
+        with patch("app.services.chat_context.get_supabase_client", return_value=supabase), \
+             patch("app.services.chat_context.run_query", run), \
+             patch("app.services.chat_context.routed_completion", llm):
+            assert await chat_context.fold_session_summary("s1", chat_context.recent_messages()) is False
+
+        llm.assert_not_called()
@@ -0,0 +1,135 @@
+"""
+Tests for app/models/database.py
+
+Covers:
+- Shared client: one instance per process, reused across calls
+- Shutdown closes the pool and resets the client
+- Pool stats shape, and a fallback when httpx internals move
+- run_query: slow queries run concurrently and never block the event loop
+"""
+
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.config import Settings
+from app.models import database
+
+
+@pytest.fixture
+def settings():
+    """Settings pointing at a local, never-contacted Supabase URL."""
+    s = Settings(
+        supabase_url="http://localhost:54321",
+        supabase_service_key="test-key",
+        supabase_pool_size=7,
+        supabase_pool_keepalive=3,
+    )
+    with patch("app.models.database.get_settings", return_value=s):
+        yield s
+    database.close_supabase_client()
+
+
+class TestSharedClient:
+    def test_returns_same_instance(self, settings):
+        first = database.get_supabase_client()
+        second = database.get_supabase_client()
+        assert first is second
+
+    def test_postgrest_uses_pooled_http_client(self, settings):
+        client = database.get_supabase_client()
+        assert client.postgrest.session is database._http_client
+
+    def test_close_resets_client(self, settings):
+        first = database.init_supabase_client()
+        database.close_supabase_client()
+        assert database._client is None
+        second = database.get_supabase_client()
+        assert second is not first
+
+
+class TestPoolStats:
+    def test_stats_before_init(self, settings):
+        database.close_supabase_client()
+        stats = database.get_pool_stats()
+        assert stats["initialized"] is False
+        assert stats["connections"] == 0
+
+    def test_stats_reflect_configured_limits(self, settings):
+        database.init_supabase_client()
+        stats = database.get_pool_stats()
+        assert stats["initialized"] is True
+        assert stats["max_connections"] == 7
+        assert stats["max_keepalive"] == 3
+        assert stats["active"] + stats["idle"] == stats["connections"]
+
+    def test_stats_survive_httpx_internals_changing(self, settings):
+        database.init_supabase_client()
+        with patch.object(database._http_client, "_transport", object()):
+            stats = database.get_pool_stats()
+        assert stats["initialized"] is True
+        assert stats["connections"] == 0
+
+
+# ── run_query (non-blocking execution) ─────────────────────────────────────
+
+SLOW_QUERY_S = 0.2
+
+
+def _slow_query(result="ok"):
+    """A query builder whose blocking .execute() takes SLOW_QUERY_S seconds."""
+    query = MagicMock()
+
+    def execute():
+        time.sleep(SLOW_QUERY_S)
+        return MagicMock(data=[result])
+
+    query.execute.side_effect = execute
+    return query
+
+
+class TestRunQuery:
+    @pytest.mark.asyncio
+    async def test_returns_execute_result(self, settings):
+        result = await database.run_query(_slow_query("row"))
+        assert result.data == ["row"]
+
+    @pytest.mark.asyncio
+    async def test_parallel_slow_queries_take_about_one_query_time(self, settings):
+        n = 5  # below the configured pool size of 7
+        start = time.perf_counter()
+        results = await asyncio.gather(*(database.run_query(_slow_query(i)) for i in range(n)))
+        elapsed = time.perf_counter() - start
+
+        assert [r.data[0] for r in results] == list(range(n))
+        # Serial execution would take n * SLOW_QUERY_S = 1.0s
+        assert elapsed < SLOW_QUERY_S * 2
+
+    @pytest.mark.asyncio
+    async def test_event_loop_keeps_running_during_query(self, settings):
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        await database.run_query(_slow_query())
+        task.cancel()
+
+        # A blocking .execute() on the loop would leave the ticker at 0
+        assert ticks >= 5
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded_by_pool_size(self, settings):
+        settings.supabase_pool_size = 2
+        start = time.perf_counter()
+        await asyncio.gather(*(database.run_query(_slow_query()) for _ in range(4)))
+        elapsed = time.perf_counter() - start
+
+        # 4 queries through 2 threads → two waves
+        assert elapsed >= SLOW_QUERY_S * 2 * 0.9
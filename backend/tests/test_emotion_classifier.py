@@ -0,0 +1,128 @@
+"""
+Tests for app/services/emotion_classifier.py
+
+Covers:
+- Lexicon hits in English, Hindi, Hinglish and Gujarati
+- Confidence: mixed emotions, negation (scoped to its clause), long texts with little evidence
+- Clear single-emotion texts clear the default local threshold
+- Ambiguous everyday words are not emotion terms
+- Batch scoring matches one-at-a-time scoring
+- The fast path in analyze_emotions_with_ai skips the LLM only when confident
+"""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.config import get_settings
+from app.services import emotion_classifier
+from app.services.emotion_service import EMOTION_LIST, analyze_emotions_with_ai
+
+
+class TestClassify:
+    def test_emotions_match_service_vocabulary(self):
+        assert list(emotion_classifier.EMOTIONS) == EMOTION_LIST
+
+    @pytest.mark.parametrize("text, expected", [
+        ("I'm so worried about my exam", "anxiety"),
+        ("मैं बहुत उदास हूँ", "sadness"),
+        ("Aaj bahut gussa aa raha hai", "anger"),
+        ("આજે બહુ મજા આવી", "joy"),
+    ])
+    def test_languages(self, text, expected):
+        result = emotion_classifier.classify(text)
+        assert result["primary_emotion"] == expected
+        assert result["confidence"] >= get_settings().emotion_local_min_confidence
+
+    def test_prefix_terms(self):
+        assert emotion_classifier.classify("so frustrating")["primary_emotion"] == "frustration"
+
+    def test_no_emotion_words_is_unsure_neutral(self):
+        result = emotion_classifier.classify("I went to the store.")
+        assert result == {"emotions": {"neutral": 1.0}, "primary_emotion": "neutral", "confidence": 0.0}
+
+    def test_mixed_emotions_are_not_confident(self):
+        result = emotion_classifier.classify("I'm so happy but also really scared")
+        assert result["confidence"] < 0.3
+        assert set(result["emotions"]) == {"joy", "fear"}
+
+    def test_negation_drops_term(self):
+        assert emotion_classifier.classify("I am not happy")["confidence"] == 0
+
+    def test_negation_stops_at_punctuation(self):
+        result = emotion_classifier.classify("I'm not sad, I'm great")
+        assert result["primary_emotion"] == "joy"
+        assert "sadness" not in result["emotions"]
+
+    def test_negator_in_next_clause_does_not_touch_previous_term(self):
+        assert emotion_classifier.classify("So happy. No plans today")["confidence"] == \
+            emotion_classifier.classify("So happy")["confidence"]
+
+    @pytest.mark.parametrize("text", ["I fed the cat", "The content of the email"])
+    def test_ambiguous_words_are_not_emotions(self, text):
+        assert emotion_classifier.classify(text)["confidence"] == 0
+
+    def test_trailing_negator_lowers_confidence(self):
+        assert emotion_classifier.classify("khush nahi")["confidence"] < emotion_classifier.classify("khush")["confidence"]
+
+    def test_long_text_needs_more_evidence(self):
+        short = emotion_classifier.classify("so happy today")
+        long = emotion_classifier.classify("so happy today " + "we went to the market and came back " * 10)
+        assert long["confidence"] < short["confidence"]
+
+    @pytest.mark.parametrize("text, expected", [
+        ("I'm furious", "anger"),
+        ("I feel so numb", "sadness"),
+        ("I'm scared", "fear"),
+        ("I'm calm", "calm"),
+        ("My boss took credit for my idea in front of everyone. I'm furious.", "anger"),
+    ])
+    def test_clear_single_emotion_texts_are_answered_locally(self, text, expected):
+        result = emotion_classifier.classify_confident(text)
+        assert result is not None
+        assert result["primary_emotion"] == expected
+
+    def test_batch_matches_single(self):
+        texts = ["so happy", "bahut akela", "I went to the store.", "થાક લાગ્યો"]
+        assert emotion_classifier.classify_batch(texts) == [emotion_classifier.classify(t) for t in texts]
+
+
+class TestFastPath:
+    @pytest.mark.asyncio
+    async def test_confident_text_skips_llm(self):
+        with patch("app.services.emotion_service._emotion_batcher.submit", new=AsyncMock()) as submit:
+            result = await analyze_emotions_with_ai("I'm so worried about my exam")
+
+        submit.assert_not_called()
+        assert result == {"emotions": {"anxiety": 1.0}, "primary_emotion": "anxiety"}
+
+    @pytest.mark.asyncio
+    async def test_ambiguous_text_escalates(self):
+        llm_result = {"emotions": {"joy": 0.6, "fear": 0.5}, "primary_emotion": "joy"}
+        with patch("app.services.emotion_service._emotion_batcher.submit",
+                   new=AsyncMock(return_value=llm_result)) as submit:
+            result = await analyze_emotions_with_ai("Happy about the move but scared of the new city")
+
+        submit.assert_called_once()
+        assert result == llm_result
+
+    @pytest.mark.asyncio
+    async def test_disabled_always_escalates(self):
+        settings = get_settings()
+        settings.emotion_local_enabled = False
+        try:
+            with patch("app.services.emotion_service._emotion_batcher.submit",
+                       new=AsyncMock(return_value={"emotions": {}, "primary_emotion": "neutral"})) as submit:
+                await analyze_emotions_with_ai("I'm so worried about my exam")
+        finally:
+            settings.emotion_local_enabled = True
+
+        submit.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_llm_failure_uses_local_best_guess(self):
+        with patch("app.services.emotion_service._emotion_batcher.submit",
+                   new=AsyncMock(side_effect=RuntimeError("down"))):
+            result = await analyze_emotions_with_ai("Feeling a bit lonely tonight")
+
+        assert result["primary_emotion"] == "loneliness"
@@ -5,10 +5,15 @@ Covers:
 - TextBlob sentiment scoring
 - Fallback emotion analysis (polarity branches)
 - AI emotion analysis with mocked Groq response
+- store_analysis: one versioned upsert RPC; stale results keep the newer row
+- analyze_and_store: overlapping calls for one source coalesce to the latest text
 """
 
+import asyncio
+
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
+from app.services import emotion_service
 from app.services.emotion_service import (
     _textblob_sentiment,
     _fallback_analysis,
@@ -74,7 +79,7 @@ class TestAnalyzeEmotionsWithAI:
                 content='{"emotions": {"joy": 0.85, "gratitude": 0.6}, "primary_emotion": "joy"}'
             ))]
         )
-        with patch("app.services.emotion_service.get_groq_client", return_value=mock_groq_client):
+        with patch("app.services.ai_client.get_groq_client", return_value=mock_groq_client):
             result = await analyze_emotions_with_ai("I feel so happy and thankful today!")
 
         assert "emotions" in result
@@ -84,7 +89,7 @@ class TestAnalyzeEmotionsWithAI:
 
     @pytest.mark.asyncio
     async def test_falls_back_on_groq_failure(self):
-        with patch("app.services.emotion_service.get_groq_client", side_effect=Exception("API down")):
+        with patch("app.services.ai_client.get_groq_client", side_effect=Exception("API down")):
             result = await analyze_emotions_with_ai("I feel terrible.")
 
         # Should use TextBlob fallback — result must still be valid
@@ -98,8 +103,133 @@ class TestAnalyzeEmotionsWithAI:
                 content='{"emotions": {"joy": 0.9}, "primary_emotion": "UNKNOWN_INVALID"}'
             ))]
         )
-        with patch("app.services.emotion_service.get_groq_client", return_value=mock_groq_client):
+        with patch("app.services.ai_client.get_groq_client", return_value=mock_groq_client):
             result = await analyze_emotions_with_ai("Some text here.")
 
         # Should correct the invalid primary to the highest-scoring emotion
         assert result["primary_emotion"] in EMOTION_LIST
+
+
+# ── Versioned upsert ───────────────────────────────────────────────────────
+
+def _rpc_supabase(data):
+    supabase = MagicMock()
+    supabase.rpc.return_value.execute.return_value = MagicMock(data=data)
+    return supabase
+
+
+class TestStoreAnalysis:
+    @pytest.mark.asyncio
+    async def test_single_upsert_rpc(self):
+        row = {"id": "a1", "primary_emotion": "joy", "sentiment_score": 0.8}
+        supabase = _rpc_supabase({"applied": True, "analysis": row})
+        result = {"emotions": {"joy": 0.9}, "primary_emotion": "joy"}
+
+        with patch("app.services.emotion_service.get_supabase_client", return_value=supabase):
+            stored = await emotion_service.store_analysis(
+                "u1", "journal", "e1", "I am so happy", result, source_version="2024-05-01T10:00:00+00:00"
+            )
+
+        assert stored == row
+        fn, params = supabase.rpc.call_args.args
+        assert fn == "upsert_emotion_analysis"
+        assert params["p_source_version"] == "2024-05-01T10:00:00+00:00"
+        assert params["p_sentiment_score"] == _textblob_sentiment("I am so happy")
+        assert params["p_emotions"] == {"joy": 0.9}
+        supabase.table.assert_not_called()  # no delete + insert
+
+    @pytest.mark.asyncio
+    async def test_stale_result_returns_newer_row(self):
+        newer = {"id": "a1", "primary_emotion": "calm"}
+        supabase = _rpc_supabase({"applied": False, "analysis": newer})
+
+        with patch("app.services.emotion_service.get_supabase_client", return_value=supabase):
+            stored = await emotion_service.store_analysis(
+                "u1", "journal", "e1", "old text", {"emotions": {}, "primary_emotion": "anger"}
+            )
+
+        assert stored == newer
+
+    @pytest.mark.asyncio
+    async def test_other_users_source_raises(self):
+        supabase = _rpc_supabase({"applied": False, "analysis": None})
+
+        with patch("app.services.emotion_service.get_supabase_client", return_value=supabase):
+            with pytest.raises(Exception, match="Failed to store emotion analysis"):
+                await emotion_service.store_analysis(
+                    "u1", "chat", "s1", "text", {"emotions": {}, "primary_emotion": "neutral"}
+                )
+
+
+class TestAnalyzeAndStoreCoalescing:
+    @pytest.mark.asyncio
+    async def test_overlapping_calls_analyze_only_latest(self):
+        release = asyncio.Event()
+        analyzed = []
+
+        async def analyze(text):
+            analyzed.append(text)
+            if text == "v1":
+                await release.wait()
+            return {"emotions": {}, "primary_emotion": "neutral"}
+
+        async def store(user_id, source_type, source_id, text, result, source_version=None):
+            return {"text": text, "source_version": source_version}
+
+        with patch("app.services.emotion_service.analyze_emotions_with_ai", side_effect=analyze), \
+             patch("app.services.emotion_service.store_analysis", side_effect=store):
+            first = asyncio.create_task(emotion_service.analyze_and_store("u1", "chat", "s1", "v1"))
+            await asyncio.sleep(0)
+            second = asyncio.create_task(emotion_service.analyze_and_store("u1", "chat", "s1", "v2"))
+            third = asyncio.create_task(emotion_service.analyze_and_store("u1", "chat", "s1", "v3"))
+            await asyncio.sleep(0)
+            release.set()
+            results = await asyncio.gather(first, second, third)
+
+        assert analyzed == ["v1", "v3"]  # v2 was replaced while v1 ran
+        assert [r["text"] for r in results] == ["v1", "v3", "v3"]
+        assert results[1]["source_version"] > results[0]["source_version"]
+        assert emotion_service._inflight == {}
+
+    @pytest.mark.asyncio
+    async def test_older_version_does_not_displace_newer_waiting_text(self):
+        release = asyncio.Event()
+        analyzed = []
+
+        async def analyze(text):
+            analyzed.append(text)
+            if text == "v1":
+                await release.wait()
+            return {"emotions": {}, "primary_emotion": "neutral"}
+
+        async def store(user_id, source_type, source_id, text, result, source_version=None):
+            return {"text": text, "source_version": source_version}
+
+        with patch("app.services.emotion_service.analyze_emotions_with_ai", side_effect=analyze), \
+             patch("app.services.emotion_service.store_analysis", side_effect=store):
+            first = asyncio.create_task(
+                emotion_service.analyze_and_store("u1", "chat", "s3", "v1", "2024-05-01T10:00:00+00:00")
+            )
+            await asyncio.sleep(0)
+            newer = asyncio.create_task(
+                emotion_service.analyze_and_store("u1", "chat", "s3", "v3", "2024-05-01T10:03:00+00:00")
+            )
+            retried = asyncio.create_task(
+                emotion_service.analyze_and_store("u1", "chat", "s3", "v2", "2024-05-01T10:02:00+00:00")
+            )
+            await asyncio.sleep(0)
+            release.set()
+            results = await asyncio.gather(first, newer, retried)
+
+        assert analyzed == ["v1", "v3"]
+        assert results[2] == {"text": "v3", "source_version": "2024-05-01T10:03:00+00:00"}
+
+    @pytest.mark.asyncio
+    async def test_failure_reaches_callers_and_clears_slot(self):
+        with patch("app.services.emotion_service.analyze_emotions_with_ai",
+                   new=AsyncMock(return_value={"emotions": {}, "primary_emotion": "neutral"})), \
+             patch("app.services.emotion_service.store_analysis", new=AsyncMock(side_effect=Exception("db down"))):
+            with pytest.raises(Exception, match="db down"):
+                await emotion_service.analyze_and_store("u1", "chat", "s2", "text")
+
+        assert emotion_service._inflight == {}
@@ -0,0 +1,140 @@
+"""
+Tests for app/services/export_service.py
+
+Covers:
+- Resource / format validation
+- NDJSON stream pages with keyset cursors until a short page
+- Chat messages are paged per page of the user's sessions, in small session-id chunks
+- CSV header, JSON cells and empty exports
+- Gzip stream round-trips
+"""
+
+import csv
+import gzip
+import io
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.services import export_service
+
+
+def _rows(n, start=0, **extra):
+    return [
+        {"id": f"00000000-0000-0000-0000-{i:012d}", "created_at": f"2024-01-01T00:00:{i % 60:02d}+00:00", **extra}
+        for i in range(start, start + n)
+    ]
+
+
+async def _collect(stream) -> bytes:
+    return b"".join([chunk async for chunk in stream])
+
+
+class TestParseResources:
+    def test_defaults_to_everything(self):
+        assert export_service.parse_resources(None, "ndjson") == list(export_service.EXPORT_COLUMNS)
+
+    def test_canonical_order(self):
+        assert export_service.parse_resources("emotion_analyses, journal_entries", "ndjson") == [
+            "journal_entries", "emotion_analyses",
+        ]
+
+    @pytest.mark.parametrize("include,fmt", [
+        ("nope", "ndjson"),
+        (None, "csv"),
+        ("journal_entries,chat_sessions", "csv"),
+        ("journal_entries", "xml"),
+    ])
+    def test_rejects_invalid(self, include, fmt):
+        with pytest.raises(ValueError):
+            export_service.parse_resources(include, fmt)
+
+
+class TestStreamExport:
+    @pytest.mark.asyncio
+    async def test_ndjson_pages_until_short_page(self):
+        supabase = MagicMock()
+        pages = [MagicMock(data=_rows(2)), MagicMock(data=_rows(1, start=2))]
+
+        with patch("app.services.export_service.EXPORT_PAGE_SIZE", 2), \
+             patch("app.services.export_service.get_supabase_client", return_value=supabase), \
+             patch("app.services.export_service.run_query", AsyncMock(side_effect=pages)) as run:
+            body = await _collect(export_service.stream_export("u1", ["journal_entries"], "ndjson"))
+
+        lines = [json.loads(line) for line in body.decode().splitlines()]
+        assert [line["id"][-1] for line in lines] == ["0", "1", "2"]
+        assert all(line["type"] == "journal_entries" for line in lines)
+        assert run.await_count == 2
+        # Second page continues after the last row of the first
+        query = supabase.table.return_value.select.return_value.eq.return_value
+        assert query.or_.call_count == 1
+        assert "00000000-0000-0000-0000-000000000001" in query.or_.call_args.args[0]
+
+    @pytest.mark.asyncio
+    async def test_chat_messages_follow_session_pages(self):
+        supabase = MagicMock()
+        sessions = [{"id": "s1", "started_at": "2024-01-01T00:00:00+00:00"}]
+        pages = [
+            MagicMock(data=sessions),
+            MagicMock(data=_rows(2, session_id="s1", role="user", content="hi")),
+        ]
+
+        with patch("app.services.export_service.get_supabase_client", return_value=supabase), \
+             patch("app.services.export_service.run_query", AsyncMock(side_effect=pages)):
+            body = await _collect(export_service.stream_export("u1", ["chat_messages"], "ndjson"))
+
+        assert len(body.decode().splitlines()) == 2
+        supabase.table.return_value.select.return_value.in_.assert_called_once_with("session_id", ["s1"])
+
+    @pytest.mark.asyncio
+    async def test_session_ids_are_chunked_per_query(self):
+        supabase = MagicMock()
+        sessions = [{"id": f"s{i}", "started_at": "2024-01-01T00:00:00+00:00"} for i in range(120)]
+        # one session page (short), then one short message page per chunk
+        pages = [MagicMock(data=sessions)] + [MagicMock(data=_rows(1)) for _ in range(3)]
+
+        with patch("app.services.export_service.get_supabase_client", return_value=supabase), \
+             patch("app.services.export_service.run_query", AsyncMock(side_effect=pages)):
+            body = await _collect(export_service.stream_export("u1", ["chat_messages"], "ndjson"))
+
+        assert len(body.decode().splitlines()) == 3
+        in_calls = supabase.table.return_value.select.return_value.in_.call_args_list
+        assert [len(call.args[1]) for call in in_calls] == [50, 50, 20]
+        assert in_calls[-1].args[1][-1] == "s119"
+
+    @pytest.mark.asyncio
+    async def test_csv_serialises_json_cells(self):
+        rows = [{
+            "id": "e1", "title": "Day", "content": "a, b", "emotion_tag": "Calm",
+            "ai_multi_tags": ["Calm", "Hopeful"], "word_count": 2,
+            "created_at": "2024-01-01T00:00:00+00:00",
+        }]
+
+        with patch("app.services.export_service.get_supabase_client", return_value=MagicMock()), \
+             patch("app.services.export_service.run_query", AsyncMock(return_value=MagicMock(data=rows))):
+            body = await _collect(export_service.stream_export("u1", ["journal_entries"], "csv"))
+
+        header, row = list(csv.reader(io.StringIO(body.decode())))
+        assert header == export_service.EXPORT_COLUMNS["journal_entries"]
+        record = dict(zip(header, row))
+        assert record["content"] == "a, b"
+        assert json.loads(record["ai_multi_tags"]) == ["Calm", "Hopeful"]
+
+    @pytest.mark.asyncio
+    async def test_empty_csv_still_has_header(self):
+        with patch("app.services.export_service.get_supabase_client", return_value=MagicMock()), \
+             patch("app.services.export_service.run_query", AsyncMock(return_value=MagicMock(data=[]))):
+            body = await _collect(export_service.stream_export("u1", ["emotion_analyses"], "csv"))
+
+        assert body.decode().strip() == ",".join(export_service.EXPORT_COLUMNS["emotion_analyses"])
+
+    @pytest.mark.asyncio
+    async def test_gzip_round_trip(self):
+        with patch("app.services.export_service.get_supabase_client", return_value=MagicMock()), \
+             patch("app.services.export_service.run_query", AsyncMock(return_value=MagicMock(data=_rows(3)))):
+            body = await _collect(
+                export_service.stream_export("u1", ["journal_entries"], "ndjson", gzip=True)
+            )
+
+        assert len(gzip.decompress(body).decode().splitlines()) == 3
@@ -0,0 +1,115 @@
+"""
+Tests for benchmarks/fake_ai_server.py, driven through the real clients
+
+Covers:
+- ai_client and voice_service reach the fake server through the base URL settings
+- Replies are deterministic and parse as the backend expects (emotion, batch, stream)
+- Transcription and TTS return schema-valid payloads
+- Injected errors surface as API errors
+"""
+
+import base64
+import io
+import wave
+from unittest.mock import patch
+
+import httpx
+import pytest
+import pytest_asyncio
+from groq import APIStatusError
+
+from app.config import Settings
+from app.services import ai_client, emotion_service, voice_service
+from benchmarks.fake_ai_server import TRANSCRIPTS, FakeServerConfig, create_app
+
+BASE_URL = "http://fake-ai.local"
+
+
+@pytest_asyncio.fixture
+async def fake_server():
+    """Point the shared Groq and Sarvam clients at an in-process fake server."""
+    started = []
+
+    async def start(**overrides):
+        transport = httpx.ASGITransport(
+            app=create_app(FakeServerConfig(latency_ms=0, stream_chunk_ms=0, **overrides))
+        )
+        settings = Settings(
+            groq_api_key="fake", groq_base_url=BASE_URL, llm_max_retries=0,
+            sarvam_api_key="fake", sarvam_base_url=BASE_URL,
+        )
+        await ai_client.close_groq_client()
+        await voice_service.close_sarvam_client()
+        for p in (
+            patch("app.services.ai_client.get_settings", return_value=settings),
+            patch("app.services.voice_service.get_settings", return_value=settings),
+            patch("app.services.ai_client.DefaultAsyncHttpxClient",
+                  lambda **kw: httpx.AsyncClient(transport=transport)),
+        ):
+            p.start()
+            started.append(p)
+        # Both shared clients are created from settings, on the fake server's transport
+        with patch("app.services.voice_service.httpx.AsyncClient",
+                   return_value=httpx.AsyncClient(transport=transport)):
+            voice_service.get_sarvam_client()
+        ai_client._limiter = None
+
+    yield start
+    for p in started:
+        p.stop()
+    await ai_client.close_groq_client()
+    await voice_service.close_sarvam_client()
+    ai_client._limiter = None
+
+
+class TestFakeGroq:
+    @pytest.mark.asyncio
+    async def test_emotion_reply_is_deterministic_and_valid(self, fake_server):
+        await fake_server()
+        first = await emotion_service._call_emotion_model("I passed my exam!")
+        second = await emotion_service._call_emotion_model("I passed my exam!")
+
+        assert first == second
+        assert first["primary_emotion"] in emotion_service.EMOTION_LIST
+        assert ai_client.get_groq_client().base_url.host == "fake-ai.local"
+
+    @pytest.mark.asyncio
+    async def test_batched_emotions_cover_every_id(self, fake_server):
+        await fake_server()
+        results = await emotion_service._analyze_batch([("good day", "u1"), ("bad day", "u2")])
+
+        assert all(r["primary_emotion"] in emotion_service.EMOTION_LIST for r in results)
+
+    @pytest.mark.asyncio
+    async def test_streaming_reply(self, fake_server):
+        await fake_server()
+        deltas = [
+            d async for d in ai_client.stream_chat_completion(
+                model="m", messages=[{"role": "user", "content": "I feel tired."}]
+            )
+        ]
+
+        assert len(deltas) > 3
+        assert "".join(deltas).endswith("?")
+
+    @pytest.mark.asyncio
+    async def test_injected_errors(self, fake_server):
+        await fake_server(error_rate=1.0, error_status=503)
+        with pytest.raises(APIStatusError) as exc:
+            await ai_client.chat_completion(model="m", messages=[{"role": "user", "content": "hi"}])
+        assert exc.value.status_code == 503
+
+
+class TestFakeVoice:
+    @pytest.mark.asyncio
+    async def test_transcription(self, fake_server):
+        await fake_server()
+        assert await voice_service.transcribe_audio(b"\x00\x01fake-webm") in TRANSCRIPTS
+
+    @pytest.mark.asyncio
+    async def test_tts_returns_wav(self, fake_server):
+        await fake_server()
+        audio = await voice_service.synthesize_speech("Hello there, friend.", "en")
+
+        with wave.open(io.BytesIO(base64.b64decode(audio))) as wav:
+            assert wav.getframerate() == 22050 and wav.getnframes() > 0
@@ -0,0 +1,43 @@
+"""
+Tests for app/routers/health.py
+
+Covers:
+- /health/metrics needs the X-Metrics-Token header when METRICS_TOKEN is set
+- Without a token it is only served in development
+- LLM usage in the payload is aggregated, never per user
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.config import Settings
+from app.dependencies import get_settings_dep
+from app.routers import health
+
+
+def _client(**settings) -> TestClient:
+    app = FastAPI()
+    app.include_router(health.router)
+    app.dependency_overrides[get_settings_dep] = lambda: Settings(**settings)
+    return TestClient(app)
+
+
+class TestMetricsAccess:
+    def test_health_is_public(self):
+        assert _client(environment="production").get("/health").status_code == 200
+
+    @pytest.mark.parametrize("headers", [{}, {"X-Metrics-Token": "wrong"}])
+    def test_token_required_when_configured(self, headers):
+        client = _client(environment="development", metrics_token="s3cret")
+        assert client.get("/health/metrics", headers=headers).status_code == 403
+
+    def test_valid_token_serves_aggregates_only(self):
+        client = _client(environment="production", metrics_token="s3cret")
+        response = client.get("/health/metrics", headers={"X-Metrics-Token": "s3cret"})
+        assert response.status_code == 200
+        assert "top_users" not in response.json()["llm_usage"]["today"]
+
+    def test_no_token_is_development_only(self):
+        assert _client(environment="production").get("/health/metrics").status_code == 403
+        assert _client(environment="development").get("/health/metrics").status_code == 200
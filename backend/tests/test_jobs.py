@@ -0,0 +1,394 @@
+"""
+Tests for app/services/jobs.py
+
+Covers:
+- Enqueueing batches rows per RPC and merges repeated idempotency keys
+- Claimed jobs run on the registered handler, attributed to the payload's user
+- Failures are retried with backoff; the last attempt is flagged; then dead-lettered
+- PermanentJobError and unknown kinds are dead-lettered without retries
+- Concurrency is capped per process
+- Per-kind outcome and latency metrics
+- The journal, emotion and chat-conversion handlers
+"""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+import pytest_asyncio
+
+from app.config import Settings
+from app.services import (
+    chat_service,
+    emotion_service,
+    jobs,
+    journal_service,
+    llm_telemetry,
+)
+
+
+class FakeJobTable:
+    """In-memory stand-in for public.jobs and its RPCs (same semantics as migration.sql)."""
+
+    def __init__(self):
+        self.rows: dict[int, dict] = {}
+        self.calls: list[tuple[str, dict]] = []
+        self._next_id = 1
+
+    def rpc(self, name: str, params: dict):
+        self.calls.append((name, params))
+        return MagicMock(execute=lambda: MagicMock(data=getattr(self, name)(**params)))
+
+    def _queued(self, key):
+        return next(
+            (row for row in self.rows.values() if key and row["key"] == key and row["status"] == "queued"),
+            None,
+        )
+
+    def enqueue_jobs(self, p_jobs):
+        ids = []
+        for item in p_jobs:
+            row = self._queued(item["key"])
+            if row is not None:
+                row["payload"] = item["payload"]
+                row["priority"] = min(row["priority"], item["priority"])
+            else:
+                row = {
+                    "id": self._next_id, "kind": item["kind"], "payload": item["payload"],
+                    "key": item["key"], "status": "queued", "attempts": 0,
+                    "max_attempts": item["max_attempts"], "run_at": time.monotonic() + item["delay_s"],
+                    "priority": item["priority"], "last_error": None,
+                }
+                self.rows[row["id"]] = row
+                self._next_id += 1
+            ids.append(row["id"])
+        return ids
+
+    def claim_jobs(self, p_worker, p_limit, p_lease_s):
+        now = time.monotonic()
+        ready = sorted(
+            (row for row in self.rows.values() if row["status"] == "queued" and row["run_at"] <= now),
+            key=lambda row: (row["priority"], row["run_at"]),
+        )[:p_limit]
+        for row in ready:
+            row["status"] = "running"
+            row["attempts"] += 1
+        return [
+            {key: row[key] for key in ("id", "kind", "payload", "attempts", "max_attempts")} | {"waited_s": 0.5}
+            for row in ready
+        ]
+
+    def finish_job(self, p_id, p_error, p_retry_in_s, p_dead):
+        row = self.rows[p_id]
+        if p_error is None:
+            del self.rows[p_id]
+            return "done"
+        row["last_error"] = p_error
+        if p_dead or row["attempts"] >= row["max_attempts"]:
+            row["status"] = "dead"
+            return "dead"
+        if self._queued(row["key"]) is not None:
+            del self.rows[p_id]
+            return "superseded"
+        row["status"] = "queued"
+        row["run_at"] = time.monotonic() + p_retry_in_s
+        return "retry"
+
+    def job_queue_stats(self):
+        return {
+            "ready": sum(row["status"] == "queued" for row in self.rows.values()),
+            "dead": sum(row["status"] == "dead" for row in self.rows.values()),
+        }
+
+
+def _settings(**overrides) -> Settings:
+    defaults = dict(
+        supabase_url="http://supabase.test",
+        jobs_concurrency=2,
+        jobs_poll_interval_s=0.01,
+        jobs_max_attempts=3,
+        jobs_retry_base_s=0,
+        jobs_rate_per_s=0,
+    )
+    return Settings(**{**defaults, **overrides})
+
+
+async def _until(condition, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting for the job queue"
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def table():
+    table = FakeJobTable()
+    with patch("app.services.jobs.get_supabase_client", return_value=table), \
+            patch("app.services.jobs.get_settings", return_value=_settings()):
+        for key in jobs._stats:
+            jobs._stats[key] = 0
+        jobs._kind_stats.clear()
+        jobs._depth.update(at=0.0, value=None)
+        yield table
+
+
+@pytest_asyncio.fixture
+async def workers(table):
+    await jobs.start_job_workers()
+    yield table
+    await jobs.stop_job_workers()
+
+
+class TestEnqueue:
+    @pytest.mark.asyncio
+    async def test_repeated_key_keeps_latest_payload(self, table):
+        ids = await jobs.enqueue_many([
+            {"kind": "test.echo", "key": "k1", "payload": {"n": 1}},
+            {"kind": "test.echo", "key": "k1", "payload": {"n": 2}},
+            {"kind": "test.echo", "payload": {"n": 3}},
+            {"kind": "test.echo", "payload": {"n": 3}},
+        ])
+
+        assert len(ids) == 3  # unkeyed jobs are never merged
+        sent = table.calls[0][1]["p_jobs"]
+        assert [item["payload"] for item in sent] == [{"n": 2}, {"n": 3}, {"n": 3}]
+        assert all(item["max_attempts"] == 3 and item["priority"] == jobs.PRIORITY_INTERACTIVE for item in sent)
+
+        # still queued: enqueueing the key again returns the same job
+        assert await jobs.enqueue("test.echo", {"n": 4}, key="k1") == ids[0]
+        assert table.rows[ids[0]]["payload"] == {"n": 4}
+
+    @pytest.mark.asyncio
+    async def test_large_enqueue_is_batched(self, table):
+        ids = await jobs.enqueue_many([{"kind": "test.echo", "payload": {"n": i}} for i in range(1200)])
+
+        assert len(ids) == 1200
+        assert [len(params["p_jobs"]) for _, params in table.calls] == [500, 500, 200]
+
+
+class TestDispatcher:
+    @pytest.mark.asyncio
+    async def test_runs_job_attributed_to_its_user(self, workers):
+        seen = []
+
+        async def handler(payload, last_attempt):
+            seen.append((payload["n"], last_attempt, llm_telemetry.current_user()))
+
+        jobs.register("test.echo", handler)
+        await jobs.enqueue("test.echo", {"n": 1, "user_id": "u1"})
+
+        await _until(lambda: not workers.rows)
+        assert seen == [(1, False, "u1")]
+        assert jobs._kind_stats["test.echo"]["completed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_retries_then_succeeds(self, workers):
+        attempts = []
+
+        async def flaky(payload, last_attempt):
+            attempts.append(last_attempt)
+            if len(attempts) < 2:
+                raise RuntimeError("groq 503")
+
+        jobs.register("test.flaky", flaky)
+        await jobs.enqueue("test.flaky", {})
+
+        await _until(lambda: not workers.rows)
+        assert attempts == [False, False]
+        assert jobs._kind_stats["test.flaky"]["retried"] == 1
+        assert jobs._kind_stats["test.flaky"]["completed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_dead_letters_after_max_attempts(self, workers):
+        attempts = []
+
+        async def failing(payload, last_attempt):
+            attempts.append(last_attempt)
+            raise RuntimeError("still down")
+
+        jobs.register("test.failing", failing)
+        job_id = await jobs.enqueue("test.failing", {})
+
+        await _until(lambda: workers.rows[job_id]["status"] == "dead")
+        assert attempts == [False, False, True]  # the handler knows its last chance
+        assert "still down" in workers.rows[job_id]["last_error"]
+        assert jobs._kind_stats["test.failing"]["dead"] == 1
+
+    @pytest.mark.asyncio
+    async def test_hung_handler_times_out_within_its_lease(self, workers):
+        attempts = []
+
+        async def hung(payload, last_attempt):
+            attempts.append(last_attempt)
+            await asyncio.Event().wait()
+
+        jobs.register("test.hung", hung)
+        with patch("app.services.jobs.HANDLER_LEASE_FRACTION", 0.05 / jobs.get_settings().jobs_lease_s):
+            job_id = await jobs.enqueue("test.hung", {})
+            await _until(lambda: workers.rows[job_id]["status"] == "dead")
+
+        assert attempts == [False, False, True]
+        assert workers.rows[job_id]["last_error"].startswith("Timed out")
+
+    @pytest.mark.asyncio
+    async def test_permanent_error_is_not_retried(self, workers):
+        calls = []
+
+        async def invalid(payload, last_attempt):
+            calls.append(1)
+            raise jobs.PermanentJobError("session not found")
+
+        jobs.register("test.invalid", invalid)
+        job_id = await jobs.enqueue("test.invalid", {})
+        unknown_id = await jobs.enqueue("test.unregistered", {})
+
+        await _until(lambda: all(workers.rows[i]["status"] == "dead" for i in (job_id, unknown_id)))
+        assert calls == [1]
+        assert workers.rows[job_id]["last_error"] == "session not found"
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_capped(self, workers):
+        active = peak = 0
+
+        async def slow(payload, last_attempt):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.03)
+            active -= 1
+
+        jobs.register("test.slow", slow)
+        await jobs.enqueue_many([{"kind": "test.slow", "payload": {}} for _ in range(6)])
+
+        await _until(lambda: not workers.rows)
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_stats_report_depth_and_latency(self, workers):
+        async def handler(payload, last_attempt):
+            await asyncio.sleep(0.02)
+
+        jobs.register("test.timed", handler)
+        await jobs.enqueue("test.timed", {})
+        await _until(lambda: not workers.rows)
+
+        stats = await jobs.get_job_stats()
+        assert stats["running"] is True
+        assert stats["enqueued"] == 1
+        assert stats["queue"] == {"ready": 0, "dead": 0}
+        timed = stats["kinds"]["test.timed"]
+        assert timed["completed"] == 1
+        assert timed["avg_wait_s"] == 0.5
+        assert timed["avg_run_s"] >= 0.02
+
+
+class TestRetryDelay:
+    def test_exponential_with_cap_and_jitter(self):
+        settings = _settings(jobs_retry_base_s=5, jobs_retry_max_s=60)
+        with patch("app.services.jobs.get_settings", return_value=settings):
+            assert 2.5 <= jobs.retry_delay(1) <= 5
+            assert 10 <= jobs.retry_delay(3) <= 20
+            assert 30 <= jobs.retry_delay(10) <= 60
+
+
+class TestHandlers:
+    @pytest.mark.asyncio
+    async def test_journal_analysis_is_strict_until_last_attempt(self):
+        payload = {"user_id": "u1", "entry_id": "e1", "content": "text", "source_version": "v1"}
+        with patch("app.services.journal_service.analyze_entry", new=AsyncMock()) as analyze:
+            await journal_service._analyze_entry_job(payload, False)
+            await journal_service._analyze_entry_job(payload, True)
+
+        assert analyze.await_args_list[0].args == ("u1", "e1", "text", "v1")
+        assert [call.kwargs["strict"] for call in analyze.await_args_list] == [True, False]
+
+    @pytest.mark.asyncio
+    async def test_import_queues_one_keyed_job_per_entry(self):
+        rows = [{"id": "e1", "content": "a", "updated_at": "t1"}, {"id": "e2", "content": "b"}]
+        with patch("app.services.journal_service.jobs.enqueue_many", new=AsyncMock(return_value=[1, 2])) as enqueue:
+            assert await journal_service.queue_entry_analysis("u1", rows, jobs.PRIORITY_BULK) == 2
+
+        queued = enqueue.await_args.args[0]
+        assert [job["key"] for job in queued] == ["journal-analysis:e1", "journal-analysis:e2"]
+        assert all(job["priority"] == jobs.PRIORITY_BULK for job in queued)
+        assert queued[0]["payload"] == {"user_id": "u1", "entry_id": "e1", "content": "a", "source_version": "t1"}
+
+    @pytest.mark.asyncio
+    async def test_emotion_job_runs_analyze_and_store(self):
+        with patch("app.services.emotion_service.jobs.enqueue", new=AsyncMock(return_value=1)) as enqueue:
+            await emotion_service.queue_analysis("u1", "chat", "s1", "hi")
+        payload = enqueue.await_args.args[1]
+        # Versioned when queued, not when the (possibly retried) job runs
+        assert payload["source_version"]
+
+        with patch("app.services.emotion_service.analyze_and_store", new=AsyncMock()) as analyze:
+            await emotion_service._analyze_and_store_job(payload, False)
+
+        analyze.assert_awaited_once_with("u1", "chat", "s1", "hi", payload["source_version"])
+
+    @pytest.mark.asyncio
+    async def test_chat_conversion_validation_error_is_permanent(self):
+        with patch(
+            "app.services.chat_service.convert_session_to_journal",
+            new=AsyncMock(side_effect=ValueError("Not enough messages to summarize.")),
+        ):
+            with pytest.raises(jobs.PermanentJobError, match="Not enough messages"):
+                await chat_service._convert_session_job({"user_id": "u1", "session_id": "s1"}, False)
+
+    @pytest.mark.asyncio
+    async def test_chat_conversion_skips_saved_session_without_llm(self):
+        messages = [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}]
+        with patch(
+            "app.services.chat_service._conversion_source",
+            new=AsyncMock(return_value=({"id": "s1", "saved": True}, messages)),
+        ), patch("app.services.chat_service.routed_completion", new=AsyncMock()) as completion, \
+                patch("app.services.chat_service.journal_service.create_session_entry",
+                      new=AsyncMock()) as create:
+            assert await chat_service.convert_session_to_journal("u1", "s1") is None
+
+        completion.assert_not_awaited()
+        create.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_chat_conversion_writes_entry_and_saved_flag_together(self):
+        messages = [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}]
+        supabase = MagicMock()
+        # save_session_journal: the first run inserts, an overlapping one finds the session saved
+        supabase.rpc.return_value.execute.side_effect = [
+            MagicMock(data={"id": "e1", "content": "Today I talked.", "updated_at": "t1"}),
+            MagicMock(data=None),
+        ]
+        reply = MagicMock(choices=[MagicMock(message=MagicMock(content="Today I talked."))])
+        with patch(
+            "app.services.chat_service._conversion_source",
+            new=AsyncMock(return_value=({"id": "s1", "saved": False}, messages)),
+        ), patch("app.services.journal_service.get_supabase_client", return_value=supabase), \
+                patch("app.services.chat_service.routed_completion", new=AsyncMock(return_value=reply)), \
+                patch("app.services.journal_service.queue_entry_analysis", new=AsyncMock(return_value=1)) as queue:
+            entry = await chat_service.convert_session_to_journal("u1", "s1")
+            assert entry["id"] == "e1"
+            assert await chat_service.convert_session_to_journal("u1", "s1") is None
+
+        fn, params = supabase.rpc.call_args_list[0].args
+        assert fn == "save_session_journal"
+        assert params == {
+            "p_user_id": "u1", "p_session_id": "s1", "p_title": "Today I talked.",
+            "p_content": "Today I talked.", "p_word_count": 3,
+        }
+        queue.assert_awaited_once()  # only the entry that was written is analyzed
+
+    @pytest.mark.asyncio
+    async def test_chat_conversion_failure_leaves_session_unsaved(self):
+        messages = [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}]
+        with patch(
+            "app.services.chat_service._conversion_source",
+            new=AsyncMock(return_value=({"id": "s1", "saved": False}, messages)),
+        ), patch("app.services.chat_service.routed_completion", new=AsyncMock(side_effect=Exception("503"))), \
+                patch("app.services.chat_service.journal_service.create_session_entry",
+                      new=AsyncMock()) as create:
+            with pytest.raises(RuntimeError, match="Failed to summarize"):
+                await chat_service._convert_session_job({"user_id": "u1", "session_id": "s1"}, False)
+
+        # Nothing was written, so the retry starts from scratch
+        create.assert_not_awaited()
@@ -2,14 +2,16 @@
 Tests for app/services/journal_service.py
 
 Covers:
-- create_entry: word count, AI analysis integration
+- create_entry / update_entry: saved as "pending" without waiting for the LLM, analysis queued
+- analyze_entry: one unified AI analysis written to both tables, analysis_status transitions
 - get_entries / get_entry: ownership verification
 - delete_entry: returns True on success
+- Bulk import: file parsing, batched inserts with preserved dates, deferred analysis
 """
 
-import pytest
-from unittest.mock import patch, MagicMock, AsyncMock
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import pytest
 
 # ── Helpers ────────────────────────────────────────────────────────────────
 
@@ -28,6 +30,7 @@ def _make_supabase(insert_data=None, select_data=None, delete_data=None):
     select_mock.order.return_value = select_mock
     select_mock.range.return_value = select_mock
     select_mock.limit.return_value = select_mock
+    select_mock.or_.return_value = select_mock
     client.table.return_value.select.return_value = select_mock
 
     # Delete chain: .delete().eq().eq().execute()
@@ -45,32 +48,93 @@ def _make_supabase(insert_data=None, select_data=None, delete_data=None):
 
 class TestCreateEntry:
     @pytest.mark.asyncio
-    async def test_creates_entry_with_word_count(self):
-        mock_analysis = {
-            "ai_multi_tags": ["Joyful"],
-            "detailed_sentiment_report": "You seem happy."
-        }
-        supabase = _make_supabase()
+    async def test_saves_pending_entry_and_queues_analysis(self):
+        supabase = _make_supabase(insert_data=[{
+            "id": "e1", "user_id": "u1", "content": "Hello world today",
+            "analysis_status": "pending", "updated_at": "2024-05-01T10:00:00+00:00",
+        }])
 
         with patch("app.services.journal_service.get_supabase_client", return_value=supabase), \
-             patch("app.services.journal_service._generate_journal_analysis", new_callable=AsyncMock, return_value=mock_analysis):
+             patch("app.services.journal_service._generate_journal_analysis", new_callable=AsyncMock) as analysis, \
+             patch("app.services.journal_service.jobs.enqueue_many", new_callable=AsyncMock, return_value=[7]) as enqueue:
             from app.services.journal_service import create_entry
             result = await create_entry("u1", "My day", "Hello world today", emotion_tag="Happy")
 
-        assert result is not None
         assert result["id"] == "e1"
+        assert result["analysis_status"] == "pending"
+        inserted = supabase.table.return_value.insert.call_args.args[0]
+        assert inserted["word_count"] == 3
+        assert inserted["analysis_status"] == "pending"
+        assert "ai_multi_tags" not in inserted
+        # No LLM call on the write path: the analysis job is versioned by updated_at
+        analysis.assert_not_called()
+        job = enqueue.await_args.args[0][0]
+        assert job["kind"] == "journal.analyze"
+        assert job["key"] == "journal-analysis:e1"
+        assert job["payload"]["source_version"] == "2024-05-01T10:00:00+00:00"
+
+    @pytest.mark.asyncio
+    async def test_queue_failure_marks_analysis_failed(self):
+        supabase = _make_supabase()
+
+        with patch("app.services.journal_service.get_supabase_client", return_value=supabase), \
+             patch("app.services.journal_service.jobs.enqueue_many", new_callable=AsyncMock, side_effect=Exception("db down")):
+            from app.services.journal_service import create_entry
+            result = await create_entry("u1", None, "Hello")
+
+        assert result["id"] == "e1"
+        assert result["analysis_status"] == "failed"
+        supabase.table.return_value.update.assert_called_once_with({"analysis_status": "failed"})
 
     @pytest.mark.asyncio
     async def test_raises_on_supabase_failure(self):
         supabase = _make_supabase(insert_data=[])  # Empty data = failure
-        mock_analysis = {"ai_multi_tags": [], "detailed_sentiment_report": None}
 
         with patch("app.services.journal_service.get_supabase_client", return_value=supabase), \
-             patch("app.services.journal_service._generate_journal_analysis", new_callable=AsyncMock, return_value=mock_analysis):
+             patch("app.services.journal_service.jobs.enqueue_many", new_callable=AsyncMock) as enqueue:
             from app.services.journal_service import create_entry
             with pytest.raises(Exception, match="Failed to create journal entry"):
                 await create_entry("u1", "Title", "Content")
 
+        enqueue.assert_not_called()
+
+
+class TestUpdateEntry:
+    @pytest.mark.asyncio
+    async def test_content_change_resets_status_and_requeues(self):
+        supabase = MagicMock()
+        update = supabase.table.return_value.update.return_value.eq.return_value.eq.return_value
+        update.execute.return_value = MagicMock(data=[
+            {"id": "e1", "content": "new text", "analysis_status": "pending", "updated_at": "v2"}
+        ])
+
+        with patch("app.services.journal_service.get_supabase_client", return_value=supabase), \
+             patch("app.services.journal_service._generate_journal_analysis", new_callable=AsyncMock) as analysis, \
+             patch("app.services.journal_service.jobs.enqueue_many", new_callable=AsyncMock, return_value=[7]) as enqueue:
+            from app.services.journal_service import update_entry
+            result = await update_entry("u1", "e1", content="new text")
+
+        assert result["analysis_status"] == "pending"
+        updates = supabase.table.return_value.update.call_args.args[0]
+        assert updates["analysis_status"] == "pending"
+        assert "ai_multi_tags" not in updates
+        analysis.assert_not_called()
+        assert enqueue.await_args.args[0][0]["payload"]["source_version"] == "v2"
+
+    @pytest.mark.asyncio
+    async def test_title_change_keeps_analysis(self):
+        supabase = MagicMock()
+        update = supabase.table.return_value.update.return_value.eq.return_value.eq.return_value
+        update.execute.return_value = MagicMock(data=[{"id": "e1", "title": "New", "analysis_status": "done"}])
+
+        with patch("app.services.journal_service.get_supabase_client", return_value=supabase), \
+             patch("app.services.journal_service.jobs.enqueue_many", new_callable=AsyncMock) as enqueue:
+            from app.services.journal_service import update_entry
+            await update_entry("u1", "e1", title="New")
+
+        assert "analysis_status" not in supabase.table.return_value.update.call_args.args[0]
+        enqueue.assert_not_called()
+
 
 # ── get_entries ────────────────────────────────────────────────────────────
 
@@ -86,6 +150,34 @@ class TestGetEntries:
 
         assert isinstance(result, list)
 
+    @pytest.mark.asyncio
+    async def test_uses_asyncpg_path_when_enabled(self):
+        supabase = _make_supabase()
+        rows = [{"id": "e1", "content": "hello"}]
+
+        with patch("app.services.journal_service.get_supabase_client", return_value=supabase), \
+             patch("app.models.postgres.is_enabled", return_value=True), \
+             patch("app.models.postgres.fetch_journal_entries", new_callable=AsyncMock, return_value=rows) as fetch:
+            from app.services.journal_service import JOURNAL_VIEW_COLUMNS, get_entries
+            result = await get_entries("u1", limit=10, offset=20)
+
+        assert result == rows
+        fetch.assert_awaited_once_with("u1", 10, 20, JOURNAL_VIEW_COLUMNS["full"])
+        supabase.table.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_summary_view_selects_excerpt_not_content(self):
+        supabase = _make_supabase(select_data=[])
+
+        with patch("app.services.journal_service.get_supabase_client", return_value=supabase):
+            from app.services.journal_service import get_entries
+            await get_entries("u1", view="summary")
+
+        columns = supabase.table.return_value.select.call_args.args[0]
+        assert "content_excerpt" in columns
+        assert "content," not in columns
+        assert "detailed_sentiment_report" not in columns
+
     @pytest.mark.asyncio
     async def test_returns_empty_list_when_no_entries(self):
         supabase = _make_supabase(select_data=[])
@@ -97,6 +189,46 @@ class TestGetEntries:
         assert result == []
 
 
+# ── get_entries_page (keyset) ──────────────────────────────────────────────
+
+class TestGetEntriesPage:
+    @pytest.mark.asyncio
+    async def test_returns_next_cursor_when_more_rows(self):
+        data = [
+            {"id": f"00000000-0000-4000-8000-00000000000{i}", "created_at": f"2024-05-0{9 - i}T10:00:00+00:00"}
+            for i in range(3)
+        ]
+        supabase = _make_supabase(select_data=data)
+
+        with patch("app.services.journal_service.get_supabase_client", return_value=supabase):
+            from app.services.journal_service import get_entries_page
+            page = await get_entries_page("u1", limit=2)
+
+        assert len(page["entries"]) == 2
+        assert page["next_cursor"] is not None
+        # Fetches one extra row to detect the next page
+        supabase.table.return_value.select.return_value.limit.assert_called_with(3)
+
+    @pytest.mark.asyncio
+    async def test_last_page_has_no_cursor(self):
+        supabase = _make_supabase(select_data=[{"id": "e1", "created_at": "2024-05-01T10:00:00+00:00"}])
+
+        with patch("app.services.journal_service.get_supabase_client", return_value=supabase):
+            from app.services.journal_service import get_entries_page
+            page = await get_entries_page("u1", limit=2)
+
+        assert page["next_cursor"] is None
+
+    @pytest.mark.asyncio
+    async def test_rejects_malformed_cursor(self):
+        supabase = _make_supabase()
+
+        with patch("app.services.journal_service.get_supabase_client", return_value=supabase):
+            from app.services.journal_service import get_entries_page
+            with pytest.raises(ValueError):
+                await get_entries_page("u1", cursor="garbage")
+
+
 # ── delete_entry ───────────────────────────────────────────────────────────
 
 class TestDeleteEntry:
@@ -126,3 +258,253 @@ class TestDeleteEntry:
             result = await delete_entry("u1", "00000000-0000-0000-0000-000000000000")
 
         assert result is False
+
+
+# ── bulk import ────────────────────────────────────────────────────────────
+
+class TestParseImportFile:
+    def test_json_array_and_wrapped_object(self):
+        from app.services.journal_service import parse_import_file
+        assert parse_import_file(b'[{"content": "a"}]', "x.json") == [{"content": "a"}]
+        assert parse_import_file(b'{"entries": [{"content": "a"}]}', "x.json") == [{"content": "a"}]
+
+    def test_ndjson_skips_other_export_resources(self):
+        from app.services.journal_service import parse_import_file
+        data = (
+            b'{"type": "journal_entries", "content": "a"}\n'
+            b'{"type": "chat_messages", "content": "hi"}\n\n'
+            b'{"content": "b"}\n'
+        )
+        assert [e["content"] for e in parse_import_file(data, "export.ndjson")] == ["a", "b"]
+
+    def test_csv_drops_empty_cells(self):
+        from app.services.journal_service import parse_import_file
+        data = b"title,content,created_at\n,hello,2023-05-01T10:00:00Z\n"
+        assert parse_import_file(data, "diary.CSV") == [
+            {"content": "hello", "created_at": "2023-05-01T10:00:00Z"}
+        ]
+
+    def test_rejects_garbage(self):
+        from app.services.journal_service import parse_import_file
+        with pytest.raises(ValueError):
+            parse_import_file(b"not json", "x.json")
+        with pytest.raises(ValueError):
+            parse_import_file(b'"just a string"', "x.json")
+
+
+class TestImportEntries:
+    @pytest.mark.asyncio
+    async def test_batches_and_preserves_created_at(self):
+        from datetime import datetime, timezone
+        supabase = MagicMock()
+        insert = supabase.table.return_value.insert
+        insert.return_value.select.return_value.execute.side_effect = lambda: MagicMock(
+            data=[{"id": f"e{i}", "content": "x"} for i in range(len(insert.call_args.args[0]))]
+        )
+        written = datetime(2022, 3, 4, 5, 6, tzinfo=timezone.utc)
+        entries = [{"content": "one two", "created_at": written}] + [{"content": "x"}] * 4
+
+        with patch("app.services.journal_service.get_supabase_client", return_value=supabase), \
+             patch("app.services.journal_service.IMPORT_BATCH_SIZE", 2), \
+             patch("app.services.journal_service.queue_entry_analysis",
+                   new=AsyncMock(side_effect=lambda user_id, rows, priority: len(rows))) as queue, \
+             patch("app.services.journal_service._generate_journal_analysis", new_callable=AsyncMock) as analysis:
+            from app.services.journal_service import import_entries
+            result = await import_entries("u1", entries)
+
+        assert result == {"imported": 5, "queued_for_analysis": 5}
+        assert insert.call_count == 3
+        # Each batch is queued (bulk priority) as soon as it is inserted
+        assert [len(c.args[1]) for c in queue.call_args_list] == [2, 2, 1]
+        assert all(c.args[2] == 10 for c in queue.call_args_list)
+        first_batch = insert.call_args_list[0].args[0]
+        assert first_batch[0]["created_at"] == written.isoformat()
+        assert first_batch[0]["word_count"] == 2
+        assert "created_at" not in first_batch[1]
+        assert insert.call_args_list[0].kwargs == {"default_to_null": False}
+        # No AI work on the import path
+        analysis.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_leaves_earlier_batches_queued(self):
+        supabase = MagicMock()
+        insert = supabase.table.return_value.insert
+        insert.return_value.select.return_value.execute.side_effect = [
+            MagicMock(data=[{"id": "e0", "content": "x"}, {"id": "e1", "content": "x"}]),
+            Exception("db down"),
+        ]
+
+        with patch("app.services.journal_service.get_supabase_client", return_value=supabase), \
+             patch("app.services.journal_service.IMPORT_BATCH_SIZE", 2), \
+             patch("app.services.journal_service.queue_entry_analysis", new=AsyncMock(return_value=2)) as queue:
+            from app.services.journal_service import import_entries
+            with pytest.raises(Exception, match="db down"):
+                await import_entries("u1", [{"content": "x"}] * 4)
+
+        assert [row["id"] for row in queue.await_args.args[1]] == ["e0", "e1"]
+
+    @pytest.mark.asyncio
+    async def test_queue_failure_marks_batch_failed(self):
+        supabase = MagicMock()
+        supabase.table.return_value.insert.return_value.select.return_value.execute.return_value = MagicMock(
+            data=[{"id": "e0", "content": "x"}, {"id": "e1", "content": "x"}]
+        )
+
+        with patch("app.services.journal_service.get_supabase_client", return_value=supabase), \
+             patch("app.services.journal_service.queue_entry_analysis",
+                   new=AsyncMock(side_effect=Exception("queue down"))):
+            from app.services.journal_service import import_entries
+            result = await import_entries("u1", [{"content": "x"}] * 2)
+
+        assert result == {"imported": 2, "queued_for_analysis": 0}
+        update = supabase.table.return_value.update
+        update.assert_called_once_with({"analysis_status": "failed"})
+        update.return_value.eq.return_value.in_.assert_called_once_with("id", ["e0", "e1"])
+
+    @pytest.mark.asyncio
+    async def test_analyze_entry_updates_tags_and_stores_emotions(self):
+        supabase = MagicMock()
+        analysis = {
+            "ai_multi_tags": ["Calm"], "detailed_sentiment_report": "You felt calm.",
+            "emotions": {"calm": 0.8}, "primary_emotion": "calm",
+        }
+
+        with patch("app.services.journal_service.get_supabase_client", return_value=supabase), \
+             patch("app.services.journal_service._generate_journal_analysis", new_callable=AsyncMock, return_value=analysis), \
+             patch("app.services.emotion_service.store_analysis", new_callable=AsyncMock) as store:
+            from app.services.journal_service import analyze_entry
+            await analyze_entry("u1", "e1", "a calm day")
+
+        assert [c.args[0] for c in supabase.table.return_value.update.call_args_list] == [
+            {"analysis_status": "running"},
+            {"ai_multi_tags": ["Calm"], "detailed_sentiment_report": "You felt calm.", "analysis_status": "done"},
+        ]
+        store.assert_awaited_once_with("u1", "journal", "e1", "a calm day", analysis, source_version=None)
+
+    @pytest.mark.asyncio
+    async def test_analyze_entry_stores_fallback_as_failed(self):
+        supabase = MagicMock()
+
+        with patch("app.services.journal_service.get_supabase_client", return_value=supabase), \
+             patch("app.services.journal_service._call_journal_analysis", new_callable=AsyncMock, side_effect=Exception("API down")), \
+             patch("app.services.journal_service.cache.content_cached", new=lambda *args: args[-1]()), \
+             patch("app.services.emotion_service.store_analysis", new_callable=AsyncMock) as store:
+            from app.services.journal_service import analyze_entry
+            await analyze_entry("u1", "e1", "I feel terrible and hopeless.")
+
+        final = supabase.table.return_value.update.call_args.args[0]
+        assert final == {"ai_multi_tags": [], "detailed_sentiment_report": None, "analysis_status": "failed"}
+        assert store.await_args.args[4]["primary_emotion"] == "sadness"
+
+    @pytest.mark.asyncio
+    async def test_analyze_entry_strict_raises_for_retry(self):
+        supabase = MagicMock()
+
+        with patch("app.services.journal_service.get_supabase_client", return_value=supabase), \
+             patch("app.services.journal_service._generate_journal_analysis", new_callable=AsyncMock, side_effect=Exception("API down")), \
+             patch("app.services.emotion_service.store_analysis", new_callable=AsyncMock) as store:
+            from app.services.journal_service import _analyze_entry_job
+            with pytest.raises(Exception, match="API down"):
+                await _analyze_entry_job(
+                    {"user_id": "u1", "entry_id": "e1", "content": "text", "source_version": "v1"}, False
+                )
+
+        # running, then back to pending for the retry
+        assert [c.args[0] for c in supabase.table.return_value.update.call_args_list] == [
+            {"analysis_status": "running"}, {"analysis_status": "pending"},
+        ]
+        store.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_analyze_entry_skips_entry_edited_since_queued(self):
+        supabase = MagicMock()
+        update = supabase.table.return_value.update.return_value.eq.return_value.eq.return_value.eq.return_value
+        update.execute.return_value = MagicMock(data=[])  # updated_at no longer matches
+        analysis = {
+            "ai_multi_tags": ["Calm"], "detailed_sentiment_report": "You felt calm.",
+            "emotions": {"calm": 0.8}, "primary_emotion": "calm",
+        }
+
+        with patch("app.services.journal_service.get_supabase_client", return_value=supabase), \
+             patch("app.services.journal_service._generate_journal_analysis", new_callable=AsyncMock, return_value=analysis) as generate, \
+             patch("app.services.emotion_service.store_analysis", new_callable=AsyncMock) as store:
+            from app.services.journal_service import analyze_entry
+            await analyze_entry("u1", "e1", "a calm day", "2024-05-01T10:00:00+00:00")
+
+        supabase.table.return_value.update.assert_called_once_with({"analysis_status": "running"})
+        supabase.table.return_value.update.return_value.eq.return_value.eq.return_value.eq.assert_called_once_with(
+            "updated_at", "2024-05-01T10:00:00+00:00"
+        )
+        # No LLM call for an entry whose newer version has its own job
+        generate.assert_not_called()
+        store.assert_not_called()
+
+
+class TestUnifiedAnalysis:
+    @pytest.fixture(autouse=True)
+    def short_batch_window(self):
+        from app.services.journal_service import _journal_batcher
+        with patch.object(_journal_batcher, "_max_wait_ms", lambda: 5):
+            yield
+
+    @pytest.mark.asyncio
+    async def test_one_call_returns_tags_report_and_emotions(self, mock_groq_client):
+        mock_groq_client.chat.completions.create.return_value = MagicMock(choices=[MagicMock(message=MagicMock(
+            content='{"ai_multi_tags": ["Hopeful"], "detailed_sentiment_report": "You felt hopeful.", '
+                    '"emotions": {"hope": 0.8, "calm": 0.3}, "primary_emotion": "Hopefulness"}'
+        ))])
+
+        with patch("app.services.ai_client.get_groq_client", return_value=mock_groq_client):
+            from app.services.journal_service import _generate_journal_analysis
+            result = await _generate_journal_analysis("Tomorrow will be better.")
+
+        mock_groq_client.chat.completions.create.assert_awaited_once()
+        assert result["ai_multi_tags"] == ["Hopeful"]
+        assert result["emotions"] == {"hope": 0.8, "calm": 0.3}
+        # Primary emotion outside EMOTION_LIST is corrected to the top-scoring one
+        assert result["primary_emotion"] == "hope"
+
+    @pytest.mark.asyncio
+    async def test_failure_falls_back_for_both_halves(self, mock_groq_client):
+        mock_groq_client.chat.completions.create.side_effect = Exception("API down")
+
+        with patch("app.services.ai_client.get_groq_client", return_value=mock_groq_client):
+            from app.services.journal_service import _generate_journal_analysis
+            result = await _generate_journal_analysis("I feel terrible and hopeless.")
+
+        assert result["ai_multi_tags"] == []
+        assert result["detailed_sentiment_report"] is None
+        assert result["primary_emotion"] == "sadness"
+
+    @pytest.mark.asyncio
+    async def test_concurrent_entries_share_one_batched_call(self, mock_groq_client):
+        mock_groq_client.chat.completions.create.return_value = MagicMock(choices=[MagicMock(message=MagicMock(
+            content='{"results": ['
+                    '{"id": "1", "ai_multi_tags": ["Angry"], "detailed_sentiment_report": "You were angry.", '
+                    '"emotions": {"anger": 0.9}, "primary_emotion": "anger"}, '
+                    '{"id": "0", "ai_multi_tags": ["Calm"], "detailed_sentiment_report": "You were calm.", '
+                    '"emotions": {"calm": 0.7}, "primary_emotion": "calm"}]}'
+        ))])
+
+        with patch("app.services.ai_client.get_groq_client", return_value=mock_groq_client):
+            import asyncio
+
+            from app.services.journal_service import _generate_journal_analysis
+            calm, angry = await asyncio.gather(
+                _generate_journal_analysis("A quiet walk by the lake."),
+                _generate_journal_analysis("The meeting went terribly."),
+            )
+
+        mock_groq_client.chat.completions.create.assert_awaited_once()
+        assert calm["ai_multi_tags"] == ["Calm"] and calm["primary_emotion"] == "calm"
+        assert angry["ai_multi_tags"] == ["Angry"] and angry["primary_emotion"] == "anger"
+
+    @pytest.mark.asyncio
+    async def test_failure_uses_local_classifier_before_textblob(self, mock_groq_client):
+        mock_groq_client.chat.completions.create.side_effect = Exception("API down")
+
+        with patch("app.services.ai_client.get_groq_client", return_value=mock_groq_client):
+            from app.services.journal_service import _generate_journal_analysis
+            result = await _generate_journal_analysis("I'm so worried about my exam tomorrow")
+
+        assert result["primary_emotion"] == "anxiety"
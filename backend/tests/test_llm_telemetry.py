@@ -0,0 +1,90 @@
+"""
+Tests for app/services/llm_telemetry.py
+
+Covers:
+- Tokens, cost and latency buckets aggregate per task and model
+- Batched calls split usage across users
+- The per-user roll-up is logged when the day changes
+- ai_client records every call with its task and usage
+"""
+
+import json
+from datetime import date
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services import ai_client, llm_telemetry
+
+
+@pytest.fixture(autouse=True)
+def fresh_telemetry():
+    llm_telemetry._by_task.clear()
+    llm_telemetry._daily.update({"date": None, "users": {}})
+    yield
+    llm_telemetry._by_task.clear()
+    llm_telemetry._daily.update({"date": None, "users": {}})
+
+
+def _usage(prompt, completion):
+    return MagicMock(prompt_tokens=prompt, completion_tokens=completion)
+
+
+class TestRecord:
+    def test_aggregates_per_task_and_model(self):
+        with llm_telemetry.attributed("u1"):
+            llm_telemetry.record("chat", "llama-3.3-70b-versatile", 300, _usage(1000, 200))
+            llm_telemetry.record("chat", "llama-3.3-70b-versatile", 3000, error=True)
+
+        stats = llm_telemetry.get_telemetry_stats()["tasks"]["chat:llama-3.3-70b-versatile"]
+        assert stats["calls"] == 2 and stats["errors"] == 1
+        assert stats["prompt_tokens"] == 1000 and stats["completion_tokens"] == 200
+        assert stats["cost_usd"] == pytest.approx((1000 * 0.59 + 200 * 0.79) / 1e6)
+        # 300 ms lands in the <=500 bucket, 3000 ms in the <=5000 bucket
+        buckets = stats["latency_ms_buckets"]
+        assert buckets[llm_telemetry.LATENCY_BUCKETS_MS.index(500)] == 1
+        assert buckets[llm_telemetry.LATENCY_BUCKETS_MS.index(5000)] == 1
+
+    def test_batched_call_split_across_users(self):
+        with llm_telemetry.attributed(("u1", "u2")):
+            llm_telemetry.record("emotion", "m", 100, _usage(300, 100))
+
+        users = llm_telemetry._daily["users"]
+        assert users["u1"]["prompt_tokens"] == 150 and users["u2"]["completion_tokens"] == 50
+        # The metrics payload only carries today's totals
+        today = llm_telemetry.get_telemetry_stats()["today"]
+        assert today["users"] == 2 and today["prompt_tokens"] == 300 and "top_users" not in today
+
+    def test_unattributed_calls_are_anonymous(self):
+        llm_telemetry.record("triage", "m", 100, _usage(10, 10))
+        assert list(llm_telemetry._daily["users"]) == ["anonymous"]
+
+    def test_day_change_logs_rollup(self, capsys):
+        llm_telemetry._daily.update({
+            "date": date(2024, 1, 1),
+            "users": {"u1": {"calls": 3, "prompt_tokens": 900, "completion_tokens": 90, "cost_usd": 0.001}},
+        })
+        llm_telemetry.record("chat", "m", 100, _usage(1, 1))
+
+        line = json.loads(capsys.readouterr().out.strip().splitlines()[0])
+        assert line == {
+            "event": "llm_daily_usage", "date": "2024-01-01", "user_id": "u1",
+            "calls": 3, "prompt_tokens": 900, "completion_tokens": 90, "cost_usd": 0.001,
+        }
+        assert list(llm_telemetry._daily["users"]) == ["anonymous"]
+
+
+class TestClientRecording:
+    @pytest.mark.asyncio
+    async def test_chat_completion_records_task_and_usage(self, mock_groq_client):
+        mock_groq_client.chat.completions.create.return_value = MagicMock(usage=_usage(50, 5))
+
+        with patch("app.services.ai_client.get_groq_client", return_value=mock_groq_client), \
+             llm_telemetry.attributed("u9"):
+            await ai_client.chat_completion(model="m", messages=[], task="title")
+
+        stats = llm_telemetry.get_telemetry_stats()
+        assert stats["tasks"]["title:m"]["prompt_tokens"] == 50
+        assert list(llm_telemetry._daily["users"]) == ["u9"]
+        # The model kwarg still reaches the SDK
+        assert mock_groq_client.chat.completions.create.call_args.kwargs["model"] == "m"
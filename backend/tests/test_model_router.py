@@ -0,0 +1,109 @@
+"""
+Tests for app/services/model_router.py
+
+Covers:
+- Tasks resolve to their tier's model from settings
+- A failed or over-budget call falls back to the next tier
+- Streams fall back only before the first delta
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.config import get_settings
+from app.services import model_router
+
+
+@pytest.fixture
+def tiers():
+    """Small budgets and a fast → large fallback, restored afterwards."""
+    settings = get_settings()
+    saved = {k: getattr(settings, k) for k in ("llm_tier_fast_budget_s", "llm_tier_large_budget_s", "llm_task_tiers")}
+    settings.llm_tier_fast_budget_s = 0.05
+    settings.llm_tier_large_budget_s = 0.5
+    settings.llm_task_tiers = "chat=large,title=fast"
+    yield settings
+    for key, value in saved.items():
+        setattr(settings, key, value)
+
+
+class TestRouting:
+    def test_task_maps_to_tier_model(self, tiers):
+        assert model_router.model_for("title") == tiers.llm_tier_fast_model
+        assert model_router.model_for("chat") == tiers.llm_tier_large_model
+        # Tasks missing from the map default to the large tier
+        assert model_router.tier_for("triage") == "large"
+
+    def test_unknown_task_rejected(self):
+        with pytest.raises(ValueError):
+            model_router.tier_for("poetry")
+
+    def test_fallback_chain_stops_on_cycle(self, tiers):
+        tiers.llm_tier_large_fallback = "fast"
+        try:
+            assert [t["name"] for t in model_router._chain("title")] == ["fast", "large"]
+        finally:
+            tiers.llm_tier_large_fallback = ""
+
+
+class TestRoutedCompletion:
+    @pytest.mark.asyncio
+    async def test_error_falls_back_to_next_tier(self, tiers):
+        call = AsyncMock(side_effect=[Exception("503"), "reply"])
+
+        with patch("app.services.model_router.chat_completion", call):
+            assert await model_router.routed_completion("title", messages=[]) == "reply"
+
+        models = [c.kwargs["model"] for c in call.call_args_list]
+        assert models == [tiers.llm_tier_fast_model, tiers.llm_tier_large_model]
+        assert call.call_args_list[0].kwargs["timeout"] == 0.05
+
+    @pytest.mark.asyncio
+    async def test_budget_exceeded_falls_back(self, tiers):
+        async def call(model, **kwargs):
+            if model == tiers.llm_tier_fast_model:
+                await asyncio.sleep(1)
+            return model
+
+        with patch("app.services.model_router.chat_completion", call):
+            assert await model_router.routed_completion("title", messages=[]) == tiers.llm_tier_large_model
+
+    @pytest.mark.asyncio
+    async def test_last_tier_error_raised(self, tiers):
+        with patch("app.services.model_router.chat_completion", AsyncMock(side_effect=Exception("down"))):
+            with pytest.raises(Exception, match="down"):
+                await model_router.routed_completion("chat", messages=[])
+
+
+def _stream(*deltas, error=None):
+    async def gen(**kwargs):
+        for delta in deltas:
+            yield delta
+        if error:
+            raise error
+    return gen
+
+
+class TestRoutedStream:
+    @pytest.mark.asyncio
+    async def test_falls_back_before_first_delta(self, tiers):
+        streams = iter([_stream(error=Exception("503")), _stream("hi", "!")])
+
+        with patch("app.services.model_router.stream_chat_completion", lambda **kw: next(streams)(**kw)):
+            deltas = [d async for d in model_router.routed_stream("title", messages=[])]
+
+        assert deltas == ["hi", "!"]
+
+    @pytest.mark.asyncio
+    async def test_no_fallback_after_first_delta(self, tiers):
+        streams = iter([_stream("partial", error=Exception("reset")), _stream("again")])
+
+        with patch("app.services.model_router.stream_chat_completion", lambda **kw: next(streams)(**kw)):
+            deltas = []
+            with pytest.raises(Exception, match="reset"):
+                async for delta in model_router.routed_stream("title", messages=[]):
+                    deltas.append(delta)
+
+        assert deltas == ["partial"]
@@ -0,0 +1,76 @@
+"""
+Tests for app/utils/pagination.py
+
+Covers:
+- Cursor round trip and rejection of malformed / tampered cursors
+- next_cursor: only emitted when an extra row signals another page
+- apply_keyset: PostgREST filter + (sort, id) ordering
+"""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.utils.pagination import apply_keyset, decode_cursor, encode_cursor, next_cursor
+
+TS = "2024-05-01T10:00:00.123+00:00"
+ROW_ID = "0b6f1c9e-8a57-4f3e-9a0e-1d2c3b4a5f60"
+
+
+class TestCursorEncoding:
+    def test_round_trip(self):
+        assert decode_cursor(encode_cursor(TS, ROW_ID)) == (TS, ROW_ID)
+
+    def test_cursor_is_url_safe(self):
+        cursor = encode_cursor(TS, ROW_ID)
+        assert all(c.isalnum() or c in "-_" for c in cursor)
+
+    @pytest.mark.parametrize("bad", [
+        "not-a-cursor",
+        encode_cursor("yesterday", ROW_ID),
+        encode_cursor(TS, "1),user_id.neq.(x"),
+    ])
+    def test_rejects_malformed_cursor(self, bad):
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            decode_cursor(bad)
+
+
+class TestNextCursor:
+    def test_none_when_no_extra_row(self):
+        rows = [{"id": ROW_ID, "created_at": TS}]
+        assert next_cursor(rows, limit=1) is None
+
+    def test_points_at_last_row_of_page(self):
+        rows = [
+            {"id": ROW_ID, "created_at": TS},
+            {"id": "ffffffff-ffff-4fff-8fff-ffffffffffff", "created_at": "2024-04-30T09:00:00+00:00"},
+        ]
+        assert decode_cursor(next_cursor(rows, limit=1)) == (TS, ROW_ID)
+
+
+class TestApplyKeyset:
+    def _query(self):
+        query = MagicMock()
+        query.or_.return_value = query
+        query.order.return_value = query
+        return query
+
+    def test_first_page_only_orders(self):
+        query = self._query()
+        apply_keyset(query, None)
+        query.or_.assert_not_called()
+        assert [c.args[0] for c in query.order.call_args_list] == ["created_at", "id"]
+
+    def test_seeks_past_cursor_row(self):
+        query = self._query()
+        apply_keyset(query, encode_cursor(TS, ROW_ID))
+        expr = query.or_.call_args.args[0]
+        assert expr == (
+            f'created_at.lt."{TS}",'
+            f'and(created_at.eq."{TS}",id.lt.{ROW_ID})'
+        )
+
+    def test_ascending_uses_gt(self):
+        query = self._query()
+        apply_keyset(query, encode_cursor(TS, ROW_ID), descending=False)
+        assert query.or_.call_args.args[0].startswith(f'created_at.gt."{TS}"')
@@ -0,0 +1,220 @@
+"""
+Tests for app/services/resilience.py and its use in model_router
+
+Covers:
+- Breaker opens after consecutive failures, probes after the cooldown
+- Hedged calls: the faster of two requests wins, errors surface when both fail
+- Against a fake Groq endpoint with injected latency: slow tiers trip their
+  breaker and are skipped, and task deadlines bound the whole call
+"""
+
+import asyncio
+import json
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+import pytest_asyncio
+from groq import AsyncGroq
+
+from app.config import Settings
+from app.services import ai_client, model_router
+from app.services.resilience import CircuitBreaker, CircuitOpenError, hedged
+
+
+def _breaker(threshold=2, cooldown=0.05):
+    return CircuitBreaker("test", lambda: threshold, lambda: cooldown)
+
+
+class TestCircuitBreaker:
+    def test_opens_after_consecutive_failures(self):
+        breaker = _breaker()
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == "open"
+        assert not breaker.allow()
+        assert breaker.stats()["trips"] == 1 and breaker.stats()["rejected"] == 1
+
+    def test_success_resets_count(self):
+        breaker = _breaker()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == "closed"
+
+    @pytest.mark.asyncio
+    async def test_single_probe_after_cooldown(self):
+        breaker = _breaker()
+        breaker.record_failure()
+        breaker.record_failure()
+        await asyncio.sleep(0.06)
+
+        assert breaker.allow() and breaker.state == "half_open"
+        assert not breaker.allow()  # probe already in flight
+        breaker.record_failure()
+        assert breaker.state == "open"
+
+        await asyncio.sleep(0.06)
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == "closed" and breaker.allow()
+
+
+class TestHedged:
+    @pytest.mark.asyncio
+    async def test_second_request_wins_when_first_is_slow(self):
+        delays = iter([1.0, 0.01])
+        started = []
+
+        async def call():
+            delay = next(delays)
+            started.append(delay)
+            await asyncio.sleep(delay)
+            return delay
+
+        begin = time.perf_counter()
+        assert await hedged(call, 0.02) == 0.01
+        assert time.perf_counter() - begin < 0.5
+        assert started == [1.0, 0.01]
+
+    @pytest.mark.asyncio
+    async def test_no_hedge_when_first_is_fast(self):
+        calls = []
+
+        async def call():
+            calls.append(1)
+            return "ok"
+
+        assert await hedged(call, 0.05) == "ok"
+        assert calls == [1]
+
+    @pytest.mark.asyncio
+    async def test_raises_when_both_fail(self):
+        async def call():
+            await asyncio.sleep(0.02)
+            raise RuntimeError("503")
+
+        with pytest.raises(RuntimeError):
+            await hedged(call, 0.01)
+
+
+# ── Against a fake Groq endpoint ───────────────────────────────────────────
+
+FAST, LARGE = "fake-fast", "fake-large"
+
+
+def _completion(model):
+    return {
+        "id": "c", "object": "chat.completion", "created": 0, "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": model}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+    }
+
+
+@pytest_asyncio.fixture
+async def fake_groq():
+    """AsyncGroq on an in-process transport; per-model latency is set through `latency`."""
+    latency = {FAST: 0.0, LARGE: 0.0}
+    requests = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        model = json.loads(request.content)["model"]
+        requests.append(model)
+        await asyncio.sleep(latency[model])
+        return httpx.Response(200, json=_completion(model))
+
+    settings = Settings(
+        llm_tier_fast_model=FAST, llm_tier_fast_budget_s=0.05, llm_tier_fast_fallback="large",
+        llm_tier_large_model=LARGE, llm_tier_large_budget_s=0.5, llm_tier_large_fallback="",
+        llm_task_tiers="title=fast,chat=large", llm_task_deadlines="title=1,chat=0.1",
+        llm_breaker_failures=2, llm_breaker_cooldown_s=60,
+    )
+    client = AsyncGroq(
+        api_key="test", max_retries=0,
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+    with patch("app.services.model_router.get_settings", return_value=settings), \
+         patch("app.services.ai_client.get_settings", return_value=settings), \
+         patch("app.services.ai_client.get_groq_client", return_value=client):
+        ai_client._limiter = None
+        yield latency, requests
+        ai_client._limiter = None
+    await client.close()
+
+
+class TestRouterResilience:
+    @pytest.mark.asyncio
+    async def test_slow_tier_trips_breaker_and_is_skipped(self, fake_groq):
+        latency, requests = fake_groq
+        latency[FAST] = 0.2  # over the fast tier's 50 ms budget
+
+        for _ in range(2):
+            response = await model_router.routed_completion("title", messages=[])
+            assert response.choices[0].message.content == LARGE
+        assert model_router._breakers["fast"].state == "open"
+
+        requests.clear()
+        fallbacks = model_router.get_router_stats()["tasks"]["title"]["fallbacks"]
+        begin = time.perf_counter()
+        await model_router.routed_completion("title", messages=[])
+        # Straight to the large tier: no wasted wait on the fast one
+        assert requests == [LARGE]
+        assert time.perf_counter() - begin < 0.05
+        stats = model_router.get_router_stats()["tasks"]["title"]
+        assert stats["short_circuits"] == 1
+        # Served off the task's own tier, so still a fallback
+        assert stats["fallbacks"] == fallbacks + 1
+
+    @pytest.mark.asyncio
+    async def test_slow_success_counts_against_breaker(self, fake_groq):
+        latency, _ = fake_groq
+        latency[LARGE] = 0.45  # under the 0.5 s budget, over 80% of it
+
+        settings = model_router.get_settings()
+        settings.llm_task_deadlines = "chat=5"
+        for _ in range(2):
+            await model_router.routed_completion("chat", messages=[])
+
+        assert model_router._breakers["large"].state == "open"
+        with pytest.raises(CircuitOpenError):
+            await model_router.routed_completion("chat", messages=[])
+
+    @pytest.mark.asyncio
+    async def test_task_deadline_bounds_call(self, fake_groq):
+        latency, _ = fake_groq
+        latency[LARGE] = 0.3  # within the tier budget, past the 0.1 s chat deadline
+
+        begin = time.perf_counter()
+        with pytest.raises(asyncio.TimeoutError):
+            await model_router.routed_completion("chat", messages=[])
+        assert time.perf_counter() - begin < 0.2
+
+    @pytest.mark.asyncio
+    async def test_hedged_task_uses_faster_duplicate(self, fake_groq):
+        latency, requests = fake_groq
+        settings = model_router.get_settings()
+        settings.llm_hedge_tasks = "title"
+        settings.llm_hedge_delay_ms = 10
+        settings.llm_tier_fast_budget_s = 0.5
+
+        slow_first = iter([0.3, 0.0])
+
+        async def handler(request):
+            requests.append("x")
+            await asyncio.sleep(next(slow_first))
+            return httpx.Response(200, json=_completion(FAST))
+
+        client = AsyncGroq(
+            api_key="test", max_retries=0,
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        )
+        with patch("app.services.ai_client.get_groq_client", return_value=client):
+            begin = time.perf_counter()
+            await model_router.routed_completion("title", messages=[])
+            elapsed = time.perf_counter() - begin
+        await client.close()
+
+        assert len(requests) == 2
+        assert elapsed < 0.2
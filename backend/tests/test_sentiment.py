@@ -0,0 +1,82 @@
+"""
+Tests for app/services/sentiment.py
+
+Covers:
+- Scores match TextBlob(text).sentiment.polarity (rounded to 3 places)
+- Tokenization of contractions, punctuation, abbreviations and emoticons
+- Batch scoring equals one-at-a-time scoring; large batches use the process pool
+- warm_up loads the lexicon before the first text is scored
+"""
+
+import pytest
+from textblob import TextBlob
+
+from app.config import get_settings
+from app.services import sentiment
+
+TEXTS = [
+    "I am so happy and grateful today!",
+    "Everything feels hopeless and terrible.",
+    "I went to the store.",
+    "I'm really not good :(",
+    "It's not bad at all",
+    "This is (!) great...",
+    "Mr. Smith was terribly sad. U.S. trip was nice!!",
+    "Wow :-) so good!\n\nNext day: awful",
+    '"Great," she said. \'Never again.\'',
+    "आज बहुत थकान महसूस हो रही है।",
+    "",
+]
+
+
+class TestScore:
+    @pytest.mark.parametrize("text", TEXTS)
+    def test_matches_textblob(self, text):
+        assert sentiment.score(text) == round(TextBlob(text).sentiment.polarity, 3)
+
+    def test_range(self):
+        assert all(-1.0 <= score <= 1.0 for score in sentiment.score_batch(TEXTS))
+
+    def test_batch_matches_single(self):
+        assert sentiment.score_batch(TEXTS) == [sentiment.score(text) for text in TEXTS]
+
+    def test_empty_batch(self):
+        assert sentiment.score_batch([]) == []
+
+
+class TestTokenize:
+    def test_contractions_and_punctuation(self):
+        assert sentiment.tokenize("I don't know, really!") == ["i", "do", "n", "'", "t", "know", ",", "really", "!"]
+
+    def test_abbreviations_keep_their_period(self):
+        assert sentiment.tokenize("Mr. Smith left.") == ["mr.", "smith", "left", "."]
+
+    def test_emoticons_are_one_token(self):
+        assert ":-)" in sentiment.tokenize("nice :-)")
+
+
+class TestScoreTexts:
+    @pytest.mark.asyncio
+    async def test_small_batch_in_process(self):
+        assert await sentiment.score_texts(TEXTS) == sentiment.score_batch(TEXTS)
+
+    @pytest.mark.asyncio
+    async def test_large_batch_uses_pool(self):
+        settings = get_settings()
+        saved = settings.sentiment_pool_workers, settings.sentiment_pool_min_batch
+        settings.sentiment_pool_workers, settings.sentiment_pool_min_batch = 1, 4
+        before = sentiment.get_sentiment_stats()["pool_batches"]
+        try:
+            scores = await sentiment.score_texts(TEXTS)
+        finally:
+            sentiment.close_sentiment_pool()
+            settings.sentiment_pool_workers, settings.sentiment_pool_min_batch = saved
+
+        assert scores == sentiment.score_batch(TEXTS)
+        assert sentiment.get_sentiment_stats()["pool_batches"] == before + 1
+
+    @pytest.mark.asyncio
+    async def test_warm_up_loads_lexicon(self, monkeypatch):
+        monkeypatch.setattr(sentiment, "_lexicon", None)
+        await sentiment.warm_up()
+        assert sentiment.get_sentiment_stats()["lexicon_loaded"]
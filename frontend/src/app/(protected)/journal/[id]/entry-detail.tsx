@@ -50,6 +50,7 @@ interface Entry {
     content: string;
     ai_multi_tags: string[];
     detailed_sentiment_report: string | null;
+    analysis_status?: "pending" | "running" | "done" | "failed";
     word_count: number;
     created_at: string;
     updated_at: string;
@@ -75,6 +76,15 @@ export default function JournalEntryDetail({ entry }: { entry: Entry }) {
         hour: "numeric", minute: "2-digit",
     });
 
+    // Tags, report and emotions are filled in by a background job after saving
+    const analysisInProgress = entry.analysis_status === "pending" || entry.analysis_status === "running";
+
+    useEffect(() => {
+        if (!analysisInProgress) return;
+        const timer = setInterval(() => router.refresh(), 4000);
+        return () => clearInterval(timer);
+    }, [analysisInProgress, router]);
+
     // Fetch emotion analysis
     useEffect(() => {
         const fetchAnalysis = async () => {
@@ -100,7 +110,7 @@ export default function JournalEntryDetail({ entry }: { entry: Entry }) {
         };
 
         fetchAnalysis();
-    }, [entry.id]);
+    }, [entry.id, entry.analysis_status]);
 
     const handleSave = async () => {
         if (!content.trim()) {
@@ -310,6 +320,13 @@ export default function JournalEntryDetail({ entry }: { entry: Entry }) {
                         <h2 className="serif-text text-lg font-medium">AI Emotion Insight</h2>
                     </div>
                     
+                    {analysisInProgress && (
+                        <div className="flex items-center gap-2 text-sm text-[#8ca69e]">
+                            <span className="material-symbols-outlined text-base animate-spin">progress_activity</span>
+                            Preparing your reflection insight…
+                        </div>
+                    )}
+
                     {entry.detailed_sentiment_report && (
                         <div className="p-4 rounded-lg bg-primary/5 border border-primary/10 text-sm leading-relaxed text-foreground/80 italic">
                             "{entry.detailed_sentiment_report}"
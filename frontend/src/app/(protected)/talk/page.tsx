@@ -407,7 +407,8 @@ export default function TalkPage() {
                     headers: { Authorization: `Bearer ${token}` },
                 });
                 if (res.ok) {
-                    toast.success(language === "hi" ? "जर्नल के रूप में सहेजा गया!" : "Saved as Journal Entry!", { id: toastId });
+                    // 202: the entry is written by a background job and shows up in the journal shortly
+                    toast.success(language === "hi" ? "आपकी जर्नल एंट्री तैयार हो रही है, जल्द ही दिखेगी!" : "Your journal entry is being written and will appear shortly!", { id: toastId });
                     setSessionId(null);
                     setMessages([]);
                     router.push("/journal");